@@ -112,7 +112,222 @@ def register_cli_commands(app):
             click.echo('No users found')
         
         return
-        
+
+    @app.cli.command("report-worker")
+    @click.option("--once", is_flag=True, help="Exit once the queue is empty instead of waiting for new uploads.")
+    def report_worker(once):
+        """Process queued upload jobs (use with REPORT_JOB_RUNNER=process)."""
+        from app.services import report_jobs
+        click.echo("Report worker started.")
+        report_jobs.run_worker(app, once=once)
+
+    @app.cli.command("report-cache-stats")
+    def report_cache_stats():
+        """Show size and hit rate of each school's render cache."""
+        import os
+        from app.services.render_cache import RenderCache
+
+        schools_dir = os.path.join(app.config['STORAGE'], 'schools')
+        click.echo('\n=== Render cache ===')
+        for slug in sorted(os.listdir(schools_dir)) if os.path.isdir(schools_dir) else []:
+            cache_dir = os.path.join(schools_dir, slug, 'cache')
+            if not os.path.isdir(cache_dir):
+                continue
+            entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+                if not name.startswith('.') and os.path.isdir(os.path.join(cache_dir, name))]
+            size = sum(os.path.getsize(os.path.join(entry, file)) for entry in entries for file in os.listdir(entry))
+            stats = RenderCache.stats(cache_dir)
+            lookups = stats['hits'] + stats['misses']
+            hit_rate = f"{stats['hits'] / lookups:.0%}" if lookups else 'n/a'
+            click.echo(f"{slug}: {len(entries)} entries, {size / 1024 / 1024:.1f} MB, "
+                f"{stats['hits']} hits / {stats['misses']} misses ({hit_rate}), {stats['evictions']} evicted")
+
+    @app.cli.command("ingest-benchmark")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--repeat", type=int, default=5, show_default=True, help="Timed runs per reader.")
+    def ingest_benchmark(path, repeat):
+        """Time upload parsing of one game saved as both CSV and XLSX."""
+        import os
+        import tempfile
+        import time
+        import pandas as pd
+        from app.services import ingest
+
+        with tempfile.TemporaryDirectory() as folder:
+            # Both copies are written from the same rows so the formats are compared like for like
+            frame = pd.read_csv(path) if path.endswith('.csv') else pd.read_excel(path, engine='calamine')
+            csv_path, xlsx_path = os.path.join(folder, 'game.csv'), os.path.join(folder, 'game.xlsx')
+            frame.to_csv(csv_path, index=False)
+            frame.to_excel(xlsx_path, index=False)
+
+            readers = [
+                ('csv  ingest.parse', lambda: ingest.parse(csv_path)),
+                ('xlsx ingest.parse', lambda: ingest.parse(xlsx_path)),
+                ('xlsx read_excel (openpyxl)', lambda: pd.read_excel(xlsx_path, engine='openpyxl')),
+            ]
+            click.echo(f'{len(frame)} rows x {len(frame.columns)} columns, best of {repeat}:')
+            for name, read in readers:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    read()
+                    timings.append(time.perf_counter() - start)
+                click.echo(f'  {name:<28} {min(timings) * 1000:8.1f} ms')
+
+    @app.cli.command("report-table-benchmark")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False), required=False)
+    @click.option("--pitches", type=int, default=300, show_default=True, help="Size of the synthetic game timed when no PATH is given.")
+    @click.option("--pitchers", type=int, default=8, show_default=True, help="Pitchers in the synthetic game.")
+    @click.option("--repeat", type=int, default=5, show_default=True, help="Timed runs per implementation.")
+    def report_table_benchmark(path, pitches, pitchers, repeat):
+        """Time the pitch table of every pitcher in one game, per-row loop vs groupby."""
+        import time
+        from app.services import ingest
+        from app.services.game_frame import GameFrame
+        from app.services.report import build_table
+        from tests.report_reference import build_table_loop, sample_game
+
+        # The loop divides by zero on a pitch type that is NaN, so untagged rows are given the 'n/a' it skips
+        frame = ingest.parse(path)[0] if path else sample_game(pitches=pitches, pitchers=pitchers)
+        frame['TaggedPitchType'] = frame['TaggedPitchType'].fillna('n/a')
+        game = GameFrame(frame)
+        outings = [(pitcher_id, game.pitcher(pitcher_id)) for pitcher_id in game.pitcher_order]
+
+        click.echo(f'{len(game)} rows, {len(outings)} pitchers, best of {repeat}:')
+        for name, build in [('per-row loop (tests.report_reference)', build_table_loop), ('build_table', build_table)]:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for pitcher_id, pitcher_data in outings:
+                    build(pitcher_data, pitcher_id)
+                timings.append(time.perf_counter() - start)
+            click.echo(f'  {name:<38} {min(timings) * 1000:8.1f} ms')
+
+    @app.cli.command("archive-list")
+    @click.option("--school", "slug", default=None, help="School slug (default: every school).")
+    def archive_list(slug):
+        """List archived games."""
+        import os
+        from app.services.game_archive import GameArchive
+
+        schools_dir = os.path.join(app.config['STORAGE'], 'schools')
+        slugs = [slug] if slug else sorted(os.listdir(schools_dir)) if os.path.isdir(schools_dir) else []
+        for school_slug in slugs:
+            games = GameArchive.for_school(school_slug).games() if os.path.isdir(os.path.join(schools_dir, school_slug, 'archive')) else []
+            if not games:
+                continue
+            click.echo(f'\n=== {school_slug} ===')
+            for game in games:
+                click.echo(f"{game['content_hash']}  {game.get('date', '')}  {game.get('away_team', '')} @ {game.get('home_team', '')}  "
+                    f"{game.get('rows', 0)} rows  {game['size'] / 1024:.0f} KB  {game.get('filename', '')}")
+
+    @app.cli.command("archive-load")
+    @click.argument("content_hash")
+    @click.option("--school", "slug", required=True, help="School slug.")
+    @click.option("--pitcher", "pitcher_id", type=int, default=None, help="Only this TrackMan pitcher ID.")
+    @click.option("--columns", default=None, help="Comma-separated columns to read (default: all).")
+    @click.option("--output", default=None, help="Write the rows to this CSV instead of printing a summary.")
+    def archive_load(content_hash, slug, pitcher_id, columns, output):
+        """Read an archived game."""
+        from app.services.game_archive import GameArchive
+
+        columns = [column.strip() for column in columns.split(',')] if columns else None
+        try:
+            frame = GameArchive.for_school(slug).load(content_hash, columns=columns, pitcher_id=pitcher_id)
+        except FileNotFoundError as e:
+            click.echo(str(e))
+            return
+
+        if output:
+            frame.to_csv(output, index=False)
+            click.echo(f'Wrote {len(frame)} rows to {output}')
+        else:
+            click.echo(f'{len(frame)} rows, {len(frame.columns)} columns')
+            click.echo(frame.head(10).to_string(index=False))
+
+    @app.cli.command("archive-prune")
+    @click.option("--school", "slug", required=True, help="School slug.")
+    @click.option("--before", default=None, help="Delete games played before this date (YYYY-MM-DD).")
+    @click.option("--keep", type=int, default=None, help="Keep only this many of the most recent games.")
+    @click.option("--dry-run", is_flag=True, help="Only list what would be deleted.")
+    def archive_prune(slug, before, keep, dry_run):
+        """Delete archived games by date or count."""
+        from app.services.game_archive import GameArchive
+
+        if before is None and keep is None:
+            click.echo('Nothing to prune: pass --before and/or --keep')
+            return
+        pruned = GameArchive.for_school(slug).prune(before=before, keep=keep, dry_run=dry_run)
+        for game in pruned:
+            click.echo(f"{'Would delete' if dry_run else 'Deleted'} {game['content_hash']} ({game.get('date', '')})")
+        click.echo(f'{len(pruned)} game(s) {"would be " if dry_run else ""}pruned')
+
+    @app.cli.command("rebuild-pitcher-totals")
+    @click.option("--school", "slug", default=None, help="School slug (default: every school).")
+    @with_appcontext
+    def rebuild_pitcher_totals(slug):
+        """Recompute the dashboard's per-pitcher totals from the saved outings."""
+        from app.services import pitcher_totals
+
+        school_id = None
+        if slug:
+            school = models.School.query.filter_by(slug=slug).first()
+            if not school:
+                click.echo(f"School '{slug}' not found.")
+                return
+            school_id = school.id
+        pitchers, pitch_types = pitcher_totals.rebuild(school_id)
+        models.db.session.commit()
+        click.echo(f'Rebuilt totals for {pitchers} pitcher(s), {pitch_types} pitcher/pitch type row(s).')
+
+    @app.cli.command("rebuild-pitch-sketches")
+    @click.option("--school", "slug", default=None, help="School slug (default: every school).")
+    @with_appcontext
+    def rebuild_pitch_sketches(slug):
+        """Recompute the velocity, spin and break sketches of saved outings from their pitches."""
+        from app.services import team_stats
+
+        schools = models.School.query.filter_by(slug=slug).all() if slug else models.School.query.all()
+        if slug and not schools:
+            click.echo(f"School '{slug}' not found.")
+            return
+        for school in schools:
+            rows = team_stats.rebuild_pitch_sketches(school.id)
+            click.echo(f'{school.slug}: sketched {rows} outing pitch type row(s).')
+
+    @app.cli.command("stats-benchmark")
+    @click.argument("database_url")
+    @click.option("--schools", type=int, default=50, show_default=True, help="Synthetic schools (30 pitchers each).")
+    @click.option("--seasons", type=int, default=4, show_default=True, help="Seasons of history per school.")
+    @click.option("--games", type=int, default=45, show_default=True, help="Games per school per season.")
+    @click.option("--repeat", type=int, default=5, show_default=True, help="Timed runs per query.")
+    @click.option("--output", default=None, help="Also write plans and timings to this JSON file.")
+    def stats_benchmark(database_url, schools, seasons, games, repeat, output):
+        """Time the dashboard and save queries on a scratch database, without and with the stats indexes."""
+        import json
+        from app.services import stats_benchmark
+
+        if database_url == app.config['SQLALCHEMY_DATABASE_URI']:
+            click.echo("Refusing to benchmark the app's own database; pass a scratch database URL.")
+            return
+        if not click.confirm(f'Every app table in {database_url} will be dropped. Continue?'):
+            return
+
+        results = stats_benchmark.run(database_url, schools=schools, seasons=seasons, games=games, repeat=repeat)
+        click.echo(f"\n=== {results['database']}: " + ', '.join(f'{rows} {table}' for table, rows in results['rows'].items()) + ' ===')
+        click.echo(f"{'query':<30} {'before':>10} {'after':>10}")
+        for name, timing in results['queries'].items():
+            click.echo(f"{name:<30} {timing['before']['ms']:8.2f}ms {timing['after']['ms']:8.2f}ms")
+        for name, timing in results['queries'].items():
+            click.echo(f'\n{name}')
+            for label in ('before', 'after'):
+                click.echo(f'  {label}:')
+                for line in timing[label]['plan']:
+                    click.echo(f'    {line}')
+        if output:
+            with open(output, 'w') as f:
+                json.dump(results, f, indent=2)
+
     @app.cli.command()
     def create_school():
         name = input("Enter school name: ")
@@ -44,6 +44,7 @@ class User(UserMixin, db.Model):
     
 class Pitcher(db.Model):
     __tablename__ = 'pitchers'
+    __table_args__ = (db.Index('ix_pitchers_school_id', 'school_id'),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
@@ -56,11 +57,15 @@ class Pitcher(db.Model):
 
 class Outing(db.Model):
     __tablename__ = 'outings'
+    __table_args__ = (
+        db.Index('ix_outings_content_hash', 'content_hash'),
+        db.Index('ix_outings_pitcher_id_date', 'pitcher_id', 'date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     content_hash = db.Column(db.String(200), nullable=True)
     pitcher_id = db.Column(db.Integer, db.ForeignKey('pitchers.id'), nullable=False)
-    date = db.Column(db.String(20), nullable=False)
+    date = db.Column(db.Date, nullable=False)
     opponent = db.Column(db.String(100), nullable=True)
     is_home = db.Column(db.Boolean, default=True)
     notes = db.Column(db.Text, nullable=True)
@@ -111,6 +116,10 @@ class Pitch_Types(db.Model):
 
 class Outing_Pitch_Stat(db.Model):
     __tablename__ = 'outing_pitch_stats'
+    __table_args__ = (
+        db.Index('ix_outing_pitch_stats_outing_id', 'outing_id'),
+        db.Index('ix_outing_pitch_stats_pitcher_id_pitch_type_id', 'pitcher_id', 'pitch_type_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     pitcher_id = db.Column(db.Integer, db.ForeignKey('pitchers.id'), nullable=False)
@@ -129,4 +138,136 @@ class Outing_Pitch_Stat(db.Model):
     median_speed = db.Column(db.Float, nullable=True)
     high_quartile_speed = db.Column(db.Float, nullable=True)
 
+    # Mergeable histograms of the outing's pitches (see services/sketches.py)
+    speed_sketch = db.Column(db.LargeBinary, nullable=True)
+    spin_rate_sketch = db.Column(db.LargeBinary, nullable=True)
+    induced_vert_break_sketch = db.Column(db.LargeBinary, nullable=True)
+    horz_break_sketch = db.Column(db.LargeBinary, nullable=True)
+
+    # Count, mean and M2 of the outing's pitches per metric, merged across outings by services/moments.py
+    rel_speed_count = db.Column(db.Integer, nullable=True)
+    rel_speed_mean = db.Column(db.Float, nullable=True)
+    rel_speed_m2 = db.Column(db.Float, nullable=True)
+    induced_vert_break_count = db.Column(db.Integer, nullable=True)
+    induced_vert_break_mean = db.Column(db.Float, nullable=True)
+    induced_vert_break_m2 = db.Column(db.Float, nullable=True)
+    horz_break_count = db.Column(db.Integer, nullable=True)
+    horz_break_mean = db.Column(db.Float, nullable=True)
+    horz_break_m2 = db.Column(db.Float, nullable=True)
+    spin_rate_count = db.Column(db.Integer, nullable=True)
+    spin_rate_mean = db.Column(db.Float, nullable=True)
+    spin_rate_m2 = db.Column(db.Float, nullable=True)
+    extension_count = db.Column(db.Integer, nullable=True)
+    extension_mean = db.Column(db.Float, nullable=True)
+    extension_m2 = db.Column(db.Float, nullable=True)
+    rel_height_count = db.Column(db.Integer, nullable=True)
+    rel_height_mean = db.Column(db.Float, nullable=True)
+    rel_height_m2 = db.Column(db.Float, nullable=True)
+    rel_side_count = db.Column(db.Integer, nullable=True)
+    rel_side_mean = db.Column(db.Float, nullable=True)
+    rel_side_m2 = db.Column(db.Float, nullable=True)
+
     # Hits and Babip may be batting stats
+
+class Pitcher_Total(db.Model):
+    __tablename__ = 'pitcher_totals'
+
+    # Sums of the pitcher's outings, kept current by pitcher_totals so the dashboard never re-aggregates
+    pitcher_id = db.Column(db.Integer, db.ForeignKey('pitchers.id'), primary_key=True)
+    outing_count = db.Column(db.Integer, nullable=False, default=0)
+    pitch_count = db.Column(db.Integer, nullable=True)
+
+    lo_inning_count = db.Column(db.Float, nullable=True)
+    lo_reach = db.Column(db.Float, nullable=True)
+    lo_bb_count = db.Column(db.Float, nullable=True)
+    two_out_ab_count = db.Column(db.Float, nullable=True)
+    two_out_reach = db.Column(db.Float, nullable=True)
+    two_out_bb_count = db.Column(db.Float, nullable=True)
+
+class Pitcher_Pitch_Type_Total(db.Model):
+    __tablename__ = 'pitcher_pitch_type_totals'
+
+    # Sums of the pitcher's Outing_Pitch_Stat rows for one pitch type
+    pitcher_id = db.Column(db.Integer, db.ForeignKey('pitchers.id'), primary_key=True)
+    pitch_type_id = db.Column(db.Integer, db.ForeignKey('pitch_types.id'), primary_key=True)
+
+    count = db.Column(db.Float, nullable=True)
+    strike_count = db.Column(db.Float, nullable=True)
+    sw_miss_count = db.Column(db.Float, nullable=True)
+    sw_weighted_count = db.Column(db.Float, nullable=True)  # Sum of sw_percentage * count
+
+    # The outings' sketches merged, for season quartiles
+    speed_sketch = db.Column(db.LargeBinary, nullable=True)
+    spin_rate_sketch = db.Column(db.LargeBinary, nullable=True)
+    induced_vert_break_sketch = db.Column(db.LargeBinary, nullable=True)
+    horz_break_sketch = db.Column(db.LargeBinary, nullable=True)
+
+class Pitch(db.Model):
+    __tablename__ = 'pitches'
+    __table_args__ = (
+        db.Index('ix_pitches_pitcher_id_pitch_type_id_date', 'pitcher_id', 'pitch_type_id', 'date'),
+        db.Index('ix_pitches_pitcher_id_date', 'pitcher_id', 'date'),
+        db.Index('ix_pitches_outing_id', 'outing_id'),
+    )
+
+    # One row per saved pitch; written in bulk by pitch_loader, never through the ORM
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    outing_id = db.Column(db.Integer, db.ForeignKey('outings.id'), nullable=False)
+    pitcher_id = db.Column(db.Integer, db.ForeignKey('pitchers.id'), nullable=False)
+    pitch_type_id = db.Column(db.Integer, db.ForeignKey('pitch_types.id'), nullable=True)
+    date = db.Column(db.Date, nullable=False)
+    pitch_number = db.Column(db.SmallInteger, nullable=False)  # Order within the outing, from 1
+
+    tagged_pitch_type = db.Column(db.String(30), nullable=True)
+    pitch_call = db.Column(db.String(30), nullable=True)
+    batter_side = db.Column(db.String(10), nullable=True)
+    batter_team = db.Column(db.String(100), nullable=True)
+    batter_id = db.Column(db.BigInteger, nullable=True)
+    inning = db.Column(db.SmallInteger, nullable=True)
+    pa_of_inning = db.Column(db.SmallInteger, nullable=True)
+    pitch_of_pa = db.Column(db.SmallInteger, nullable=True)
+    balls = db.Column(db.SmallInteger, nullable=True)
+    strikes = db.Column(db.SmallInteger, nullable=True)
+    outs = db.Column(db.SmallInteger, nullable=True)
+    kor_bb = db.Column(db.String(20), nullable=True)
+    play_result = db.Column(db.String(20), nullable=True)
+
+    # Single precision is well past TrackMan's own resolution for these
+    rel_speed = db.Column(db.REAL, nullable=True)
+    spin_rate = db.Column(db.REAL, nullable=True)
+    tilt = db.Column(db.String(20), nullable=True)
+    induced_vert_break = db.Column(db.REAL, nullable=True)
+    horz_break = db.Column(db.REAL, nullable=True)
+    vert_appr_angle = db.Column(db.REAL, nullable=True)
+    horz_appr_angle = db.Column(db.REAL, nullable=True)
+    rel_height = db.Column(db.REAL, nullable=True)
+    rel_side = db.Column(db.REAL, nullable=True)
+    extension = db.Column(db.REAL, nullable=True)
+    plate_loc_height = db.Column(db.REAL, nullable=True)
+    plate_loc_side = db.Column(db.REAL, nullable=True)
+    zone_time = db.Column(db.REAL, nullable=True)
+
+class Report_Job(db.Model):
+    __tablename__ = 'report_jobs'
+    __table_args__ = (db.Index('ix_report_jobs_status_created_at', 'status', 'created_at'),)
+
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    target = db.Column(db.String(20), nullable=False, default='own')
+    kind = db.Column(db.String(20), nullable=False, default='game', server_default='game')  # game, season, batch
+    filepath = db.Column(db.String(500), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+    # Per-pitcher report entries and error messages, appended as the job runs
+    progress = db.Column(db.JSON, nullable=True)
+    # Final payload, in the shape /api/upload used to return directly
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
@@ -11,13 +11,15 @@ Purpose: Generates pitcher performance reports from game datasets exported from
 '''
 
 import os
-from flask import Flask, send_from_directory, render_template
+from flask import Flask, send_from_directory, render_template, request, jsonify
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_login import LoginManager, current_user
 
 from app.db.models import db, User
 from app.services.branding_loader import BrandingLoader
+from app.services import lazy_charts
+from app.services.file_validator import MAX_FILE_SIZE, MULTIPART_OVERHEAD
 from app.routes.payments import payment_bp
 
 from app.routes.auth import auth_bp
@@ -45,6 +47,19 @@ app.config['SECRET_KEY'] = app.secret_key
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['STORAGE'] = STORAGE_FOLDER
+# Request bodies over the upload limit (plus room for the multipart envelope) are refused before they are read
+app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE + MULTIPART_OVERHEAD
+# Chart themes rendered for each upload; light is always rendered because the PDF uses it
+app.config['REPORT_THEMES'] = [theme.strip() for theme in os.environ.get('REPORT_THEMES', 'light,dark').split(',') if theme.strip()]
+# Worker processes for per-pitcher report generation; 0 keeps everything in the request process
+app.config['REPORT_WORKERS'] = int(os.environ.get('REPORT_WORKERS', '0'))
+# Per-school cap of the rendered-report cache, in MB; 0 disables caching
+app.config['REPORT_CACHE_MAX_MB'] = int(os.environ.get('REPORT_CACHE_MAX_MB', '256'))
+# Build only tables on upload; charts and PDFs are rendered the first time they are requested
+app.config['REPORT_LAZY_CHARTS'] = os.environ.get('REPORT_LAZY_CHARTS', '').lower() in ('1', 'true', 'yes')
+# Where queued uploads are processed: 'thread' runs them in the web process, 'process' leaves
+# them to a separate `flask report-worker` (needed when gunicorn recycles its workers)
+app.config['REPORT_JOB_RUNNER'] = os.environ.get('REPORT_JOB_RUNNER', 'thread')
 
 os.makedirs(STORAGE_FOLDER, exist_ok=True)
 db.init_app(app)
@@ -84,6 +99,14 @@ def security():
 def not_found(e):
     return render_template('404.html'), 404
 
+@app.errorhandler(413)
+def too_large(e):
+    if request.path.startswith('/api/'):
+        # Routes that accept larger files raise request.max_content_length for themselves
+        max_size = (request.max_content_length or MAX_FILE_SIZE + MULTIPART_OVERHEAD) - MULTIPART_OVERHEAD
+        return jsonify({'error': 'File too large. Max Size: {} bytes'.format(max_size)}), 413
+    return e
+
 @app.errorhandler(500)
 def server_error(e):
     return render_template('500.html'), 500
@@ -92,13 +115,30 @@ def server_error(e):
 def school_files(school_slug, filename):
     return send_from_directory(os.path.join(app.config['STORAGE'], 'schools', school_slug, 'assets'), filename)
 
+def _renders_for(school_slug):
+    # Lazy charts and PDFs are only rendered for a signed-in member of the school; any other
+    # request is served what already exists
+    return current_user.is_authenticated and current_user.school.slug == school_slug
+
 @app.route('/storage/schools/<school_slug>/temp/<path:filename>')
 def school_temp_files(school_slug, filename):
-    return send_from_directory(os.path.join(app.config['STORAGE'], 'schools', school_slug, 'temp'), filename)
+    temp_folder = os.path.join(app.config['STORAGE'], 'schools', school_slug, 'temp')
+    if _renders_for(school_slug):
+        try:
+            lazy_charts.ensure_chart(temp_folder, filename, school_slug)
+        except Exception as e:
+            print(f"Error rendering {filename}: {e}")
+    return send_from_directory(temp_folder, filename)
 
 @app.route('/storage/schools/<school_slug>/reports/<path:filename>')
 def school_report_files(school_slug, filename):
-    return send_from_directory(os.path.join(app.config['STORAGE'], 'schools', school_slug, 'reports'), filename)
+    school_folder = os.path.join(app.config['STORAGE'], 'schools', school_slug)
+    if _renders_for(school_slug):
+        try:
+            lazy_charts.ensure_report(os.path.join(school_folder, 'temp'), os.path.join(school_folder, 'reports'), filename, school_slug)
+        except Exception as e:
+            print(f"Error building {filename}: {e}")
+    return send_from_directory(os.path.join(school_folder, 'reports'), filename)
 
 # Register blueprints
 app.register_blueprint(auth_bp)
@@ -1,12 +1,13 @@
 import io
-from datetime import date
+from datetime import date, timedelta
 from flask import Blueprint, render_template, redirect, url_for, jsonify, session, request, make_response
 from flask_login import login_required, current_user
 from openpyxl import Workbook
-from sqlalchemy import func
+from sqlalchemy import case, func
 
 from app.db.models import db
 from app.db import models
+from app.services import moments, sketches
 
 pages_bp = Blueprint('pages', __name__)
 
@@ -25,30 +26,200 @@ def dashboard():
     return render_template('dashboard.html')
 
 
-@pages_bp.route('/api/team/overview')
-@login_required
-def team_overview():
-    rows = db.session.query(
+def _date_range():
+    # Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD; either end may be left open
+    return tuple(date.fromisoformat(request.args[key]) if request.args.get(key) else None for key in ('from', 'to'))
+
+
+def _in_range(column, date_from, date_to):
+    conditions = []
+    if date_from is not None:
+        conditions.append(column >= date_from)
+    if date_to is not None:
+        conditions.append(column <= date_to)
+    return conditions
+
+
+def _team_overview_query(school_id, date_from=None, date_to=None):
+    """
+    One row per pitcher of the school with their summed lead-off and two-out numbers.
+
+    The whole history is read from the materialized totals; a date range sums the
+    pitchers' outings in it, a range scan of ix_outings_pitcher_id_date per pitcher.
+    """
+    names = ('pitch_count', 'lo_inning_count', 'lo_reach', 'lo_bb_count', 'two_out_ab_count', 'two_out_reach', 'two_out_bb_count')
+    if date_from is None and date_to is None:
+        totals = models.Pitcher_Total
+        sums = {name: getattr(totals, name) for name in names}
+    else:
+        sums = {name: func.sum(getattr(models.Outing, name)) for name in names}
+
+    query = db.session.query(
         models.Pitcher.id.label("pitcher_id"),
         models.Pitcher.name.label("pitcher_name"),
-        func.sum(models.Outing.pitch_count).label("total_pitches"),
-        func.sum(models.Outing.lo_inning_count).label("total_lo_inning_count"),
-        func.sum(models.Outing.lo_reach).label("total_lo_reach"),
-        (func.sum(models.Outing.lo_reach) / func.nullif(func.sum(models.Outing.lo_inning_count), 0)).label("lo_obp"),
-        func.sum(models.Outing.lo_bb_count).label("total_lo_bb_count"),
-        (func.sum(models.Outing.lo_bb_count) / func.nullif(func.sum(models.Outing.lo_inning_count), 0)).label("lo_bb_percentage"),
-        func.sum(models.Outing.two_out_ab_count).label("total_two_out_ab_count"),
-        func.sum(models.Outing.two_out_reach).label("total_two_out_reach"),
-        (func.sum(models.Outing.two_out_reach) / func.nullif(func.sum(models.Outing.two_out_ab_count), 0)).label("two_out_eff_percentage"),
-        func.sum(models.Outing.two_out_bb_count).label("total_two_out_bb_count"),
-        (func.sum(models.Outing.two_out_bb_count) / func.nullif(func.sum(models.Outing.two_out_ab_count), 0)).label("two_out_bb_percentage"),
-    ).join(models.Outing, models.Outing.pitcher_id == models.Pitcher.id
+        sums['pitch_count'].label("total_pitches"),
+        sums['lo_inning_count'].label("total_lo_inning_count"),
+        sums['lo_reach'].label("total_lo_reach"),
+        (sums['lo_reach'] / func.nullif(sums['lo_inning_count'], 0)).label("lo_obp"),
+        sums['lo_bb_count'].label("total_lo_bb_count"),
+        (sums['lo_bb_count'] / func.nullif(sums['lo_inning_count'], 0)).label("lo_bb_percentage"),
+        sums['two_out_ab_count'].label("total_two_out_ab_count"),
+        sums['two_out_reach'].label("total_two_out_reach"),
+        (sums['two_out_reach'] / func.nullif(sums['two_out_ab_count'], 0)).label("two_out_eff_percentage"),
+        sums['two_out_bb_count'].label("total_two_out_bb_count"),
+        (sums['two_out_bb_count'] / func.nullif(sums['two_out_ab_count'], 0)).label("two_out_bb_percentage"),
+    ).filter(
+        models.Pitcher.school_id == school_id
+    )
+
+    if date_from is None and date_to is None:
+        return query.join(totals, totals.pitcher_id == models.Pitcher.id)
+    return query.join(models.Outing, models.Outing.pitcher_id == models.Pitcher.id
     ).filter(
-        models.Pitcher.school_id == current_user.school_id
+        *_in_range(models.Outing.date, date_from, date_to)
     ).group_by(
         models.Pitcher.id,
         models.Pitcher.name
-    ).all()
+    )
+
+
+def _pitcher_averages_query(pitcher_id, date_from=None, date_to=None):
+    """
+    One row per pitch type the pitcher threw, with counts and rates.
+
+    Like _team_overview_query, the whole history comes from the materialized totals and a
+    date range is summed from the pitch stats of the pitcher's outings in it.
+    """
+    if date_from is None and date_to is None:
+        totals = models.Pitcher_Pitch_Type_Total
+        pitch_type_id, count, strike_count, sw_miss_count, sw_weighted_count = (
+            totals.pitch_type_id, totals.count, totals.strike_count, totals.sw_miss_count, totals.sw_weighted_count)
+    else:
+        stat = models.Outing_Pitch_Stat
+        pitch_type_id, count, strike_count, sw_miss_count = (
+            stat.pitch_type_id, func.sum(stat.count), func.sum(stat.strike_count), func.sum(stat.sw_miss_count))
+        sw_weighted_count = func.sum(stat.sw_percentage * stat.count)
+
+    query = db.session.query(
+        pitch_type_id.label("pitch_type_id"),
+        models.Pitch_Types.abbreviation.label("pitch_type"),
+        count.label("tot_count"),
+        strike_count.label("tot_strike_count"),
+        (strike_count / func.nullif(count, 0)).label("strike_percentage"),
+        (sw_miss_count / func.nullif(count, 0)).label("sw_percentage"),
+        sw_miss_count.label("tot_sw_miss_count"),
+        (sw_miss_count / func.nullif(sw_weighted_count, 0)).label("sw_miss_percentage"),
+    )
+
+    if date_from is None and date_to is None:
+        return query.join(models.Pitch_Types, totals.pitch_type_id == models.Pitch_Types.id
+        ).filter(
+            totals.pitcher_id == pitcher_id
+        )
+    return query.join(models.Pitch_Types, stat.pitch_type_id == models.Pitch_Types.id
+    ).join(models.Outing, stat.outing_id == models.Outing.id
+    ).filter(
+        models.Outing.pitcher_id == pitcher_id,
+        *_in_range(models.Outing.date, date_from, date_to)
+    ).group_by(
+        stat.pitch_type_id,
+        models.Pitch_Types.abbreviation
+    )
+
+
+def _pitch_type_sketches(pitcher_id, date_from=None, date_to=None):
+    # pitch_type_id -> {sketch column: merged sketch}, from the totals or the outings in the range
+    if date_from is None and date_to is None:
+        totals = models.Pitcher_Pitch_Type_Total
+        rows = db.session.query(totals.pitch_type_id, *[getattr(totals, sketch) for sketch in sketches.SKETCHES]
+        ).filter(
+            totals.pitcher_id == pitcher_id
+        )
+        return {pitch_type_id: dict(zip(sketches.SKETCHES, blobs)) for pitch_type_id, *blobs in rows}
+
+    stat = models.Outing_Pitch_Stat
+    rows = db.session.query(stat.pitch_type_id, *[getattr(stat, sketch) for sketch in sketches.SKETCHES]
+    ).join(models.Outing, stat.outing_id == models.Outing.id
+    ).filter(
+        models.Outing.pitcher_id == pitcher_id,
+        *_in_range(models.Outing.date, date_from, date_to)
+    )
+    outings = {}
+    for pitch_type_id, *blobs in rows:
+        outings.setdefault(pitch_type_id, []).append(blobs)
+    return {pitch_type_id: {sketch: sketches.merge(column) for sketch, column in zip(sketches.SKETCHES, zip(*blobs))}
+        for pitch_type_id, blobs in outings.items()}
+
+
+def _unsketched_speeds(pitcher_id, date_from=None, date_to=None):
+    # pitch_type_id -> (low, median, high) averaged over the outings' stored quartile speeds, for
+    # the pitch types with outings saved before sketches (speeds but no sketch) in the range
+    stat = models.Outing_Pitch_Stat
+    unsketched = func.sum(case((stat.speed_sketch.is_(None) & stat.median_speed.is_not(None), 1), else_=0))
+    rows = db.session.query(
+        stat.pitch_type_id,
+        func.avg(stat.low_quartile_speed),
+        func.avg(stat.median_speed),
+        func.avg(stat.high_quartile_speed)
+    ).join(models.Outing, stat.outing_id == models.Outing.id
+    ).filter(
+        models.Outing.pitcher_id == pitcher_id,
+        *_in_range(models.Outing.date, date_from, date_to)
+    ).group_by(
+        stat.pitch_type_id
+    ).having(unsketched > 0)
+    return {pitch_type_id: speeds for pitch_type_id, *speeds in rows}
+
+
+def _pitcher_averages(pitcher_id, date_from=None, date_to=None):
+    """
+    The pitcher's pitch type rows with season quartiles read from the merged sketches.
+
+    Outings saved before sketches existed and never backfilled (their pitches were not kept)
+    only have their own quartile speeds. A pitch type with any such outing in the range gets
+    the average of its outings' quartiles instead, as the dashboard showed before sketches,
+    and is flagged approximate; its spin and break medians cover only the sketched outings.
+
+    Returns:
+        list of dict, one per pitch type
+    """
+    merged = _pitch_type_sketches(pitcher_id, date_from, date_to)
+    unsketched = _unsketched_speeds(pitcher_id, date_from, date_to)
+    results = []
+    for row in _pitcher_averages_query(pitcher_id, date_from, date_to):
+        blobs = merged.get(row.pitch_type_id, {})
+        approximate = row.pitch_type_id in unsketched
+        if approximate:
+            low, median, high = unsketched[row.pitch_type_id]
+        else:
+            low, median, high = sketches.quantiles(blobs.get('speed_sketch'), 'speed_sketch')
+        results.append({
+            'pitch_type':            row.pitch_type,
+            'tot_count':             row.tot_count,
+            'tot_strike_count':      row.tot_strike_count,
+            'strike_percentage':     row.strike_percentage,
+            'sw_percentage':         row.sw_percentage,
+            'tot_sw_miss_count':     row.tot_sw_miss_count,
+            'sw_miss_percentage':    row.sw_miss_percentage,
+            'low_quartile_speed':    low,
+            'median_speed':          median,
+            'high_quartile_speed':   high,
+            'median_spin_rate':      sketches.quantiles(blobs.get('spin_rate_sketch'), 'spin_rate_sketch', (0.5,))[0],
+            'median_induced_vert_break': sketches.quantiles(blobs.get('induced_vert_break_sketch'), 'induced_vert_break_sketch', (0.5,))[0],
+            'median_horz_break':     sketches.quantiles(blobs.get('horz_break_sketch'), 'horz_break_sketch', (0.5,))[0],
+            'approximate':           approximate,
+        })
+    return results
+
+
+@pages_bp.route('/api/team/overview')
+@login_required
+def team_overview():
+    try:
+        date_from, date_to = _date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date; use YYYY-MM-DD'}), 400
+    rows = _team_overview_query(current_user.school_id, date_from, date_to).all()
 
     results = [{
         'pitcher_id':              row.pitcher_id,
@@ -72,25 +243,11 @@ def team_overview():
 @pages_bp.route('/api/team/overview/download')
 @login_required
 def team_overview_download():
-    rows = db.session.query(
-        models.Pitcher.name.label("pitcher_name"),
-        func.sum(models.Outing.pitch_count).label("total_pitches"),
-        func.sum(models.Outing.lo_inning_count).label("lo_inning_count"),
-        func.sum(models.Outing.lo_reach).label("lo_reach"),
-        (func.sum(models.Outing.lo_reach) / func.nullif(func.sum(models.Outing.lo_inning_count), 0)).label("lo_obp"),
-        func.sum(models.Outing.lo_bb_count).label("lo_bb_count"),
-        (func.sum(models.Outing.lo_bb_count) / func.nullif(func.sum(models.Outing.lo_inning_count), 0)).label("lo_bb_pct"),
-        func.sum(models.Outing.two_out_ab_count).label("two_out_ab_count"),
-        func.sum(models.Outing.two_out_reach).label("two_out_reach"),
-        (func.sum(models.Outing.two_out_reach) / func.nullif(func.sum(models.Outing.two_out_ab_count), 0)).label("two_out_eff_pct"),
-        func.sum(models.Outing.two_out_bb_count).label("two_out_bb_count"),
-        (func.sum(models.Outing.two_out_bb_count) / func.nullif(func.sum(models.Outing.two_out_ab_count), 0)).label("two_out_bb_pct"),
-    ).join(models.Outing, models.Outing.pitcher_id == models.Pitcher.id
-    ).filter(
-        models.Pitcher.school_id == current_user.school_id
-    ).group_by(
-        models.Pitcher.id, models.Pitcher.name
-    ).all()
+    try:
+        date_from, date_to = _date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date; use YYYY-MM-DD'}), 400
+    rows = _team_overview_query(current_user.school_id, date_from, date_to).all()
 
     wb = Workbook()
     ws = wb.active
@@ -108,16 +265,16 @@ def team_overview_download():
         ws.append([
             row.pitcher_name,
             row.total_pitches,
-            row.lo_inning_count,
-            row.lo_reach,
+            row.total_lo_inning_count,
+            row.total_lo_reach,
             dec(row.lo_obp),
-            row.lo_bb_count,
-            pct(row.lo_bb_pct),
-            row.two_out_ab_count,
-            row.two_out_reach,
-            pct(row.two_out_eff_pct),
-            row.two_out_bb_count,
-            pct(row.two_out_bb_pct),
+            row.total_lo_bb_count,
+            pct(row.lo_bb_percentage),
+            row.total_two_out_ab_count,
+            row.total_two_out_reach,
+            pct(row.two_out_eff_percentage),
+            row.total_two_out_bb_count,
+            pct(row.two_out_bb_percentage),
         ])
 
     buf = io.BytesIO()
@@ -137,38 +294,11 @@ def pitcher_averages(pitcher_id):
     pitcher = db.session.get(models.Pitcher, pitcher_id)
     if not pitcher:
         return jsonify({'error': 'Pitcher not found'}), 404
-
-    rows = db.session.query(
-        models.Pitch_Types.abbreviation.label("pitch_type_abbreviation"),
-        func.sum(models.Outing_Pitch_Stat.count).label("tot_count"),
-        func.sum(models.Outing_Pitch_Stat.strike_count).label("tot_strike_count"),
-        (func.sum(models.Outing_Pitch_Stat.strike_count) / func.nullif(func.sum(models.Outing_Pitch_Stat.count), 0)).label("strike_percentage"),
-        (func.sum(models.Outing_Pitch_Stat.sw_miss_count) / func.nullif(func.sum(models.Outing_Pitch_Stat.count), 0)).label("sw_percentage"),
-        (func.sum(models.Outing_Pitch_Stat.sw_miss_count) / func.nullif(func.sum(models.Outing_Pitch_Stat.sw_percentage * models.Outing_Pitch_Stat.count), 0)).label("sw_miss_percentage"),
-        func.avg(models.Outing_Pitch_Stat.low_quartile_speed).label("avg_low_quartile_speed"),
-        func.avg(models.Outing_Pitch_Stat.median_speed).label("avg_median_speed"),
-        func.avg(models.Outing_Pitch_Stat.high_quartile_speed).label("avg_high_quartile_speed"),
-    ).join(models.Pitch_Types, models.Outing_Pitch_Stat.pitch_type_id == models.Pitch_Types.id
-    ).filter(
-        models.Outing_Pitch_Stat.pitcher_id == pitcher_id
-    ).group_by(
-        models.Outing_Pitch_Stat.pitch_type_id,
-        models.Pitch_Types.abbreviation
-    ).all()
-
-    results = [{
-        'pitch_type':            row.pitch_type_abbreviation,
-        'tot_count':             row.tot_count,
-        'tot_strike_count':      row.tot_strike_count,
-        'strike_percentage':     row.strike_percentage,
-        'sw_percentage':         row.sw_percentage,
-        'sw_miss_percentage':    row.sw_miss_percentage,
-        'avg_low_quartile_speed': row.avg_low_quartile_speed,
-        'avg_median_speed':      row.avg_median_speed,
-        'avg_high_quartile_speed': row.avg_high_quartile_speed,
-    } for row in rows]
-
-    return jsonify(results)
+    try:
+        date_from, date_to = _date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date; use YYYY-MM-DD'}), 400
+    return jsonify(_pitcher_averages(pitcher_id, date_from, date_to))
 
 
 @pages_bp.route('/api/pitcher/<int:pitcher_id>/averages/download')
@@ -177,32 +307,18 @@ def pitcher_averages_download(pitcher_id):
     pitcher = db.session.get(models.Pitcher, pitcher_id)
     if not pitcher or pitcher.school_id != current_user.school_id:
         return jsonify({'error': 'Not found'}), 404
-
-    rows = db.session.query(
-        models.Pitch_Types.abbreviation.label("pitch_type"),
-        func.sum(models.Outing_Pitch_Stat.count).label("tot_count"),
-        func.sum(models.Outing_Pitch_Stat.strike_count).label("tot_strike_count"),
-        (func.sum(models.Outing_Pitch_Stat.strike_count) / func.nullif(func.sum(models.Outing_Pitch_Stat.count), 0)).label("strike_pct"),
-        (func.sum(models.Outing_Pitch_Stat.sw_miss_count) / func.nullif(func.sum(models.Outing_Pitch_Stat.count), 0)).label("sw_pct"),
-        func.sum(models.Outing_Pitch_Stat.sw_miss_count).label("tot_sw_miss_count"),
-        (func.sum(models.Outing_Pitch_Stat.sw_miss_count) / func.nullif(func.sum(models.Outing_Pitch_Stat.sw_percentage * models.Outing_Pitch_Stat.count), 0)).label("sw_miss_pct"),
-        func.avg(models.Outing_Pitch_Stat.low_quartile_speed).label("avg_low_quartile_speed"),
-        func.avg(models.Outing_Pitch_Stat.median_speed).label("avg_median_speed"),
-        func.avg(models.Outing_Pitch_Stat.high_quartile_speed).label("avg_high_quartile_speed"),
-    ).join(models.Pitch_Types, models.Outing_Pitch_Stat.pitch_type_id == models.Pitch_Types.id
-    ).filter(
-        models.Outing_Pitch_Stat.pitcher_id == pitcher_id
-    ).group_by(
-        models.Outing_Pitch_Stat.pitch_type_id,
-        models.Pitch_Types.abbreviation
-    ).all()
+    try:
+        date_from, date_to = _date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date; use YYYY-MM-DD'}), 400
+    rows = _pitcher_averages(pitcher_id, date_from, date_to)
 
     wb = Workbook()
     ws = wb.active
     ws.title = pitcher.name[:31]
     ws.append([
         'Pitch', 'Count', 'Strike Count', 'Strike%', 'Swing%', 'Whiff Count', 'Whiff%',
-        'Velo Low', 'Velo Med', 'Velo Hi',
+        'Velo Low', 'Velo Med', 'Velo Hi', 'Spin Med', 'IVB Med', 'HB Med', 'Approximate',
     ])
     for row in rows:
         def pct(v):
@@ -210,16 +326,20 @@ def pitcher_averages_download(pitcher_id):
         def velo(v):
             return round(float(v), 1) if v is not None else None
         ws.append([
-            row.pitch_type,
-            row.tot_count,
-            row.tot_strike_count,
-            pct(row.strike_pct),
-            pct(row.sw_pct),
-            row.tot_sw_miss_count,
-            pct(row.sw_miss_pct),
-            velo(row.avg_low_quartile_speed),
-            velo(row.avg_median_speed),
-            velo(row.avg_high_quartile_speed),
+            row['pitch_type'],
+            row['tot_count'],
+            row['tot_strike_count'],
+            pct(row['strike_percentage']),
+            pct(row['sw_percentage']),
+            row['tot_sw_miss_count'],
+            pct(row['sw_miss_percentage']),
+            velo(row['low_quartile_speed']),
+            velo(row['median_speed']),
+            velo(row['high_quartile_speed']),
+            round(row['median_spin_rate']) if row['median_spin_rate'] is not None else None,
+            velo(row['median_induced_vert_break']),
+            velo(row['median_horz_break']),
+            'Yes' if row['approximate'] else '',
         ])
 
     buf = io.BytesIO()
@@ -234,6 +354,86 @@ def pitcher_averages_download(pitcher_id):
     return response
 
 
+# Trend point per outing, per week (starting Monday) or per month
+TREND_PERIODS = {
+    'outing': lambda outing_id, day: (day, outing_id),
+    'week': lambda outing_id, day: (day - timedelta(days=day.weekday()),),
+    'month': lambda outing_id, day: (day.replace(day=1),),
+}
+
+
+def _pitcher_trends(pitcher_id, by, date_from=None, date_to=None):
+    """
+    Means and standard deviations of the pitcher's pitch metrics per pitch type, over the
+    range and per period, merged from each outing's stored count, mean and M2.
+
+    Returns:
+        list of dict, one per pitch type, most thrown first
+    """
+    stat = models.Outing_Pitch_Stat
+    parts = ('count', 'mean', 'm2')
+    columns = [getattr(stat, f'{metric}_{part}') for metric in moments.MOMENTS for part in parts]
+    rows = db.session.query(
+        models.Pitch_Types.abbreviation,
+        models.Outing.id,
+        models.Outing.date,
+        stat.count,
+        *columns
+    ).join(models.Outing, stat.outing_id == models.Outing.id
+    ).join(models.Pitch_Types, stat.pitch_type_id == models.Pitch_Types.id
+    ).filter(
+        models.Outing.pitcher_id == pitcher_id,
+        *_in_range(models.Outing.date, date_from, date_to)
+    ).order_by(
+        models.Outing.date,
+        models.Outing.id
+    ).all()
+
+    # pitch type -> period -> [outing ids, pitches, metric -> [(count, mean, m2)]]
+    periods = {}
+    for pitch_type, outing_id, day, count, *values in rows:
+        point = periods.setdefault(pitch_type, {}).setdefault(
+            TREND_PERIODS[by](outing_id, day), [set(), 0, {metric: [] for metric in moments.MOMENTS}])
+        point[0].add(outing_id)
+        point[1] += int(count or 0)
+        for index, metric in enumerate(moments.MOMENTS):
+            point[2][metric].append(values[index * 3:index * 3 + 3])
+
+    results = []
+    for pitch_type, points in periods.items():
+        merged = {key: {metric: moments.merge(summaries) for metric, summaries in metrics.items()}
+            for key, (_, _, metrics) in points.items()}
+        results.append({
+            'pitch_type': pitch_type,
+            'pitch_count': sum(pitches for _, pitches, _ in points.values()),
+            'overall': {metric: moments.describe(moments.merge(point[metric] for point in merged.values()))
+                for metric in moments.MOMENTS},
+            'points': [{
+                'date': key[0].isoformat(),
+                'outing_count': len(outing_ids),
+                'pitch_count': pitches,
+                **{metric: moments.describe(merged[key][metric]) for metric in moments.MOMENTS},
+            } for key, (outing_ids, pitches, _) in points.items()],
+        })
+    return sorted(results, key=lambda result: -result['pitch_count'])
+
+
+@pages_bp.route('/api/pitcher/<int:pitcher_id>/trends')
+@login_required
+def pitcher_trends(pitcher_id):
+    pitcher = db.session.get(models.Pitcher, pitcher_id)
+    if not pitcher or pitcher.school_id != current_user.school_id:
+        return jsonify({'error': 'Not found'}), 404
+    try:
+        date_from, date_to = _date_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date; use YYYY-MM-DD'}), 400
+    by = request.args.get('by', 'outing')
+    if by not in TREND_PERIODS:
+        return jsonify({'error': f"by must be one of: {', '.join(TREND_PERIODS)}"}), 400
+    return jsonify(_pitcher_trends(pitcher_id, by, date_from, date_to))
+
+
 @pages_bp.route('/upload')
 @login_required
 def upload_page():
@@ -1,15 +1,14 @@
-import gc
 import os
 import glob
-import pandas as pd
 from werkzeug.utils import secure_filename
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 
-from app.services import report, report_lab_generator, file_validator
-from app.services.branding_loader import BrandingLoader
-from app.services.report_lab_generator import PDF_Generator, merge_pdfs
-from app.routes.utils import get_school_directories, flash_toast
+from app.db.models import Report_Job
+from app.services import report, file_validator, report_jobs, ingest, season, batch
+from app.services.game_frame import GameFrame
+from app.services.game_archive import GameArchive
+from app.routes.utils import get_school_directories
 
 upload_bp = Blueprint('upload_api', __name__)
 
@@ -19,7 +18,7 @@ required_columns = report.required_columns
 @upload_bp.route('/api/upload', methods=['POST'])
 @login_required
 def upload_file():
-    school_temp_folder, school_output_folder = get_school_directories()
+    school_temp_folder, _ = get_school_directories()
 
     if 'file' not in request.files:
         return jsonify({'error': 'No file part in the request'}), 400
@@ -27,172 +26,53 @@ def upload_file():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
-    # Clean up previous uploads from this user to avoid stale data
-    for pattern in [f'{current_user.id}_*.xlsx', f'{current_user.id}_*.xls', f'{current_user.id}_*.csv']:
-        for old_file in glob.glob(os.path.join(school_temp_folder, pattern)):
-            try:
-                os.remove(old_file)
-            except Exception as e:
-                print(f"Error deleting old file: {old_file} - {e}")
+    record_path = _clear_previous_upload(school_temp_folder)
 
     filename = secure_filename(file.filename)
     filepath = os.path.join(school_temp_folder, f'{current_user.id}_{filename}')
-    file.save(filepath)
-
-    if filepath.endswith('.csv'):
-        source_df = pd.read_csv(filepath)
-    elif filepath.endswith(('.xlsx', '.xls')):
-        source_df = pd.read_excel(filepath)
-    else:
-        raise ValueError("Unsupported file format. Please provide a .csv, .xlsx, or .xls file.")
-
-    # Full validation: extension, MIME type, file signature, column presence, and type checks
-    is_valid, result = file_validator.validate_uploaded_file(
-        source_df=source_df, file=file, filepath=filepath,
-        required_columns=list(required_columns.keys()),
-        column_types=required_columns
-    )
-
-    if not is_valid:
-        try:
-            os.remove(filepath)
-        except Exception:
-            pass
-        current_app.logger.warning(f"File validation failed: {filename} - {result}")
-        return jsonify({'error': result}), 400
-
-    current_app.logger.info(f"Valid file uploaded: {filename} - Checksum: {result}")
 
+    # The file is hashed while it is written and parsed once; the typed frame and hash are
+    # reused by validation, the report job and save-game. Each step rejects the file as soon as
+    # it breaks a limit, so an oversized or malformed upload is never parsed in full
     try:
-        # Remove stale images and PDFs from the previous session before generating new ones
-        for old_image in glob.glob(os.path.join(school_temp_folder, f'{current_user.id}_*.png')):
-            try:
-                os.remove(old_image)
-            except Exception as e:
-                print(f"Error deleting old image: {old_image} - {e}")
-
-        for old_pdf in glob.glob(os.path.join(school_output_folder, f'{current_user.id}_*.pdf')):
-            try:
-                os.remove(old_pdf)
-            except Exception:
-                pass
+        file_hash, _ = ingest.receive(file, filepath)
+    except ingest.UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 400
 
-        branding = BrandingLoader.get_branding(current_user.school.slug)
+    source_df, error = _ingest_file(file, filepath, filename)
+    if error:
+        return jsonify({'error': error}), 400
+    # Hashed from the rows like the games of a season file, so the same game is saved once either way
+    content_hash = season.content_hash(source_df)
 
-        roster_path = os.path.join(current_app.config['STORAGE'], 'schools', current_user.school.slug, 'assets', 'roster.csv')
-        roster = pd.read_csv(roster_path) if os.path.exists(roster_path) else pd.DataFrame()
-
-        gen = PDF_Generator(current_user=current_user, branding=branding)
+    current_app.logger.info(f"Valid file uploaded: {filename} - Checksum: {content_hash}")
 
+    try:
+        # Only check that the file has pitchers to report; the reports themselves are generated by the job worker
         target = request.form.get('target', 'own')
+        game = GameFrame(source_df)
+        pitcher_ids = game.pitcher_ids(current_user.school.trackman_id, opponent=(target == 'opponent'))
 
-        if target == 'opponent':
-            matching = source_df[source_df['PitcherTeam'] != current_user.school.trackman_id]
-        else:
-            matching = source_df[source_df['PitcherTeam'] == current_user.school.trackman_id]
-
-        if matching.empty:
+        if not pitcher_ids:
             if target == 'opponent':
                 return jsonify({'error': 'No opponent pitching data found in this file. Make sure you uploaded the correct game file.'}), 400
             else:
                 return jsonify({'error': f'No pitching data found for your team (TrackMan ID: {current_user.school.trackman_id}). Make sure you uploaded the correct game file.'}), 400
 
-        raw_date = source_df['Date'].mode().iloc[0]
-        parts = str(raw_date).split('-')
-        date = f"{parts[1]}/{parts[2]}/{parts[0]}" if len(parts) == 3 else str(raw_date)
-        away_team = source_df['AwayTeam'].mode().iloc[0]
-        home_team = source_df['HomeTeam'].mode().iloc[0]
-
-        reports = []
-        for pitcher_id in source_df['PitcherId'].unique():
-            try:
-                pitcher_team = source_df.loc[source_df['PitcherId'] == pitcher_id, 'PitcherTeam'].iloc[0]
-                is_own = pitcher_team == current_user.school.trackman_id
-                if target == 'opponent' and is_own:
-                    continue
-                if target != 'opponent' and not is_own:
-                    continue
-
-                arm_angle = None
-                if current_user.school.is_active:
-                    for theme in ('light', 'dark'):
-                        report.pitch_heat_map_by_batter_side(source_df, current_user.id, school_temp_folder, pitcher_id, 0.75, theme=theme)
-                        result = report.pitch_break_map(source_df, current_user.id, school_temp_folder, pitcher_id, 0.75, theme=theme)
-                        if arm_angle is None and result is not None:
-                            arm_angle = result
-
-                # Auto-add pitchers found in the game file but missing from the roster
-                if not roster.empty and pitcher_id not in roster['Trackman ID'].values and target != 'opponent':
-                    last_name, first_name = source_df.loc[source_df['PitcherId'] == pitcher_id, 'Pitcher'].iloc[0].split(', ', 1)
-                    roster = pd.concat([roster, pd.DataFrame([{'Trackman ID': pitcher_id, 'First Name': first_name, 'Last Name': last_name}])], ignore_index=True)
-
-                # Build pitch stat tables for both the web view and the PDF
-                table_data = report.build_table(source_df, pitcher_id)
-                if not table_data or len(table_data) < 2 or table_data[1] is None:
-                    raise ValueError(f'Failed to build table data for pitcher ID {pitcher_id}')
-                report_html = table_data[4].to_html(index=False, float_format='%.2f', border=0, classes='pitcher-data-table', escape=False, justify='left', na_rep='')
-
-                pitch_usage_data = report.usage_table(source_df, pitcher_id)
-                if not pitch_usage_data or len(pitch_usage_data) < 2 or pitch_usage_data[1] is None:
-                    raise ValueError(f'Failed to build pitch usage table data for pitcher ID {pitcher_id}')
-                left_usage_html = pitch_usage_data[0].to_html(index=False, float_format='%.2f', border=0, classes='pitch-usage-table', escape=False, justify='left', na_rep='')
-                right_usage_html = pitch_usage_data[1].to_html(index=False, float_format='%.2f', border=0, classes='pitch-usage-table', escape=False, justify='left', na_rep='')
-
-                reports.append({
-                    'pitcher_id': str(pitcher_id),
-                    'pitcher_name': table_data[3],
-                    'pitcher_table': report_html,
-                    'left_usage_table': left_usage_html,
-                    'right_usage_table': right_usage_html,
-                    'heatmap_left_url': f'/storage/schools/{current_user.school.slug}/temp/{current_user.id}_pitcher_{pitcher_id}_heat_map_left_light.png',
-                    'heatmap_right_url': f'/storage/schools/{current_user.school.slug}/temp/{current_user.id}_pitcher_{pitcher_id}_heat_map_right_light.png',
-                    'heatmap_left_dark_url': f'/storage/schools/{current_user.school.slug}/temp/{current_user.id}_pitcher_{pitcher_id}_heat_map_left_dark.png',
-                    'heatmap_right_dark_url': f'/storage/schools/{current_user.school.slug}/temp/{current_user.id}_pitcher_{pitcher_id}_heat_map_right_dark.png',
-                    'breakmap_url': f'/storage/schools/{current_user.school.slug}/temp/{current_user.id}_pitcher_{pitcher_id}_break_map_light.png',
-                    'breakmap_dark_url': f'/storage/schools/{current_user.school.slug}/temp/{current_user.id}_pitcher_{pitcher_id}_break_map_dark.png',
-                    'arm_angle': f'{arm_angle:.1f}°' if arm_angle is not None else '',
-                    'pdf_url': f'/storage/schools/{current_user.school.slug}/reports/{current_user.id}_pitcher_{pitcher_id}_report.pdf'
-                })
-
-                gen.generate_pitcher_report({
-                    'pitcher_name': table_data[3],
-                    'pitcher_id': str(pitcher_id),
-                    'date': date,
-                    'home_team': home_team,
-                    'away_team': away_team,
-                    'pitch_stats': table_data[4],
-                    'pitch_usage_left': pitch_usage_data[0],
-                    'pitch_usage_right': pitch_usage_data[1],
-                    'pitch_heat_map_left': os.path.join(school_temp_folder, f'{current_user.id}_pitcher_{pitcher_id}_heat_map_left_light.png'),
-                    'pitch_heat_map_right': os.path.join(school_temp_folder, f'{current_user.id}_pitcher_{pitcher_id}_heat_map_right_light.png'),
-                    'pitch_break_map': os.path.join(school_temp_folder, f'{current_user.id}_pitcher_{pitcher_id}_break_map_light.png'),
-                }, os.path.abspath(os.path.join(school_output_folder, f'{current_user.id}_pitcher_{pitcher_id}_report.pdf')))
-
-            except Exception as e:
-                print(f"Error processing pitcher ID {pitcher_id}: {e}")
-                flash_toast(f"Error processing pitcher {pitcher_id}: {str(e)}", type='error')   
-                continue
-
-            # Release per-pitcher data before the next iteration to keep memory usage flat
-            del table_data, report_html
-                
-            gc.collect()
-
-        # Persist any new roster entries discovered during this upload
-        if not roster.empty:
-            roster.to_csv(roster_path, index=False)
-
-        merged_pdf_path = os.path.join(school_output_folder, f'{current_user.id}_merged_pitcher_reports.pdf')
-        merge_pdfs(current_user.id, school_output_folder, merged_pdf_path)
+        # Every validated game is archived; the job and save-game read it back from there
+        archive = GameArchive.for_school(current_user.school.slug)
+        archive.store(source_df, content_hash, filename=filename, uploaded_by=current_user.id)
+        archive.mark_reported(content_hash, target)
+        ingest.save_upload_record(record_path, content_hash, file_hashes={content_hash: file_hash})
+        job = report_jobs.enqueue(current_user, record_path, target)
+        report_jobs.ensure_worker_thread(current_app._get_current_object())
 
         return jsonify({
-            'message': 'File processed successfully',
-            'num_reports': len(reports),
-            'reports': reports,
-            'merged_pdf_url': f'/storage/schools/{current_user.school.slug}/reports/{current_user.id}_merged_pitcher_reports.pdf',
-            'game_data': {'date': date, 'home_team': home_team, 'away_team': away_team},
-            'user': {'name': f"{current_user.first_name} {current_user.last_name}", 'school': current_user.school.name}
-        })
+            'job_id': job.id,
+            'status': job.status,
+            'total': len(pitcher_ids),
+            'status_url': f'/api/jobs/{job.id}'
+        }), 202
 
     except Exception as e:
         print(f"\n!!! ERROR: {e}")
@@ -201,16 +81,231 @@ def upload_file():
         return jsonify({'error': f'Failed to process file: {str(e)}'}), 500
 
 
+@upload_bp.route('/api/upload-season', methods=['POST'])
+@login_required
+def upload_season():
+    """Queue a multi-game (season or series) CSV export; every game in it is reported separately."""
+    # Season files are far larger than one game, so this route raises the body limit for itself;
+    # it has to be set before the form is parsed
+    request.max_content_length = season.MAX_SEASON_FILE_SIZE + file_validator.MULTIPART_OVERHEAD
+    school_temp_folder, _ = get_school_directories()
+
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part in the request'}), 400
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    filename = secure_filename(file.filename)
+    if not filename.lower().endswith('.csv'):
+        return jsonify({'error': 'Season uploads must be a .csv export'}), 400
+
+    _clear_previous_upload(school_temp_folder)
+    filepath = os.path.join(school_temp_folder, f'{current_user.id}_season_{filename}')
+
+    try:
+        ingest.receive(file, filepath, max_size=season.MAX_SEASON_FILE_SIZE)
+    except ingest.UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 400
+
+    is_valid, result = file_validator.validate_received_file(file, filepath, max_size=season.MAX_SEASON_FILE_SIZE)
+    if not is_valid:
+        return _reject(filepath, filename, result)
+
+    # Only the header is read here; the job splits the file into games and validates each one
+    try:
+        ingest.read_header(filepath, required_columns=list(required_columns.keys()))
+    except ingest.UploadRejected as e:
+        return _reject(filepath, filename, str(e))
+    except Exception as e:
+        return _reject(filepath, filename, 'Could not parse file: {}'.format(str(e)))
+
+    current_app.logger.info(f"Season file uploaded: {filename}")
+
+    job = report_jobs.enqueue(current_user, filepath, request.form.get('target', 'own'), kind='season')
+    report_jobs.ensure_worker_thread(current_app._get_current_object())
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'total': job.total,
+        'status_url': f'/api/jobs/{job.id}'
+    }), 202
+
+
+@upload_bp.route('/api/upload-batch', methods=['POST'])
+@login_required
+def upload_batch():
+    """
+    Queue several game files, or zip archives of them, as one job.
+
+    Each file is parsed and hashed from its rows; repeats within the batch and games the
+    school has already processed are skipped. New games are validated and archived here and
+    reported together by the job.
+    """
+    request.max_content_length = batch.MAX_BATCH_SIZE + file_validator.MULTIPART_OVERHEAD
+    school_temp_folder, _ = get_school_directories()
+
+    uploads = [file for file in request.files.getlist('files') if file.filename]
+    if not uploads:
+        return jsonify({'error': 'No files in the request'}), 400
+
+    record_path = _clear_previous_upload(school_temp_folder)
+    target = request.form.get('target', 'own')
+    archive = GameArchive.for_school(current_user.school.slug)
+
+    entries, seen, file_hashes = [], set(), {}
+    for number, (name, file, error) in enumerate(batch.expand(uploads)):
+        filename = secure_filename(name)
+        entry = {'filename': filename}
+        entries.append(entry)
+        if error:
+            entry.update(status='invalid', error=error)
+            continue
+
+        filepath = os.path.join(school_temp_folder, f'{current_user.id}_batch_{number:03d}_{filename}')
+        try:
+            file_hash, _ = ingest.receive(file, filepath)
+        except ingest.UploadTooLarge as e:
+            entry.update(status='invalid', error=str(e))
+            continue
+
+        source_df, error = _ingest_file(file, filepath, filename)
+        if error:
+            entry.update(status='invalid', error=error)
+            continue
+        os.remove(filepath)
+        content_hash = season.content_hash(source_df)
+        entry['content_hash'] = content_hash
+        file_hashes[content_hash] = file_hash
+
+        if content_hash in seen:
+            entry.update(status='duplicate', error='Same game as another in this batch')
+            continue
+        # A game reported for the other team's pitchers is still new for this target
+        info = archive.info(content_hash) if archive.reported(content_hash, target) else None
+        if info is not None:
+            entry.update(status='processed', error='Already processed', date=GameFrame.format_date(info.get('date', '')),
+                raw_date=info.get('date', ''), home_team=info.get('home_team', ''), away_team=info.get('away_team', ''))
+            continue
+        seen.add(content_hash)
+
+        if not GameFrame(source_df).pitcher_ids(current_user.school.trackman_id, opponent=(target == 'opponent')):
+            entry.update(status='invalid', error='No pitching data found for the selected team')
+            continue
+
+        archive.store(source_df, content_hash, filename=filename, uploaded_by=current_user.id)
+        archive.mark_reported(content_hash, target)
+        entry['status'] = 'new'
+
+    # Save-game stores every game in the batch; ones saved before are skipped by add_report
+    ingest.save_upload_record(record_path, *[entry['content_hash'] for entry in entries if entry['status'] in ('new', 'processed')],
+        file_hashes=file_hashes)
+
+    if not any(entry['status'] == 'new' for entry in entries):
+        return jsonify({'error': 'No new games to process in this batch', 'games': entries}), 400
+
+    manifest_path = batch.manifest_path(school_temp_folder, current_user.id)
+    batch.save_manifest(manifest_path, entries)
+    job = report_jobs.enqueue(current_user, manifest_path, target, kind='batch')
+    report_jobs.ensure_worker_thread(current_app._get_current_object())
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'total': job.total,
+        'status_url': f'/api/jobs/{job.id}',
+        'games': entries
+    }), 202
+
+
+def _ingest_file(file, filepath, filename):
+    """
+    Validate and parse a received upload.
+
+    Returns:
+        (source_df, None), or (None, error message) after removing the file
+    """
+    # File-level checks: extension, MIME type, and file signature
+    is_valid, result = file_validator.validate_received_file(file, filepath)
+    if not is_valid:
+        return None, _discard(filepath, filename, result)
+
+    try:
+        source_df, column_count = ingest.parse(filepath, required_columns=list(required_columns.keys()))
+    except ingest.UploadRejected as e:
+        return None, _discard(filepath, filename, str(e))
+    except Exception as e:
+        os.remove(filepath)
+        current_app.logger.warning(f"File could not be parsed: {filename} - {e}")
+        return None, 'Could not parse file: {}'.format(str(e))
+
+    # Content checks: column presence and type checks
+    is_valid, result = file_validator.validate_parsed_file(
+        source_df=source_df,
+        required_columns=list(required_columns.keys()),
+        column_types=required_columns,
+        column_count=column_count
+    )
+    if not is_valid:
+        return None, _discard(filepath, filename, result)
+    return source_df, None
+
+
+def _clear_previous_upload(school_temp_folder):
+    # Clean up previous uploads from this user to avoid stale data; returns the user's upload record path
+    record_path = ingest.upload_record_path(school_temp_folder, current_user.id)
+    manifest = os.path.basename(batch.manifest_path(school_temp_folder, current_user.id))
+    for pattern in [f'{current_user.id}_*.xlsx', f'{current_user.id}_*.xls', f'{current_user.id}_*.csv', os.path.basename(record_path), manifest]:
+        for old_file in glob.glob(os.path.join(school_temp_folder, pattern)):
+            try:
+                os.remove(old_file)
+            except Exception as e:
+                print(f"Error deleting old file: {old_file} - {e}")
+    return record_path
+
+
+def _reject(filepath, filename, message):
+    return jsonify({'error': _discard(filepath, filename, message)}), 400
+
+
+def _discard(filepath, filename, message):
+    try:
+        os.remove(filepath)
+    except Exception:
+        pass
+    current_app.logger.warning(f"File validation failed: {filename} - {message}")
+    return message
+
+
+@upload_bp.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def job_status(job_id):
+    job = Report_Job.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    # A queued job needs a live worker; this restarts the in-process one if the server was recycled
+    if job.status == 'queued':
+        report_jobs.ensure_worker_thread(current_app._get_current_object())
+
+    return jsonify(report_jobs.job_status(job, since=request.args.get('since', 0, type=int)))
+
+
 @upload_bp.route('/api/save-game', methods=['POST'])
 @login_required
 def save_game():
     from app.services.team_stats import add_report
     school_temp_folder, _ = get_school_directories()
-    matches = glob.glob(os.path.join(school_temp_folder, f'{current_user.id}_*.csv'))
-    matches += glob.glob(os.path.join(school_temp_folder, f'{current_user.id}_*.xlsx'))
-    if not matches:
+    record_path = ingest.upload_record_path(school_temp_folder, current_user.id)
+    if not os.path.exists(record_path):
         return jsonify({'error': 'No uploaded file found. Please upload a file first.'}), 400
-    filepath = matches[0]
-    with open(filepath, 'rb') as f:
-        add_report(school_id=current_user.school_id, trackman_id=current_user.school.trackman_id, file=f)
+    archive = GameArchive.for_school(current_user.school.slug)
+    content_hashes = ingest.load_upload_record(record_path)
+    file_hashes = ingest.load_file_hashes(record_path)
+    for content_hash in content_hashes:
+        # Only the school's own pitches are decoded; add_report ignores everyone else's
+        source_df = archive.load(content_hash, filters=[('PitcherTeam', '==', current_user.school.trackman_id)])
+        add_report(school_id=current_user.school_id, trackman_id=current_user.school.trackman_id, source=source_df,
+            content_hash=content_hash, file_hash=file_hashes.get(content_hash))
+    if len(content_hashes) > 1:
+        return jsonify({'message': f'{len(content_hashes)} games saved successfully.'})
     return jsonify({'message': 'Game data saved successfully.'})
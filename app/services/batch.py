@@ -0,0 +1,84 @@
+import io
+import os
+import json
+import zipfile
+
+from werkzeug.datastructures import FileStorage
+
+from app.services.file_validator import ALLOWED_EXTENSIONS, MAX_FILE_SIZE
+
+# A batch is a few days of games; each file in it is still held to the single-upload limits
+MAX_BATCH_FILES = 30
+MAX_BATCH_SIZE = 256 * 1024 * 1024
+
+# What the batch request found for each file; the report job reads it and adds the results
+MANIFEST_NAME = '{user_id}_batch.json'
+
+
+def expand(files):
+    """
+    The game files of a batch upload, with zip archives opened up.
+
+    Zip members are read one at a time and never past MAX_FILE_SIZE, whatever their
+    headers claim, so an archive cannot expand into more than one file's worth of memory.
+
+    Args:
+        files: werkzeug FileStorage objects from the request
+
+    Yields:
+        (filename, file, error) per game file; file is a FileStorage, or None with the
+        reason the file was skipped in error
+    """
+    count = 0
+    for upload in files:
+        members = _zip_members(upload) if upload.filename.lower().endswith('.zip') else [(upload.filename, upload, None)]
+        for filename, file, error in members:
+            count += 1
+            if count > MAX_BATCH_FILES:
+                yield filename, None, 'Too many files. Max allowed in one batch is {}'.format(MAX_BATCH_FILES)
+                return
+            yield filename, file, error
+
+
+def _zip_members(upload):
+    try:
+        archive = zipfile.ZipFile(upload.stream)
+    except zipfile.BadZipFile:
+        yield upload.filename, None, 'Not a valid zip archive'
+        return
+
+    with archive:
+        for info in archive.infolist():
+            filename = os.path.basename(info.filename)
+            # Folders and the metadata macOS adds to archives are not games
+            if info.is_dir() or not filename or filename.startswith('.') or info.filename.startswith('__MACOSX/'):
+                continue
+            if filename.rsplit('.', 1)[-1].lower() not in ALLOWED_EXTENSIONS:
+                yield filename, None, 'Unsupported file extension: {}'.format(filename.rsplit('.', 1)[-1])
+                continue
+            if info.file_size > MAX_FILE_SIZE:
+                yield filename, None, 'File too large. Max Size: {} bytes'.format(MAX_FILE_SIZE)
+                continue
+            with archive.open(info) as member:
+                data = member.read(MAX_FILE_SIZE + 1)
+            if len(data) > MAX_FILE_SIZE:
+                yield filename, None, 'File too large. Max Size: {} bytes'.format(MAX_FILE_SIZE)
+                continue
+            yield filename, FileStorage(stream=io.BytesIO(data), filename=filename), None
+
+
+def manifest_path(temp_folder, user_id):
+    return os.path.join(temp_folder, MANIFEST_NAME.format(user_id=user_id))
+
+
+def save_manifest(path, games):
+    partial = f'{path}.partial'
+    with open(partial, 'w') as f:
+        json.dump({'games': games}, f)
+    os.replace(partial, path)
+
+
+def load_manifest(path):
+    """Per-file entries saved by save_manifest, in upload order."""
+    with open(path, 'r') as f:
+        return json.load(f)['games']
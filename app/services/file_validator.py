@@ -2,6 +2,7 @@ import os
 import magic
 import hashlib
 import re
+import threading
 import numpy as np
 import pandas as pd
 from werkzeug.utils import secure_filename
@@ -29,31 +30,26 @@ DANGEROUS_SIGNATURES = {
 }
 
 MAX_FILE_SIZE = 16 * 1024 * 1024
+# Room for the multipart envelope around an upload of the maximum size
+MULTIPART_OVERHEAD = 64 * 1024
 MAX_ROWS = 50000
 MAX_COLUMNS = 500
 
+# Invalid cells listed in a type-check error before the rest are only counted
+MAX_CELL_ERRORS = 10
 
-class file_validator:
-    @staticmethod
-    def _is_valid_timestamp_value(value):
-        if pd.isna(value):
-            return True
-
-        text = str(value).strip()
-        if text.lower() in {'', 'nan', 'none', 'nat'}:
-            return True
-
-        # Try each common TrackMan time format before rejecting
-        formats = ('%I:%M:%S %p', '%I:%M %p', '%H:%M:%S', '%H:%M')
-        for timestamp_format in formats:
-            try:
-                parsed = pd.to_datetime(text, format=timestamp_format, errors='raise')
-                return isinstance(parsed, pd.Timestamp)
-            except Exception:
-                continue
+# TrackMan time formats accepted for 'timestamp' columns
+TIMESTAMP_FORMATS = ('%I:%M:%S %p', '%I:%M %p', '%H:%M:%S', '%H:%M')
+
+# Values treated as an empty cell rather than an invalid one
+BLANK_VALUES = {'', 'nan', 'none', 'nat'}
 
-        return False
+# One libmagic handle for the process; python-magic serializes calls on it internally
+_magic = None
+_magic_lock = threading.Lock()
 
+
+class file_validator:
     @staticmethod
     def check_extension(filename):
         if '.' not in filename:
@@ -75,14 +71,14 @@ class file_validator:
         return True, None
 
     @staticmethod
-    def check_file_size(file):
+    def check_file_size(file, max_size=MAX_FILE_SIZE):
         file.seek(0, os.SEEK_END)
         size = file.tell()
         file.seek(0)
         if size == 0:
             return False, 'File is empty'
-        if size > MAX_FILE_SIZE:
-            return False, 'File too large. Max Size: {} bytes'.format(MAX_FILE_SIZE)
+        if size > max_size:
+            return False, 'File too large. Max Size: {} bytes'.format(max_size)
         return True, None
 
     @staticmethod
@@ -90,8 +86,7 @@ class file_validator:
         # MIME check runs on the saved file path, not the stream, because libmagic
         # needs a seekable file to read the full header reliably
         try:
-            mime = magic.Magic(mime=True)
-            detected_mime = mime.from_file(filepath)
+            detected_mime = _mime_detector().from_file(filepath)
             if detected_mime not in ALLOWED_MIME_TYPES:
                 return False, 'Invalid MIME type: {}'.format(detected_mime)
             return True, detected_mime
@@ -113,12 +108,14 @@ class file_validator:
             return False, 'File signature check error: {}'.format(str(e))
 
     @staticmethod
-    def validate_content_structure(df):
+    def validate_content_structure(df, column_count=None):
+        # column_count is the file's own width when df holds only the columns that were parsed
+        column_count = len(df.columns) if column_count is None else column_count
         try:
             if df.empty:
                 return False, 'File contains no data'
-            if len(df.columns) > MAX_COLUMNS:
-                return False, 'File has too many columns: {}. Max allowed is {}'.format(len(df.columns), MAX_COLUMNS)
+            if column_count > MAX_COLUMNS:
+                return False, 'File has too many columns: {}. Max allowed is {}'.format(column_count, MAX_COLUMNS)
             if len(df) > MAX_ROWS:
                 return False, 'File has too many rows: {}. Max allowed is {}'.format(len(df), MAX_ROWS)
             return True, None
@@ -127,6 +124,16 @@ class file_validator:
         except Exception as e:
             return False, 'Could not parse file: {}'.format(str(e))
 
+    @staticmethod
+    def check_header(columns, required_columns):
+        # Runs on the header row alone so a file of the wrong shape is rejected before its body is read
+        if len(columns) > MAX_COLUMNS:
+            return False, 'File has too many columns: {}. Max allowed is {}'.format(len(columns), MAX_COLUMNS)
+        missing = set(required_columns) - set(columns)
+        if missing:
+            return False, 'Missing required columns: {}'.format(', '.join(missing))
+        return True, None
+
     @staticmethod
     def validate_required_columns(df, required_columns):
         missing = set(required_columns) - set(df.columns)
@@ -134,31 +141,66 @@ class file_validator:
             return False, 'Missing required columns: {}'.format(', '.join(missing))
         return True, None
 
+    @staticmethod
+    def find_invalid_cells(df, column_types, limit=MAX_CELL_ERRORS):
+        """
+        Type-check whole columns at once, converting numeric columns in place.
+
+        Args:
+            df: Parsed upload; numeric columns that pass are replaced by their numeric form
+            column_types: Column -> 'numeric', 'timestamp' or 'string'
+            limit: Invalid cells to describe (all are counted)
+
+        Returns:
+            (cells, total) where cells lists up to `limit` dicts with the spreadsheet row,
+            column, value and expected type of an invalid cell, and total counts them all
+        """
+        cells, total = [], 0
+        for col, expected_type in column_types.items():
+            if expected_type == 'numeric':
+                if pd.api.types.is_numeric_dtype(df[col]):
+                    continue
+                # Strip commas before coercing — TrackMan exports use comma-separated numbers
+                text = df[col].astype('str').str.strip().str.replace(',', '', regex=False)
+                values = pd.to_numeric(text, errors='coerce')
+                invalid = values.isna() & ~_blank(text)
+                if not invalid.any():
+                    # Keep the coerced column so callers get a typed frame
+                    df[col] = values
+            elif expected_type == 'timestamp':
+                text = df[col].astype('str').str.strip()
+                valid = _blank(text)
+                for timestamp_format in TIMESTAMP_FORMATS:
+                    valid |= pd.to_datetime(text.where(~valid), format=timestamp_format, errors='coerce').notna()
+                invalid = ~valid
+            elif expected_type == 'string':
+                if not pd.api.types.is_string_dtype(df[col]):
+                    df[col] = df[col].astype(str)
+                continue
+            else:
+                raise ValueError('Unsupported data type for column {}: {}'.format(col, expected_type))
+
+            positions = np.flatnonzero(invalid.to_numpy())
+            total += len(positions)
+            for position in positions[:max(limit - len(cells), 0)]:
+                # Spreadsheet row numbers: the header is row 1
+                cells.append({'row': int(position) + 2, 'column': col, 'value': str(df[col].iloc[position]), 'expected': expected_type})
+        return cells, total
+
     @staticmethod
     def check_data_types(df, column_types):
         try:
             for col, expected_type in column_types.items():
                 if col not in df.columns:
                     return False, 'Column not found for type check: {}'.format(col)
-
-                if expected_type == 'numeric':
-                    # Strip commas and blanks before coercing — TrackMan exports use comma-separated numbers
-                    cleaned = (
-                        df[col]
-                        .astype(str)
-                        .str.replace(',', '', regex=False)
-                        .replace({'nan': np.nan, '': np.nan, 'None': np.nan})
-                    )
-                    pd.to_numeric(cleaned, errors='raise')
-                elif expected_type == 'timestamp':
-                    for value in df[col]:
-                        if not file_validator._is_valid_timestamp_value(value):
-                            return False, 'Invalid timestamp value in column {}: {}'.format(col, value)
-                elif expected_type == 'string':
-                    df[col] = df[col].astype(str)
-                else:
+                if expected_type not in ('numeric', 'timestamp', 'string'):
                     return False, 'Unsupported data type for column {}: {}'.format(col, expected_type)
 
+            cells, total = file_validator.find_invalid_cells(df, column_types)
+            if total:
+                listed = '; '.join('row {row}, {column}: "{value}" (expected {expected})'.format(**cell) for cell in cells)
+                more = ' and {} more'.format(total - len(cells)) if total > len(cells) else ''
+                return False, 'Invalid values in {} cell{}: {}{}'.format(total, '' if total == 1 else 's', listed, more)
             return True, None
         except Exception as e:
             return False, 'Data type validation error: {}'.format(str(e))
@@ -173,11 +215,26 @@ class file_validator:
         return sha256_hash.hexdigest()
 
 
-def validate_uploaded_file(source_df, file, filepath, required_columns, column_types):
-    """Run the full validation pipeline. Returns (True, checksum) or (False, error_message)."""
+def _mime_detector():
+    global _magic
+    with _magic_lock:
+        if _magic is None:
+            _magic = magic.Magic(mime=True)
+        return _magic
+
+
+def _blank(text):
+    return text.str.lower().isin(BLANK_VALUES) | text.isna()
+
+
+def validate_received_file(file, filepath, max_size=MAX_FILE_SIZE):
+    """
+    File-level checks that need no parsing: extension, filename, size, MIME type and signature.
+    Returns (True, None) or (False, error_message).
+    """
     filename = secure_filename(file.filename)
 
-    # Order matters: cheap checks (extension, filename) run before expensive ones (MIME, content)
+    # Order matters: cheap checks (extension, filename) run before expensive ones (MIME)
     is_valid, ext_or_msg = file_validator.check_extension(filename)
     if not is_valid:
         return False, ext_or_msg
@@ -186,7 +243,7 @@ def validate_uploaded_file(source_df, file, filepath, required_columns, column_t
     if not is_valid:
         return False, msg
 
-    is_valid, msg = file_validator.check_file_size(file)
+    is_valid, msg = file_validator.check_file_size(file, max_size)
     if not is_valid:
         return False, msg
 
@@ -194,20 +251,38 @@ def validate_uploaded_file(source_df, file, filepath, required_columns, column_t
     if not is_valid:
         return False, msg
 
-    is_valid, msg = file_validator.check_file_signature(filepath)
+    return file_validator.check_file_signature(filepath)
+
+
+def validate_parsed_file(source_df, required_columns, column_types, column_count=None):
+    """
+    Content checks on the parsed frame: shape, column presence, and type checks.
+    Returns (True, None) or (False, error_message).
+    """
+    is_valid, msg = file_validator.validate_content_structure(source_df, column_count)
     if not is_valid:
         return False, msg
 
-    is_valid, msg = file_validator.validate_content_structure(source_df)
+    is_valid, msg = file_validator.validate_required_columns(source_df, required_columns)
     if not is_valid:
         return False, msg
 
-    is_valid, msg = file_validator.validate_required_columns(source_df, required_columns)
+    return file_validator.check_data_types(source_df, column_types)
+
+
+def validate_uploaded_file(source_df, file, filepath, required_columns, column_types, checksum=None, column_count=None):
+    """
+    Run the full validation pipeline. Returns (True, checksum) or (False, error_message).
+
+    checksum and column_count come from ingest when the file was hashed and parsed there;
+    otherwise the file is hashed here and source_df's width is used.
+    """
+    is_valid, msg = validate_received_file(file, filepath)
     if not is_valid:
         return False, msg
 
-    is_valid, msg = file_validator.check_data_types(source_df, column_types)
+    is_valid, msg = validate_parsed_file(source_df, required_columns, column_types, column_count)
     if not is_valid:
         return False, msg
 
-    return True, file_validator.calculate_checksum(filepath)
+    return True, checksum or file_validator.calculate_checksum(filepath)
@@ -0,0 +1,193 @@
+import os
+import glob
+import json
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import current_app
+
+# Schema metadata key holding the archive's own fields (hash, game header, original dtypes)
+METADATA_KEY = b'pitcher_reports'
+
+
+class GameArchive:
+    """
+    Columnar archive of one school's validated uploads.
+
+    Each game is a Parquet file at {root}/date={YYYY-MM-DD}/{content_hash}.parquet, keyed by the
+    upload's content hash. Rows keep their file order; strings are stored as dictionaries and integers
+    in the smallest type that holds them, and load() gives back the frame with its original dtypes.
+    Empty files at {root}/reported/{own|opponent}/{content_hash} record who a game was reported for.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    @classmethod
+    def for_school(cls, school_slug):
+        return cls(os.path.join(current_app.config['STORAGE'], 'schools', school_slug, 'archive'))
+
+    def path(self, content_hash):
+        """Path of an archived game, or None if it is not archived."""
+        matches = glob.glob(os.path.join(self.root, 'date=*', f'{content_hash}.parquet'))
+        return matches[0] if matches else None
+
+    def store(self, frame, content_hash, **info):
+        """
+        Archive a validated game unless a file with the same hash already is.
+
+        Args:
+            frame: The typed frame from ingest
+            content_hash: The upload's content hash
+            **info: Extra JSON-serializable fields kept with the game (filename, uploader, ...)
+
+        Returns:
+            Path of the archived game
+        """
+        existing = self.path(content_hash)
+        if existing:
+            return existing
+
+        game_date = _game_date(frame)
+        folder = os.path.join(self.root, f'date={game_date}')
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f'{content_hash}.parquet')
+
+        compact = frame.assign(**{column: _compact(frame[column]) for column in frame.columns})
+
+        metadata = {
+            'content_hash': content_hash,
+            'date': game_date,
+            'home_team': _mode(frame, 'HomeTeam'),
+            'away_team': _mode(frame, 'AwayTeam'),
+            'rows': len(frame),
+            'archived_at': datetime.now().isoformat(timespec='seconds'),
+            'dtypes': {column: str(dtype) for column, dtype in frame.dtypes.items()},
+            **info,
+        }
+        table = pa.Table.from_pandas(compact, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata, default=str).encode()})
+
+        # Written under a temporary name so a reader never opens a partial file
+        partial = f'{path}.partial'
+        pq.write_table(table, partial, compression='zstd')
+        os.replace(partial, path)
+        return path
+
+    def load(self, content_hash, columns=None, pitcher_id=None, filters=None):
+        """
+        Read an archived game, memory-mapping the file and decoding only what is asked for.
+
+        Args:
+            content_hash: The game's content hash
+            columns: Columns to read (default all)
+            pitcher_id: Only return this pitcher's rows
+            filters: Extra pyarrow row filters, e.g. [('PitcherTeam', '==', 'ABC_DEF')]
+
+        Returns:
+            DataFrame with the dtypes it was archived with
+
+        Raises:
+            FileNotFoundError: the game is not archived
+        """
+        path = self.path(content_hash)
+        if path is None:
+            raise FileNotFoundError(f'Game {content_hash} is not archived')
+
+        filters = list(filters or [])
+        if pitcher_id is not None:
+            filters.append(('PitcherId', '==', pitcher_id))
+        table = pq.read_table(path, columns=columns, filters=filters or None, memory_map=True)
+
+        dtypes = _metadata(table.schema).get('dtypes', {})
+        frame = table.to_pandas()
+        return frame.astype({column: dtypes[column] for column in frame.columns if column in dtypes})
+
+    def mark_reported(self, content_hash, target):
+        """Record that an archived game has been reported for a target ('own' or 'opponent')."""
+        path = self._reported_path(content_hash, target)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'a').close()
+
+    def reported(self, content_hash, target):
+        """Whether mark_reported was called for this game and target; a game file holds both teams' pitchers."""
+        return os.path.exists(self._reported_path(content_hash, target))
+
+    def _reported_path(self, content_hash, target):
+        return os.path.join(self.root, 'reported', 'opponent' if target == 'opponent' else 'own', content_hash)
+
+    def info(self, content_hash):
+        """Metadata of an archived game (read without loading any rows), or None if it is not archived."""
+        path = self.path(content_hash)
+        return _info(path) if path else None
+
+    def games(self):
+        """Archived games, newest first, described by their metadata (read without loading any rows)."""
+        games = [_info(path) for path in glob.glob(os.path.join(self.root, 'date=*', '*.parquet'))]
+        return sorted(games, key=lambda game: (game.get('date', ''), game.get('archived_at', '')), reverse=True)
+
+    def prune(self, before=None, keep=None, dry_run=False):
+        """
+        Delete archived games.
+
+        Args:
+            before: Delete games played before this date (YYYY-MM-DD)
+            keep: Keep only this many of the most recent games
+            dry_run: Only report what would be deleted
+
+        Returns:
+            Metadata of the deleted games
+        """
+        games = self.games()
+        doomed = [game for game in games if before is not None and game.get('date', '') < before]
+        if keep is not None:
+            doomed += [game for game in games[keep:] if game not in doomed]
+
+        if not dry_run:
+            for game in doomed:
+                os.remove(game['path'])
+                for target in ('own', 'opponent'):
+                    try:
+                        os.remove(self._reported_path(game['content_hash'], target))
+                    except FileNotFoundError:
+                        pass
+                folder = os.path.dirname(game['path'])
+                if not os.listdir(folder):
+                    os.rmdir(folder)
+        return doomed
+
+
+def _metadata(schema):
+    raw = (schema.metadata or {}).get(METADATA_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def _info(path):
+    info = _metadata(pq.read_schema(path, memory_map=True))
+    info.pop('dtypes', None)
+    info['path'] = path
+    info['size'] = os.path.getsize(path)
+    return info
+
+
+def _mode(frame, column):
+    if column not in frame.columns:
+        return ''
+    mode = frame[column].mode()
+    return str(mode.iloc[0]) if not mode.empty else ''
+
+
+def _game_date(frame):
+    # TrackMan dates are YYYY-MM-DD; anything unparseable is filed under 'unknown'
+    parsed = pd.to_datetime(_mode(frame, 'Date'), errors='coerce')
+    return parsed.strftime('%Y-%m-%d') if not pd.isna(parsed) else 'unknown'
+
+
+def _compact(series):
+    if pd.api.types.is_string_dtype(series):
+        return series.astype('category')
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    return series
@@ -0,0 +1,74 @@
+from functools import cached_property
+
+import pandas as pd
+
+
+class GameFrame:
+    """
+    A parsed TrackMan game, partitioned by pitcher once so every per-pitcher report
+    function works on its own slice instead of re-filtering the whole file.
+
+    Rows are stable-sorted by PitcherId, so each pitcher's pitches form one contiguous
+    block (still in file order) and pitcher() can hand out a slice view rather than
+    a boolean-mask copy.
+    """
+
+    def __init__(self, source):
+        # Pitchers are reported in the order they first appear in the file
+        self.pitcher_order = list(pd.unique(source['PitcherId'].dropna()))
+
+        self.frame = source.sort_values('PitcherId', kind='stable')
+        indices = self.frame.groupby('PitcherId', sort=False).indices
+        self._slices = {pitcher_id: slice(rows[0], rows[-1] + 1) for pitcher_id, rows in indices.items()}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def pitcher(self, pitcher_id):
+        """Return the rows thrown by one pitcher (empty if the pitcher is not in the game)."""
+        return self.frame.iloc[self.pitcher_rows(pitcher_id)]
+
+    def pitcher_rows(self, pitcher_id):
+        """Positional slice of one pitcher's rows in self.frame (empty if the pitcher is not in the game)."""
+        return self._slices.get(pitcher_id, slice(0, 0))
+
+    def pitcher_name(self, pitcher_id):
+        return self.pitcher(pitcher_id)['Pitcher'].iloc[0]
+
+    @cached_property
+    def pitcher_teams(self):
+        # One TrackMan team ID per pitcher, taken from their first pitch
+        return {pitcher_id: self.frame['PitcherTeam'].iat[rows.start] for pitcher_id, rows in self._slices.items()}
+
+    def pitcher_ids(self, trackman_id, opponent=False):
+        """Pitcher IDs (in file order) belonging to the given team, or to everyone else when opponent=True."""
+        return [pitcher_id for pitcher_id in self.pitcher_order
+            if (self.pitcher_teams[pitcher_id] == trackman_id) != opponent]
+
+    def _mode(self, column):
+        if column not in self.frame.columns:
+            return ''
+        mode = self.frame[column].mode()
+        return mode.iloc[0] if not mode.empty else ''
+
+    @cached_property
+    def raw_date(self):
+        return self._mode('Date')
+
+    @cached_property
+    def date(self):
+        return GameFrame.format_date(self.raw_date)
+
+    @staticmethod
+    def format_date(raw_date):
+        # TrackMan dates are YYYY-MM-DD; reports show MM/DD/YYYY
+        parts = str(raw_date).split('-')
+        return f"{parts[1]}/{parts[2]}/{parts[0]}" if len(parts) == 3 else str(raw_date)
+
+    @cached_property
+    def home_team(self):
+        return self._mode('HomeTeam')
+
+    @cached_property
+    def away_team(self):
+        return self._mode('AwayTeam')
@@ -0,0 +1,220 @@
+import os
+import re
+import json
+import hashlib
+import zipfile
+from datetime import date, datetime
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+from python_calamine import CalamineWorkbook
+
+from app.services import report, team_stats
+from app.services.file_validator import MAX_FILE_SIZE, MAX_ROWS, file_validator
+
+# Game header fields read by GameFrame
+GAME_COLUMNS = {'HomeTeam': 'string', 'AwayTeam': 'string'}
+
+# Every column any consumer of an upload reads; the rest of the export is never parsed
+COLUMN_TYPES = {**report.required_columns, **team_stats.SAVE_COLUMNS, **GAME_COLUMNS}
+
+# Points at the game(s) of the user's latest upload in the school's GameArchive
+UPLOAD_RECORD_NAME = '{user_id}_upload.json'
+
+CHUNK_SIZE = 1024 * 1024
+
+# CSV rows parsed per step; MAX_ROWS is enforced between steps
+ROW_CHUNK_SIZE = 10000
+
+
+class UploadRejected(ValueError):
+    """The upload breaks a size, shape or column limit; raised as soon as that is known."""
+
+
+class UploadTooLarge(UploadRejected):
+    pass
+
+
+def receive(file, filepath, max_size=MAX_FILE_SIZE):
+    """
+    Stream an uploaded file to disk, hashing it on the way.
+
+    Args:
+        file: werkzeug FileStorage from the request
+        filepath: Destination path
+        max_size: Largest accepted size in bytes
+
+    Returns:
+        (file_hash, size); the MD5 hex digest of the file, which games saved before
+        season.content_hash are stored under as Outing.content_hash
+
+    Raises:
+        UploadTooLarge: once more than max_size bytes arrive (the partial file is removed)
+    """
+    digest = hashlib.md5()
+    size = 0
+    file.stream.seek(0)
+    try:
+        with open(filepath, 'wb') as f:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge('File too large. Max Size: {} bytes'.format(max_size))
+                digest.update(chunk)
+                f.write(chunk)
+    except UploadTooLarge:
+        os.remove(filepath)
+        raise
+    file.stream.seek(0)
+    return digest.hexdigest(), size
+
+
+def parse(filepath, required_columns=()):
+    """
+    Parse the columns in COLUMN_TYPES from a TrackMan export (.csv, .xlsx or .xls).
+
+    String columns are read as strings; numeric columns are left to the parser and
+    checked (and coerced where needed) by file_validator.check_data_types.
+
+    The header row is checked against MAX_COLUMNS and required_columns before any data
+    row is read, and parsing stops as soon as the file passes MAX_ROWS.
+
+    Returns:
+        (frame, column_count) where column_count is the number of columns in the whole file
+
+    Raises:
+        UploadRejected: the file has too many columns or rows, or lacks a required column
+    """
+    def wanted(column):
+        return column in COLUMN_TYPES
+
+    string_columns = {column: str for column, kind in COLUMN_TYPES.items() if kind == 'string'}
+
+    if filepath.endswith('.csv'):
+        header = read_header(filepath, required_columns)
+        return _read_csv(filepath, wanted, string_columns, header), len(header)
+    elif filepath.endswith(('.xlsx', '.xls')):
+        return _read_spreadsheet(filepath, wanted, string_columns, required_columns)
+    raise ValueError("Unsupported file format. Please provide a .csv, .xlsx, or .xls file.")
+
+
+def read_header(filepath, required_columns=()):
+    """
+    Column names of a CSV export, read without touching its data rows.
+
+    Raises:
+        UploadRejected: the file has too many columns or lacks a required column
+    """
+    header = list(pd.read_csv(filepath, nrows=0).columns)
+    _check_header(header, required_columns)
+    return header
+
+
+def _check_header(header, required_columns):
+    is_valid, msg = file_validator.check_header(header, required_columns)
+    if not is_valid:
+        raise UploadRejected(msg)
+
+
+def _check_rows(rows):
+    if rows > MAX_ROWS:
+        raise UploadRejected('File has too many rows: more than {}. Max allowed is {}'.format(MAX_ROWS, MAX_ROWS))
+
+
+def _read_csv(filepath, wanted, dtype, header):
+    chunks, rows = [], 0
+    with pd.read_csv(filepath, usecols=wanted, dtype=dtype, chunksize=ROW_CHUNK_SIZE) as reader:
+        for chunk in reader:
+            rows += len(chunk)
+            _check_rows(rows)
+            chunks.append(chunk)
+    if not chunks:
+        return pd.DataFrame(columns=[column for column in header if wanted(column)])
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+
+def _read_spreadsheet(filepath, wanted, dtype, required_columns):
+    # calamine parses the sheet natively; only the wanted columns are then converted to Python
+    # values (the way pandas' calamine engine converts cells) and handed to the same parser
+    # read_excel uses, so the result matches pd.read_excel without paying for the other columns
+    if filepath.endswith('.xlsx'):
+        _check_rows(_declared_rows(filepath))
+
+    sheet = CalamineWorkbook.from_path(filepath).get_sheet_by_index(0)
+    header = sheet.to_python(skip_empty_area=False, nrows=1)
+    if not header:
+        return pd.DataFrame(), 0
+
+    # Limits are checked on the header row and the sheet's dimensions before the body is converted
+    header = header[0]
+    _check_header(header, required_columns)
+    # total_height is the 0-based index of the last row, so the body read from A1 has one more row
+    # than that; the header row is then subtracted, as in _declared_rows and the CSV reader
+    sheet_rows = sheet.total_height + 1
+    _check_rows(sheet_rows - 1)
+
+    rows = sheet.to_python(skip_empty_area=False)
+    keep = [index for index, column in enumerate(header) if wanted(column)]
+    data = [[_excel_cell(row[index]) for index in keep] for row in rows]
+    return TextParser(data, header=0, dtype=dtype).read(), len(header)
+
+
+def _declared_rows(filepath):
+    # Data rows the first worksheet declares in its <dimension> element, read from the head of
+    # the sheet XML so an oversized workbook is refused before calamine loads it. Writers may
+    # omit the element (0 is returned); the loaded sheet is always checked as well
+    try:
+        with zipfile.ZipFile(filepath) as archive:
+            workbook = archive.read('xl/workbook.xml').decode('utf-8', 'replace')
+            relationships = archive.read('xl/_rels/workbook.xml.rels').decode('utf-8', 'replace')
+            sheet_id = re.search(r'<(?:\w+:)?sheet\b[^>]*\br:id="([^"]+)"', workbook).group(1)
+            target = re.search(r'<Relationship\b[^>]*\bId="{}"[^>]*\bTarget="([^"]+)"'.format(re.escape(sheet_id)), relationships)
+            target = target or re.search(r'<Relationship\b[^>]*\bTarget="([^"]+)"[^>]*\bId="{}"'.format(re.escape(sheet_id)), relationships)
+            name = target.group(1).lstrip('/')
+            with archive.open(name if name.startswith('xl/') else 'xl/' + name) as sheet:
+                head = sheet.read(4096).decode('utf-8', 'replace')
+    except (zipfile.BadZipFile, KeyError, AttributeError):
+        return 0
+    dimension = re.search(r'<(?:\w+:)?dimension\b[^>]*\bref="[A-Z]+\d+:[A-Z]+(\d+)"', head)
+    return int(dimension.group(1)) - 1 if dimension else 0
+
+
+def _excel_cell(value):
+    # Whole-number floats become ints and dates become datetimes, as in pandas' calamine reader
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def upload_record_path(temp_folder, user_id):
+    return os.path.join(temp_folder, UPLOAD_RECORD_NAME.format(user_id=user_id))
+
+
+def save_upload_record(path, *content_hashes, file_hashes=None):
+    """
+    Remember which archived games make up the user's latest upload, for the report job and save-game.
+
+    Args:
+        path: From upload_record_path
+        content_hashes: season.content_hash of each game
+        file_hashes: Optional {content hash: MD5 of the uploaded file}; games saved before
+            content hashes were computed from the rows are stored under the file MD5
+    """
+    partial = f'{path}.partial'
+    with open(partial, 'w') as f:
+        json.dump({'content_hashes': list(content_hashes), 'file_hashes': file_hashes or {}}, f)
+    os.replace(partial, path)
+
+
+def load_upload_record(path):
+    """Content hashes of the games saved by save_upload_record (one for a single-game upload)."""
+    with open(path, 'r') as f:
+        return json.load(f)['content_hashes']
+
+
+def load_file_hashes(path):
+    """The {content hash: file MD5} saved by save_upload_record."""
+    with open(path, 'r') as f:
+        return json.load(f).get('file_hashes', {})
@@ -0,0 +1,135 @@
+import numpy as np
+
+# Fixed evaluation windows (x_min, x_max, y_min, y_max), matching each chart's axis limits
+LOCATION_EXTENT = (-2.5, 2.5, 0.0, 5.0)
+BREAK_EXTENT = (-25.0, 25.0, -25.0, 25.0)
+
+# Kernel is truncated at this many standard deviations
+KERNEL_CUTOFF = 4
+
+
+def _fast_length(n):
+    # Smallest 2^a * 3^b * 5^c >= n; pocketfft is much slower on lengths with large prime factors
+    best = 2 ** int(np.ceil(np.log2(n)))
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            length = power35
+            while length < n:
+                length *= 2
+            best = min(best, length)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+def density_grid(x, y, extent, bw_adjust=1.0, gridsize=128, pad=0.5):
+    """
+    Gaussian KDE evaluated on a fixed grid by binning the points and convolving the
+    bin counts with the kernel through an FFT.
+
+    The bandwidth matches seaborn.kdeplot: Scott's factor (n ** -1/6) scaled by
+    bw_adjust, applied to the full data covariance. The grid spans the extent with
+    gridsize points per axis, padded by `pad` extents on every side so that mass
+    just outside the chart still counts towards the contour levels.
+
+    Args:
+        x: x coordinates of the points
+        y: y coordinates of the points
+        extent: (x_min, x_max, y_min, y_max) window that is drawn
+        bw_adjust: Multiplier on the Scott's rule bandwidth
+        gridsize: Number of grid points per axis inside the extent
+        pad: Fraction of the extent added around it on each side
+
+    Returns:
+        (grid_x, grid_y, density) with density shaped (len(grid_y), len(grid_x)),
+        or None when the KDE is singular (too few points, zero variance or perfect covariance)
+    """
+    points = np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])
+    points = points[~np.isnan(points).any(axis=1)]
+    n = len(points)
+    if n < 2:
+        return None
+
+    data_cov = np.cov(points, rowvar=False)
+    if np.any(data_cov.diagonal() == 0):
+        return None
+    cov = data_cov * (n ** (-1 / 6) * bw_adjust) ** 2
+    det = np.linalg.det(cov)
+    if not det > 0:
+        return None
+    # seaborn's bundled gaussian_kde (used because scipy is not installed) whitens the data
+    # with the lower Cholesky factor L of the inverse covariance, so its kernel exponent is
+    # d.T @ L.T @ L @ d. Use the same form so contours keep the shape reports have always had
+    whitening = np.linalg.cholesky(np.linalg.inv(cov))
+    inv_cov = whitening.T @ whitening
+
+    x_min, x_max, y_min, y_max = extent
+    step_x = (x_max - x_min) / (gridsize - 1)
+    step_y = (y_max - y_min) / (gridsize - 1)
+    pad_cells = int(round(pad * (gridsize - 1)))
+    offsets = np.arange(-pad_cells, gridsize + pad_cells)
+    grid_x = x_min + step_x * offsets
+    grid_y = y_min + step_y * offsets
+    nx, ny = len(grid_x), len(grid_y)
+
+    # Linear binning: split each point between the four surrounding grid nodes
+    fx = np.clip((points[:, 0] - grid_x[0]) / step_x, 0, nx - 1)
+    fy = np.clip((points[:, 1] - grid_y[0]) / step_y, 0, ny - 1)
+    ix = np.minimum(fx.astype(int), nx - 2)
+    iy = np.minimum(fy.astype(int), ny - 2)
+    wx = fx - ix
+    wy = fy - iy
+    counts = np.zeros(ny * nx)
+    for dy, weight_y in ((0, 1 - wy), (1, wy)):
+        for dx, weight_x in ((0, 1 - wx), (1, wx)):
+            counts += np.bincount((iy + dy) * nx + ix + dx, weights=weight_y * weight_x, minlength=ny * nx)
+    counts = counts.reshape(ny, nx)
+
+    # Kernel sampled on grid offsets; the cross term keeps the data's covariance tilt
+    half_x = min(int(np.ceil(KERNEL_CUTOFF * np.sqrt(cov[0, 0]) / step_x)), nx - 1)
+    half_y = min(int(np.ceil(KERNEL_CUTOFF * np.sqrt(cov[1, 1]) / step_y)), ny - 1)
+    kx, ky = np.meshgrid(np.arange(-half_x, half_x + 1) * step_x, np.arange(-half_y, half_y + 1) * step_y)
+    mahalanobis = inv_cov[0, 0] * kx ** 2 + 2 * inv_cov[0, 1] * kx * ky + inv_cov[1, 1] * ky ** 2
+    kernel = np.exp(-0.5 * mahalanobis) / np.sqrt(np.linalg.det(2 * np.pi * cov))
+
+    # Circular convolution only wraps onto the first 2*half outputs, which are cropped away,
+    # so padding each axis by half the kernel is enough for the kept window to be exact
+    fft_shape = (_fast_length(ny + half_y), _fast_length(nx + half_x))
+    spectrum = np.fft.rfft2(counts, fft_shape) * np.fft.rfft2(kernel, fft_shape)
+    density = np.fft.irfft2(spectrum, fft_shape)[half_y:half_y + ny, half_x:half_x + nx] / n
+
+    # FFT round-off can leave tiny negative values in empty regions
+    return grid_x, grid_y, np.maximum(density, 0)
+
+
+def density_levels(density, levels=10, thresh=0.05):
+    """
+    Convert iso-proportion levels into iso-density contour levels, the same way
+    seaborn.kdeplot does: `levels` evenly spaced proportions from thresh to 1, each
+    mapped to the density above which that share of the total mass lies.
+    """
+    isoprop = np.linspace(thresh, 1, levels)
+    values = np.ravel(density)
+    sorted_values = np.sort(values)[::-1]
+    normalized_values = np.cumsum(sorted_values) / values.sum()
+    idx = np.searchsorted(normalized_values, 1 - isoprop)
+    return np.take(sorted_values, idx, mode='clip')
+
+
+def kdeplot(ax, x, y, extent, cmap, bw_adjust=1.0, thresh=0.05, levels=10, gridsize=128):
+    """
+    Draw filled KDE contours on ax. Drop-in for seaborn.kdeplot(fill=True) on a
+    fixed window; returns the contour set, or None if the KDE is singular.
+    """
+    grid = density_grid(x, y, extent, bw_adjust=bw_adjust, gridsize=gridsize)
+    if grid is None:
+        return None
+    grid_x, grid_y, density = grid
+    draw_levels = density_levels(density, levels, thresh)
+
+    # Levels come from the padded grid, but only the window inside the axes is traced
+    inside_x = (grid_x >= extent[0] - 1e-9) & (grid_x <= extent[1] + 1e-9)
+    inside_y = (grid_y >= extent[2] - 1e-9) & (grid_y <= extent[3] + 1e-9)
+    return ax.contourf(grid_x[inside_x], grid_y[inside_y], density[np.ix_(inside_y, inside_x)], levels=draw_levels, cmap=cmap)
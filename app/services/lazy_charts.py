@@ -0,0 +1,240 @@
+import os
+import re
+import glob
+import json
+import uuid
+import shutil
+import tempfile
+import threading
+import weakref
+from functools import lru_cache
+
+import pandas as pd
+
+from app.services import report, pitcher_pipeline
+from app.services.report_lab_generator import merge_pdfs
+
+# Charts and PDFs of a lazy upload are rendered from this snapshot the first time they are requested:
+# the settings and pitcher row ranges as JSON, and the pitches in a parquet file named by the token
+MANIFEST_NAME = '{user_id}_render_manifest.json'
+FRAME_NAME = '{user_id}_render_{token}.parquet'
+
+_CHART_FILE = re.compile(r'^(\d+)_pitcher_([\w.-]+?)_(heat_map|break_map)(?:_left|_right)?_([a-z]+)\.([a-z]+)$')
+_PDF_FILE = re.compile(r'^(\d+)_pitcher_([\w.-]+)_report\.pdf$')
+_MERGED_FILE = re.compile(r'^(\d+)_merged_pitcher_reports\.pdf$')
+
+# Locks disappear once no request holds them, so the table does not grow with every upload
+_locks = weakref.WeakValueDictionary()
+_locks_guard = threading.Lock()
+
+
+def save_manifest(job, game, pitcher_ids):
+    """
+    Snapshot what is needed to render an upload's charts and PDFs later.
+
+    Args:
+        job: Settings from pitcher_pipeline.report_job
+        game: GameFrame of the upload
+        pitcher_ids: Pitchers in the report, in output order
+    """
+    columns = [column for column in report.required_columns if column in game.frame.columns]
+    token = uuid.uuid4().hex
+    frame_name = FRAME_NAME.format(user_id=job['user_id'], token=token)
+    # The rows keep their positions, which is what the pitcher row ranges below refer to
+    game.frame[columns].to_parquet(os.path.join(job['temp_folder'], frame_name), index=False)
+
+    manifest = {
+        'token': token,
+        'job': job,
+        'frame': frame_name,
+        'pitchers': {str(pitcher_id): [_plain(pitcher_id), int(game.pitcher_rows(pitcher_id).start), int(game.pitcher_rows(pitcher_id).stop)]
+            for pitcher_id in pitcher_ids},
+    }
+    path = _manifest_path(job['temp_folder'], job['user_id'])
+    partial = f'{path}.{uuid.uuid4().hex}'
+    with open(partial, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(partial, path)
+    _remove_frames(job['temp_folder'], job['user_id'], keep=frame_name)
+
+
+def remove_manifest(temp_folder, user_id):
+    try:
+        os.remove(_manifest_path(temp_folder, user_id))
+    except FileNotFoundError:
+        pass
+    _remove_frames(temp_folder, user_id)
+
+
+def ensure_chart(temp_folder, filename, school_slug):
+    """
+    Render a chart image of a lazy upload if it has not been rendered yet; anything else is left alone.
+
+    Args:
+        temp_folder: The school's temp directory the file is served from
+        filename: Requested file, relative to temp_folder
+        school_slug: School the request is for; only a manifest of that school is rendered from
+    """
+    match = _CHART_FILE.match(filename)
+    if not match or not _inside(temp_folder, filename) or os.path.exists(os.path.join(temp_folder, filename)):
+        return
+    user_id, pitcher_key, group, theme, ext = match.groups()
+    manifest = _manifest(temp_folder, user_id, school_slug)
+    if manifest is None or pitcher_key not in manifest['pitchers'] or not manifest['job']['charts']:
+        return
+    if theme not in manifest['job']['themes'] or ext not in (report.WEB_FORMAT, report.PRINT_FORMAT):
+        return
+    _render_group(manifest, pitcher_key, group)
+
+
+def ensure_report(temp_folder, output_folder, filename, school_slug):
+    """
+    Build a pitcher PDF or the merged PDF of a lazy upload if it does not exist yet.
+
+    Args:
+        temp_folder: The school's temp directory, where the manifest is
+        output_folder: The school's reports directory the file is served from
+        filename: Requested file, relative to output_folder
+        school_slug: School the request is for; only a manifest of that school is rendered from
+    """
+    pdf_match, merged_match = _PDF_FILE.match(filename), _MERGED_FILE.match(filename)
+    if not (pdf_match or merged_match) or not _inside(output_folder, filename):
+        return
+    manifest = _manifest(temp_folder, (pdf_match or merged_match).group(1), school_slug)
+    if manifest is None or not _same_folder(manifest['job']['output_folder'], output_folder):
+        return
+
+    if pdf_match:
+        if pdf_match.group(2) in manifest['pitchers']:
+            _build_pdf(manifest, pdf_match.group(2))
+        return
+
+    job = manifest['job']
+    merged_path = os.path.join(job['output_folder'], filename)
+    with _lock(merged_path):
+        if os.path.exists(merged_path):
+            return
+        pdf_paths = []
+        for pitcher_key in manifest['pitchers']:
+            try:
+                pdf_paths.append(_build_pdf(manifest, pitcher_key))
+            except Exception as e:
+                print(f"Error building PDF for pitcher {pitcher_key}: {e}")
+        partial = f'{merged_path}.{uuid.uuid4().hex}.partial'
+        merge_pdfs(job['user_id'], job['output_folder'], partial, pdf_paths=pdf_paths)
+        _publish(manifest, partial, merged_path)
+
+
+def _manifest_path(temp_folder, user_id):
+    return os.path.join(temp_folder, MANIFEST_NAME.format(user_id=user_id))
+
+
+def _remove_frames(temp_folder, user_id, keep=None):
+    for path in glob.glob(os.path.join(temp_folder, FRAME_NAME.format(user_id=user_id, token='*'))):
+        if os.path.basename(path) != keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _plain(value):
+    # numpy scalars (pitcher IDs read from the frame) as the Python number JSON can store
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _same_folder(first, second):
+    return os.path.realpath(first) == os.path.realpath(second)
+
+
+def _inside(folder, filename):
+    folder = os.path.realpath(folder)
+    return os.path.commonpath([folder, os.path.realpath(os.path.join(folder, filename))]) == folder
+
+
+def _manifest(temp_folder, user_id, school_slug=None):
+    path = _manifest_path(temp_folder, user_id)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    manifest = _load_manifest(path, stat.st_mtime_ns, stat.st_size)
+    # A manifest only renders into the school and temp folder it was written for
+    if school_slug is not None and manifest['job']['school_slug'] != school_slug:
+        return None
+    if not _same_folder(manifest['job']['temp_folder'], temp_folder):
+        return None
+    return manifest
+
+
+@lru_cache(maxsize=8)
+def _load_manifest(path, mtime_ns, size):
+    # Keyed on mtime and size so a newer upload's manifest is picked up without a restart
+    with open(path) as f:
+        manifest = json.load(f)
+    frame_path = os.path.join(os.path.dirname(path), os.path.basename(manifest['frame']))
+    manifest['frame'] = pd.read_parquet(frame_path)
+    manifest['pitchers'] = {key: (pitcher_id, slice(start, stop)) for key, (pitcher_id, start, stop) in manifest['pitchers'].items()}
+    return manifest
+
+
+def _lock(key):
+    # One lock per output file, so concurrent requests for the same chart render it once
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = threading.Lock()
+        return lock
+
+
+def _pitcher(manifest, pitcher_key):
+    pitcher_id, rows = manifest['pitchers'][pitcher_key]
+    return manifest['frame'].iloc[rows], pitcher_id
+
+
+def _render_group(manifest, pitcher_key, group):
+    job = manifest['job']
+    pitcher_data, pitcher_id = _pitcher(manifest, pitcher_key)
+    chart = 'heat_map_left' if group == 'heat_map' else group
+    # This file is moved in last, so once it exists the whole group is in place
+    done_path = report.chart_paths(os.path.join(job['temp_folder'], f"{job['user_id']}_pitcher_{pitcher_id}_{chart}"), report.PRINT_THEME)[1]
+
+    with _lock(done_path):
+        if os.path.exists(done_path):
+            return
+        # Rendered out of sight and moved in, so other processes never serve a half-written image
+        staging = tempfile.mkdtemp(dir=job['temp_folder'], prefix='.render-')
+        try:
+            pitcher_pipeline.render_chart_group(pitcher_data, pitcher_id, job, group, output_folder=staging)
+            names = sorted(os.listdir(staging), key=lambda name: name == os.path.basename(done_path))
+            for name in names:
+                _publish(manifest, os.path.join(staging, name), os.path.join(job['temp_folder'], name))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+def _build_pdf(manifest, pitcher_key):
+    job = manifest['job']
+    pitcher_data, pitcher_id = _pitcher(manifest, pitcher_key)
+    pdf_path = pitcher_pipeline.pitcher_pdf_path(pitcher_id, job)
+
+    with _lock(pdf_path):
+        if os.path.exists(pdf_path):
+            return pdf_path
+        if job['charts']:
+            _render_group(manifest, pitcher_key, 'heat_map')
+            _render_group(manifest, pitcher_key, 'break_map')
+        table_data, pitch_usage_data = pitcher_pipeline.build_tables(pitcher_data, pitcher_id)
+        partial = f'{pdf_path}.{uuid.uuid4().hex}.partial'
+        pitcher_pipeline.build_pdf(pitcher_id, job, table_data, pitch_usage_data, partial)
+        _publish(manifest, partial, pdf_path)
+    return pdf_path
+
+
+def _publish(manifest, source, destination):
+    # A newer upload may have replaced the manifest while this was rendering; its output is stale then
+    current = _manifest(manifest['job']['temp_folder'], manifest['job']['user_id'])
+    if current is None or current['token'] != manifest['token']:
+        os.remove(source)
+        return
+    os.replace(source, destination)
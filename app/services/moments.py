@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+
+# Column prefix on outing_pitch_stats -> TrackMan column; each metric has _count, _mean and _m2 columns
+MOMENTS = {
+    'rel_speed': 'RelSpeed',
+    'induced_vert_break': 'InducedVertBreak',
+    'horz_break': 'HorzBreak',
+    'spin_rate': 'SpinRate',
+    'extension': 'Extension',
+    'rel_height': 'RelHeight',
+    'rel_side': 'RelSide',
+}
+
+
+def summarize(values):
+    """
+    Count, mean and M2 (sum of squared deviations from the mean) of one outing's values.
+
+    Args:
+        values: The pitches' values; NaN is ignored
+
+    Returns:
+        (count, mean, m2); mean and m2 are None when there are no values
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return 0, None, None
+    mean = values.mean()
+    return len(values), float(mean), float(((values - mean) ** 2).sum())
+
+
+def combine(first, second):
+    """
+    Merge two (count, mean, m2) summaries with the parallel form of Welford's update.
+
+    The result is what summarize would give for both sets of values together, without
+    the cancellation of summing squares.
+    """
+    count_a, mean_a, m2_a = first
+    count_b, mean_b, m2_b = second
+    if not count_b:
+        return first
+    if not count_a:
+        return second
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    return count, mean_a + delta * count_b / count, m2_a + m2_b + delta * delta * count_a * count_b / count
+
+
+def merge(summaries):
+    """Merge any number of (count, mean, m2) summaries; a None count is treated as no values."""
+    total = (0, None, None)
+    for count, mean, m2 in summaries:
+        if count:
+            total = combine(total, (count, mean, m2))
+    return total
+
+
+def describe(summary):
+    """
+    Returns:
+        dict of count, mean and sample standard deviation (None below two values)
+    """
+    count, mean, m2 = summary
+    return {
+        'count': count,
+        'mean': mean,
+        'std': math.sqrt(m2 / (count - 1)) if count > 1 else None,
+    }
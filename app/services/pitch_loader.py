@@ -0,0 +1,112 @@
+import io
+
+import pandas as pd
+import sqlalchemy as sa
+
+from app.db.models import db, Pitch
+
+# TrackMan column -> pitches column; pitcher, outing, pitch type and date are filled in by the caller
+PITCH_COLUMNS = {
+    'TaggedPitchType': 'tagged_pitch_type',
+    'PitchCall': 'pitch_call',
+    'BatterSide': 'batter_side',
+    'BatterTeam': 'batter_team',
+    'BatterId': 'batter_id',
+    'Inning': 'inning',
+    'PAofInning': 'pa_of_inning',
+    'PitchofPA': 'pitch_of_pa',
+    'Balls': 'balls',
+    'Strikes': 'strikes',
+    'Outs': 'outs',
+    'KorBB': 'kor_bb',
+    'PlayResult': 'play_result',
+    'RelSpeed': 'rel_speed',
+    'SpinRate': 'spin_rate',
+    'Tilt': 'tilt',
+    'InducedVertBreak': 'induced_vert_break',
+    'HorzBreak': 'horz_break',
+    'VertApprAngle': 'vert_appr_angle',
+    'HorzApprAngle': 'horz_appr_angle',
+    'RelHeight': 'rel_height',
+    'RelSide': 'rel_side',
+    'Extension': 'extension',
+    'PlateLocHeight': 'plate_loc_height',
+    'PlateLocSide': 'plate_loc_side',
+    'ZoneTime': 'zone_time',
+}
+
+# Rows per executemany on databases without COPY
+BATCH_ROWS = 5000
+
+
+def bulk_load(table, frame, connection=None):
+    """
+    Insert a frame into a table in the current transaction.
+
+    Postgres through psycopg2 gets a single COPY; other databases get batched executemany inserts.
+    Integer columns are written as integers even when the frame holds them as floats.
+
+    Args:
+        table: SQLAlchemy Table; frame's columns must be a subset of its columns
+        frame: Rows to insert; NaN and None become NULL
+        connection: Connection to write through (default: the session's)
+
+    Returns:
+        The number of rows written
+    """
+    if frame.empty:
+        return 0
+
+    frame = frame.copy()
+    for column in frame.columns:
+        if isinstance(table.c[column].type, sa.Integer):
+            frame[column] = frame[column].astype('Int64')
+
+    connection = connection or db.session.connection()
+    if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2':
+        _copy(connection, table, frame)
+    else:
+        records = frame.astype(object).where(frame.notna(), None).to_dict('records')
+        for start in range(0, len(records), BATCH_ROWS):
+            connection.execute(table.insert(), records[start:start + BATCH_ROWS])
+    return len(frame)
+
+
+def _copy(connection, table, frame):
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    columns = ', '.join(frame.columns)
+    # The raw psycopg2 cursor shares the session's transaction
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+def pitch_rows(team_data, pitcher_ids, outing_ids, outing_dates, pitch_type_ids):
+    """
+    The pitches rows for one game's saved pitchers.
+
+    Args:
+        team_data: The school's pitches from the game, PitcherId as text
+        pitcher_ids: TrackMan pitcher ID -> pitchers.id
+        outing_ids: pitchers.id -> outings.id for this game
+        outing_dates: TrackMan pitcher ID -> outing date
+        pitch_type_ids: TaggedPitchType -> pitch_types.id (None where unknown)
+
+    Returns:
+        DataFrame with pitches columns, in file order
+    """
+    present = [column for column in PITCH_COLUMNS if column in team_data.columns]
+    pitches = team_data[present].rename(columns=PITCH_COLUMNS)
+    # Text is kept as the file has it; a value too long for its column (no valid TrackMan value
+    # is) is stored as NULL instead of failing the whole save
+    for column in pitches.columns:
+        length = getattr(Pitch.__table__.c[column].type, 'length', None)
+        if length:
+            pitches[column] = pitches[column].where(pitches[column].isna() | (pitches[column].astype(str).str.len() <= length))
+    pitches['pitcher_id'] = team_data['PitcherId'].map(pitcher_ids)
+    pitches['outing_id'] = pitches['pitcher_id'].map(outing_ids)
+    pitches['pitch_type_id'] = team_data['TaggedPitchType'].map(pitch_type_ids)
+    pitches['date'] = team_data['PitcherId'].map(outing_dates)
+    pitches['pitch_number'] = team_data.groupby('PitcherId', sort=False).cumcount() + 1
+    return pitches
@@ -0,0 +1,375 @@
+import gc
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+from app.services import report
+from app.services.branding_loader import BrandingLoader
+from app.services.render_cache import RenderCache, fingerprint, file_stamp
+from app.services.report_lab_generator import PDF_Generator
+from app.services.shared_frame import SharedFrame
+
+CHARTS = ('heat_map_left', 'heat_map_right', 'break_map')
+
+# KDE contour threshold for the heat and break maps
+CHART_THRESHOLD = 0.75
+
+# Part of every render cache key; bump whenever chart, table or PDF output changes
+RENDER_VERSION = 1
+
+# Report entry fields that come from rendering (the rest are URLs built per user)
+CACHED_FIELDS = ('pitcher_name', 'pitcher_table', 'left_usage_table', 'right_usage_table', 'arm_angle')
+
+# Worker pool kept across uploads so each worker only pays the matplotlib/ReportLab import once
+_pool = None
+_pool_workers = 0
+
+
+def report_job(user, temp_folder, output_folder, branding, themes, game, lazy=False, subfolder=''):
+    """
+    Settings shared by every pitcher of one upload, as plain values so they can be sent to worker processes.
+
+    Args:
+        user: The uploading user (only id and school are read)
+        temp_folder: School temp directory charts are written to
+        output_folder: School reports directory PDFs are written to
+        branding: School branding dict
+        themes: Chart themes to render
+        game: GameFrame of the upload, for the game-level header fields
+        lazy: Build only the tables now and render charts and PDFs on first request
+        subfolder: Directory under both folders for this game's files, so the games of a
+            season upload do not overwrite each other's reports
+
+    Returns:
+        dict of job settings for process_pitcher
+    """
+    if subfolder:
+        temp_folder = os.path.join(temp_folder, subfolder)
+        output_folder = os.path.join(output_folder, subfolder)
+        os.makedirs(temp_folder, exist_ok=True)
+        os.makedirs(output_folder, exist_ok=True)
+
+    logo_path = os.path.join(BrandingLoader.SCHOOLS, user.school.slug, 'assets', 'logo.png')
+    return {
+        'user_id': user.id,
+        'school_slug': user.school.slug,
+        'charts': bool(user.school.is_active),
+        'temp_folder': temp_folder,
+        'output_folder': output_folder,
+        'subfolder': subfolder,
+        'branding': branding,
+        # The PDF header shows the school logo, so replacing it must invalidate cached reports
+        'branding_version': RenderCache.key(branding, file_stamp(logo_path)),
+        'themes': list(themes),
+        'threshold': CHART_THRESHOLD,
+        'lazy': lazy,
+        'date': game.date,
+        'home_team': game.home_team,
+        'away_team': game.away_team,
+    }
+
+
+def process_pitcher(pitcher_data, pitcher_id, job):
+    """
+    Render the charts, tables and PDF for one pitcher.
+
+    With job['lazy'] only the tables are built; charts and the PDF are left for
+    lazy_charts to render the first time they are requested.
+
+    Args:
+        pitcher_data: The pitcher's rows
+        pitcher_id: TrackMan pitcher ID
+        job: Settings from report_job
+
+    Returns:
+        dict with the pitcher's JSON report entry ('report'), the PDF path and chart byte counts
+    """
+    arm_angle = None
+    if job['charts']:
+        if job['lazy']:
+            arm_angle = report.pitcher_arm_angle(pitcher_data)
+        else:
+            # Each chart is computed once and saved in every theme by recoloring
+            render_chart_group(pitcher_data, pitcher_id, job, 'heat_map')
+            arm_angle = render_chart_group(pitcher_data, pitcher_id, job, 'break_map')
+
+    table_data, pitch_usage_data = build_tables(pitcher_data, pitcher_id)
+    report_html = table_data[4].to_html(index=False, float_format='%.2f', border=0, classes='pitcher-data-table', escape=False, justify='left', na_rep='')
+    left_usage_html = pitch_usage_data[0].to_html(index=False, float_format='%.2f', border=0, classes='pitch-usage-table', escape=False, justify='left', na_rep='')
+    right_usage_html = pitch_usage_data[1].to_html(index=False, float_format='%.2f', border=0, classes='pitch-usage-table', escape=False, justify='left', na_rep='')
+
+    # Browsers get the screen-resolution variants; the PDF embeds the vector light charts
+    chart_base = os.path.join(job['temp_folder'], f"{job['user_id']}_pitcher_{pitcher_id}")
+    image_bytes = {'web': 0, 'print': 0, 'saved': 0}
+    for chart in CHARTS:
+        for theme in job['themes']:
+            web_path, print_path = report.chart_paths(f'{chart_base}_{chart}', theme)
+            image_bytes['web'] += _file_size(web_path)
+            if theme == report.PRINT_THEME:
+                image_bytes['print'] += _file_size(print_path)
+                image_bytes['saved'] += _file_size(print_path) - _file_size(web_path)
+
+    pdf_path = pitcher_pdf_path(pitcher_id, job)
+
+    entry = _report_entry(pitcher_id, job, {
+        'pitcher_name': table_data[3],
+        'pitcher_table': report_html,
+        'left_usage_table': left_usage_html,
+        'right_usage_table': right_usage_html,
+        'arm_angle': f'{arm_angle:.1f}°' if arm_angle is not None else '',
+    })
+
+    if not job['lazy']:
+        build_pdf(pitcher_id, job, table_data, pitch_usage_data, pdf_path)
+
+    return {'report': entry, 'pdf_path': pdf_path, 'image_bytes': image_bytes}
+
+
+def render_chart_group(pitcher_data, pitcher_id, job, group, output_folder=None):
+    """
+    Render one of a pitcher's chart groups in every job theme.
+
+    Args:
+        pitcher_data: The pitcher's rows
+        pitcher_id: TrackMan pitcher ID
+        job: Settings from report_job
+        group: 'heat_map' (both batter sides) or 'break_map'
+        output_folder: Where to write the images (defaults to the job's temp folder)
+
+    Returns:
+        The arm angle for 'break_map', else None
+    """
+    output_folder = output_folder or job['temp_folder']
+    if group == 'heat_map':
+        report.pitch_heat_map_by_batter_side(pitcher_data, job['user_id'], output_folder, pitcher_id, job['threshold'], themes=job['themes'])
+        return None
+    return report.pitch_break_map(pitcher_data, job['user_id'], output_folder, pitcher_id, job['threshold'], themes=job['themes'])
+
+
+def pitcher_pdf_path(pitcher_id, job):
+    return os.path.abspath(os.path.join(job['output_folder'], f"{job['user_id']}_pitcher_{pitcher_id}_report.pdf"))
+
+
+def build_tables(pitcher_data, pitcher_id):
+    """Pitch stat and usage tables for both the web view and the PDF; raises if either cannot be built."""
+    table_data = report.build_table(pitcher_data, pitcher_id)
+    if not table_data or len(table_data) < 2 or table_data[1] is None:
+        raise ValueError(f'Failed to build table data for pitcher ID {pitcher_id}')
+
+    pitch_usage_data = report.usage_table(pitcher_data, pitcher_id)
+    if not pitch_usage_data or len(pitch_usage_data) < 2 or pitch_usage_data[1] is None:
+        raise ValueError(f'Failed to build pitch usage table data for pitcher ID {pitcher_id}')
+    return table_data, pitch_usage_data
+
+
+def build_pdf(pitcher_id, job, table_data, pitch_usage_data, pdf_path):
+    """Write a pitcher's PDF from their tables and the light print charts in the job's temp folder."""
+    user_id, slug = job['user_id'], job['school_slug']
+    chart_base = os.path.join(job['temp_folder'], f'{user_id}_pitcher_{pitcher_id}')
+
+    # PDF_Generator only reads the user's id and school slug, so workers get a stand-in for current_user
+    gen = PDF_Generator(current_user=SimpleNamespace(id=user_id, school=SimpleNamespace(slug=slug)), branding=job['branding'])
+    gen.generate_pitcher_report({
+        'pitcher_name': table_data[3],
+        'pitcher_id': str(pitcher_id),
+        'date': job['date'],
+        'home_team': job['home_team'],
+        'away_team': job['away_team'],
+        'pitch_stats': table_data[4],
+        'pitch_usage_left': pitch_usage_data[0],
+        'pitch_usage_right': pitch_usage_data[1],
+        'pitch_heat_map_left': report.chart_paths(f'{chart_base}_heat_map_left', report.PRINT_THEME)[1],
+        'pitch_heat_map_right': report.chart_paths(f'{chart_base}_heat_map_right', report.PRINT_THEME)[1],
+        'pitch_break_map': report.chart_paths(f'{chart_base}_break_map', report.PRINT_THEME)[1],
+    }, pdf_path)
+
+
+def process_pitchers(game, pitcher_ids, job, workers=0, cache=None):
+    """
+    Run process_pitcher for every pitcher, serially or across a process pool.
+
+    Args:
+        game: GameFrame of the upload
+        pitcher_ids: Pitchers to report, in output order
+        job: Settings from report_job
+        workers: Worker processes to use; 0 or 1 runs everything in this process
+        cache: Optional RenderCache; pitchers found in it are copied out instead of rendered
+
+    Yields:
+        (pitcher_id, result) in pitcher_ids order, where result is process_pitcher's dict
+        or the exception that pitcher failed with
+    """
+    for _, pitcher_id, result in process_games([(game, pitcher_ids, job)], workers=workers, cache=cache):
+        yield pitcher_id, result
+
+
+def process_games(games, workers=0, cache=None):
+    """
+    Run process_pitcher for the pitchers of several games through one worker budget.
+
+    Every pitcher is queued at once, so the pool moves on to the next game's pitchers
+    while the last ones of a game are still rendering instead of draining between games.
+
+    Args:
+        games: (game, pitcher_ids, job) per game, with job from that game's report_job
+        workers: Worker processes to use; 0 or 1 runs everything in this process
+        cache: Optional RenderCache; pitchers found in it are copied out instead of rendered
+
+    Yields:
+        (game index, pitcher_id, result) in game order, then pitcher order
+    """
+    tasks = [(index, pitcher_id) for index, (_, pitcher_ids, _) in enumerate(games) for pitcher_id in pitcher_ids]
+    if cache is None:
+        yield from _render_pitchers(games, tasks, workers)
+        return
+
+    keys, cached = {}, {}
+    for index, pitcher_id in tasks:
+        game, _, job = games[index]
+        keys[index, pitcher_id] = _cache_key(game.pitcher(pitcher_id), pitcher_id, job)
+        meta = cache.restore(keys[index, pitcher_id], _artifacts(pitcher_id, job))
+        if meta is not None:
+            cached[index, pitcher_id] = {
+                'report': _report_entry(pitcher_id, job, meta['fields']),
+                'pdf_path': pitcher_pdf_path(pitcher_id, job),
+                'image_bytes': meta['image_bytes'],
+            }
+
+    # Only the misses are rendered; hits are slotted back in so results stay in order
+    rendered = _render_pitchers(games, [task for task in tasks if task not in cached], workers)
+    try:
+        for index, pitcher_id in tasks:
+            if (index, pitcher_id) in cached:
+                yield index, pitcher_id, cached[index, pitcher_id]
+                continue
+            _, _, result = next(rendered)
+            job = games[index][2]
+            # Lazy results have no charts or PDF yet, so there is nothing to cache
+            if not isinstance(result, Exception) and not job['lazy']:
+                cache.store(keys[index, pitcher_id], _artifacts(pitcher_id, job), {
+                    'fields': {field: result['report'][field] for field in CACHED_FIELDS},
+                    'image_bytes': result['image_bytes'],
+                })
+            yield index, pitcher_id, result
+    finally:
+        rendered.close()
+
+
+def _render_pitchers(games, tasks, workers):
+    if not tasks:
+        return
+    if workers <= 1:
+        for index, pitcher_id in tasks:
+            game, _, job = games[index]
+            try:
+                result = process_pitcher(game.pitcher(pitcher_id), pitcher_id, job)
+            except Exception as e:
+                result = e
+            yield index, pitcher_id, result
+
+            # Release per-pitcher data before the next iteration to keep memory usage flat
+            del result
+            gc.collect()
+        return
+
+    # Workers read their pitcher's rows from shared memory instead of receiving a pickled frame
+    shared = {}
+    futures = []
+    try:
+        for index in sorted({index for index, _ in tasks}):
+            frame = games[index][0].frame
+            shared[index] = SharedFrame(frame, [column for column in report.required_columns if column in frame.columns])
+        pool = _get_pool(workers)
+        for index, pitcher_id in tasks:
+            game, _, job = games[index]
+            futures.append(pool.submit(_process_shared, shared[index].handle, game.pitcher_rows(pitcher_id), pitcher_id, job))
+        for (index, pitcher_id), future in zip(tasks, futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                _reset_pool()
+                result = e
+            except Exception as e:
+                result = e
+            yield index, pitcher_id, result
+    finally:
+        # The shared blocks can only go once no worker is still reading them
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        for frame in shared.values():
+            frame.close()
+
+
+def _cache_key(pitcher_data, pitcher_id, job):
+    # Everything that can change a pitcher's charts, tables or PDF: their rows, the render
+    # settings, the game header, branding and their profile picture
+    pfp_path = os.path.join(BrandingLoader.SCHOOLS, job['school_slug'], 'assets', 'players', str(pitcher_id), 'pfp.png')
+    return RenderCache.key(
+        fingerprint(pitcher_data, report.required_columns), str(pitcher_id), RENDER_VERSION,
+        job['charts'], job['themes'], job['threshold'], job['branding_version'],
+        job['date'], job['home_team'], job['away_team'], file_stamp(pfp_path))
+
+
+def _artifacts(pitcher_id, job):
+    # Cache artifact name -> the file this user's report reads it from
+    chart_base = os.path.join(job['temp_folder'], f"{job['user_id']}_pitcher_{pitcher_id}")
+    artifacts = {}
+    if job['charts']:
+        for chart in CHARTS:
+            for theme in job['themes']:
+                web_path, print_path = report.chart_paths(f'{chart_base}_{chart}', theme)
+                artifacts[f'{chart}_{theme}.{report.WEB_FORMAT}'] = web_path
+                if theme == report.PRINT_THEME:
+                    artifacts[f'{chart}_{theme}.{report.PRINT_FORMAT}'] = print_path
+    artifacts['report.pdf'] = pitcher_pdf_path(pitcher_id, job)
+    return artifacts
+
+
+def _report_entry(pitcher_id, job, fields):
+    user_id, slug = job['user_id'], job['school_slug']
+    folder = f"{job['subfolder']}/" if job['subfolder'] else ''
+    url_base = f'/storage/schools/{slug}/temp/{folder}{user_id}_pitcher_{pitcher_id}'
+    web_ext = report.WEB_FORMAT
+    return {
+        'pitcher_id': str(pitcher_id),
+        'pitcher_name': fields['pitcher_name'],
+        'pitcher_table': fields['pitcher_table'],
+        'left_usage_table': fields['left_usage_table'],
+        'right_usage_table': fields['right_usage_table'],
+        'heatmap_left_url': f'{url_base}_heat_map_left_light.{web_ext}',
+        'heatmap_right_url': f'{url_base}_heat_map_right_light.{web_ext}',
+        'heatmap_left_dark_url': f'{url_base}_heat_map_left_dark.{web_ext}',
+        'heatmap_right_dark_url': f'{url_base}_heat_map_right_dark.{web_ext}',
+        'breakmap_url': f'{url_base}_break_map_light.{web_ext}',
+        'breakmap_dark_url': f'{url_base}_break_map_dark.{web_ext}',
+        'arm_angle': fields['arm_angle'],
+        'pdf_url': f'/storage/schools/{slug}/reports/{folder}{user_id}_pitcher_{pitcher_id}_report.pdf'
+    }
+
+
+def _process_shared(handle, rows, pitcher_id, job):
+    return process_pitcher(SharedFrame.attach(handle, rows), pitcher_id, job)
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        _reset_pool()
+        # spawn: workers must not inherit the web process's database connections or locks
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        _pool_workers = workers
+    return _pool
+
+
+def _reset_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool, _pool_workers = None, 0
+
+
+def _file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
@@ -0,0 +1,107 @@
+import sqlalchemy as sa
+from sqlalchemy import func
+
+from app.db.models import db
+from app.db import models
+from app.services import sketches
+
+
+def refresh(pitcher_ids):
+    """
+    Recompute the dashboard totals of the given pitchers from their outings.
+
+    Runs in the caller's transaction, so saving or removing a game updates the totals
+    atomically; the work is bounded by these pitchers' own history, not the school's.
+
+    Args:
+        pitcher_ids: pitchers.id values whose outings or pitch stats changed
+    """
+    pitcher_ids = list(pitcher_ids)
+    if pitcher_ids:
+        _replace(lambda column: column.in_(pitcher_ids))
+
+
+def rebuild(school_id=None, connection=None):
+    """
+    Recompute the totals of every pitcher, or of one school's pitchers.
+
+    Args:
+        school_id: Only this school's pitchers (default: all)
+        connection: Connection to write through (default: the session's)
+
+    Returns:
+        (pitcher rows, pitch type rows) written
+    """
+    if school_id is None:
+        pitchers = lambda column: sa.true()
+    else:
+        school_pitchers = sa.select(models.Pitcher.id).where(models.Pitcher.school_id == school_id)
+        pitchers = lambda column: column.in_(school_pitchers)
+    _replace(pitchers, connection)
+
+    execute = (connection or db.session).execute
+    return tuple(
+        execute(sa.select(func.count()).select_from(model).where(pitchers(model.pitcher_id))).scalar()
+        for model in (models.Pitcher_Total, models.Pitcher_Pitch_Type_Total)
+    )
+
+
+def _replace(pitchers, connection=None):
+    # pitchers(column) is the filter on a pitcher_id column; pitchers left with no outings get no rows
+    execute = (connection or db.session).execute
+    totals = models.Pitcher_Total.__table__
+    outing = models.Outing
+    execute(totals.delete().where(pitchers(totals.c.pitcher_id)))
+    execute(totals.insert().from_select(
+        ['pitcher_id', 'outing_count', 'pitch_count', 'lo_inning_count', 'lo_reach', 'lo_bb_count',
+            'two_out_ab_count', 'two_out_reach', 'two_out_bb_count'],
+        sa.select(
+            outing.pitcher_id,
+            func.count(outing.id),
+            func.sum(outing.pitch_count),
+            func.sum(outing.lo_inning_count),
+            func.sum(outing.lo_reach),
+            func.sum(outing.lo_bb_count),
+            func.sum(outing.two_out_ab_count),
+            func.sum(outing.two_out_reach),
+            func.sum(outing.two_out_bb_count),
+        ).where(pitchers(outing.pitcher_id)).group_by(outing.pitcher_id)))
+
+    type_totals = models.Pitcher_Pitch_Type_Total.__table__
+    stat = models.Outing_Pitch_Stat
+    execute(type_totals.delete().where(pitchers(type_totals.c.pitcher_id)))
+    execute(type_totals.insert().from_select(
+        ['pitcher_id', 'pitch_type_id', 'count', 'strike_count', 'sw_miss_count', 'sw_weighted_count'],
+        sa.select(
+            stat.pitcher_id,
+            stat.pitch_type_id,
+            func.sum(stat.count),
+            func.sum(stat.strike_count),
+            func.sum(stat.sw_miss_count),
+            func.sum(stat.sw_percentage * stat.count),
+        ).where(pitchers(stat.pitcher_id)).group_by(stat.pitcher_id, stat.pitch_type_id)))
+    _merge_sketches(pitchers, execute)
+
+
+def _merge_sketches(pitchers, execute):
+    # Databases can't add histograms, so the outings' sketches are merged here and written back per row
+    stat = models.Outing_Pitch_Stat
+    columns = [getattr(stat, sketch) for sketch in sketches.SKETCHES]
+    rows = execute(sa.select(stat.pitcher_id, stat.pitch_type_id, *columns)
+        .where(pitchers(stat.pitcher_id), sa.or_(*[column.is_not(None) for column in columns]))).all()
+
+    grouped = {}
+    for pitcher_id, pitch_type_id, *blobs in rows:
+        grouped.setdefault((pitcher_id, pitch_type_id), []).append(blobs)
+    if not grouped:
+        return
+
+    type_totals = models.Pitcher_Pitch_Type_Total.__table__
+    execute(type_totals.update().where(
+        type_totals.c.pitcher_id == sa.bindparam('total_pitcher_id'),
+        type_totals.c.pitch_type_id == sa.bindparam('total_pitch_type_id'),
+    ), [{
+        'total_pitcher_id': pitcher_id,
+        'total_pitch_type_id': pitch_type_id,
+        **{sketch: sketches.merge(blobs) for sketch, blobs in zip(sketches.SKETCHES, zip(*outings))},
+    } for (pitcher_id, pitch_type_id), outings in grouped.items()])
@@ -0,0 +1,169 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+
+import pandas as pd
+
+# Serializes stats.json read-modify-writes between jobs finishing in the same process
+_stats_lock = threading.Lock()
+
+
+def fingerprint(frame, columns):
+    """
+    Content hash of a frame's values, independent of its index.
+
+    Args:
+        frame: Rows to hash
+        columns: Columns that affect the output; missing ones are skipped
+
+    Returns:
+        Hex digest that changes whenever any value, dtype or row order in those columns changes
+    """
+    columns = sorted(column for column in columns if column in frame.columns)
+    digest = hashlib.sha256()
+    digest.update(json.dumps([(column, str(frame[column].dtype)) for column in columns]).encode())
+    digest.update(pd.util.hash_pandas_object(frame[columns], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def file_stamp(path):
+    """(mtime_ns, size) of a file, or None if it does not exist; cheap stand-in for hashing an asset."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class RenderCache:
+    """
+    Content-addressed store of rendered report artifacts for one school.
+
+    Each entry is a directory named by its key, holding the artifact files and a meta.json.
+    An entry's directory mtime is its last use; once the cache grows past max_bytes the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        """Key for an entry from JSON-serializable parts (data fingerprint, settings, versions)."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def restore(self, key, targets):
+        """
+        Copy a cached entry's artifacts to their destinations.
+
+        Args:
+            key: Entry key
+            targets: dict of artifact name -> destination path
+
+        Returns:
+            The entry's meta dict, or None on a miss (nothing is copied)
+        """
+        entry = os.path.join(self.root, key)
+        # Every artifact is copied next to its destination first and only moved into place once
+        # all copies succeeded, so an entry evicted mid-restore leaves the destinations untouched
+        partials = {}
+        try:
+            with open(os.path.join(entry, 'meta.json'), 'r') as f:
+                meta = json.load(f)
+            if set(meta.get('artifacts', [])) != set(targets):
+                raise FileNotFoundError(key)
+            for name, path in targets.items():
+                partials[path] = f'{path}.{uuid.uuid4().hex}.partial'
+                shutil.copyfile(os.path.join(entry, name), partials[path])
+        except (OSError, ValueError):
+            for partial in partials.values():
+                if os.path.exists(partial):
+                    os.remove(partial)
+            self.misses += 1
+            return None
+
+        for path, partial in partials.items():
+            os.replace(partial, path)
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        self.hits += 1
+        return meta['meta']
+
+    def store(self, key, sources, meta):
+        """
+        Add an entry from freshly rendered artifacts.
+
+        Args:
+            key: Entry key
+            sources: dict of artifact name -> rendered file path
+            meta: JSON-serializable data returned by restore
+        """
+        entry = os.path.join(self.root, key)
+        if os.path.isdir(entry):
+            return
+
+        # Built under a temporary name and renamed, so a reader never sees a partial entry
+        staging = os.path.join(self.root, f'.staging-{uuid.uuid4().hex}')
+        try:
+            os.makedirs(staging)
+            for name, path in sources.items():
+                shutil.copyfile(path, os.path.join(staging, name))
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump({'artifacts': sorted(sources), 'meta': meta}, f)
+            os.rename(staging, entry)
+        except OSError as e:
+            print(f"Render cache: could not store {key}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, file)) for file in os.listdir(path))
+            entries.append((os.path.getmtime(path), size, path))
+            total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    def record(self):
+        """Add this run's hits, misses and evictions to the school's cumulative stats.json."""
+        stats_path = os.path.join(self.root, 'stats.json')
+        with _stats_lock:
+            stats = self.stats(self.root)
+            stats['hits'] += self.hits
+            stats['misses'] += self.misses
+            stats['evictions'] += self.evictions
+            partial = f'{stats_path}.{uuid.uuid4().hex}'
+            with open(partial, 'w') as f:
+                json.dump({key: stats[key] for key in ('hits', 'misses', 'evictions')}, f)
+            os.replace(partial, stats_path)
+
+    @staticmethod
+    def stats(root):
+        """Cumulative counters of a cache directory (zeros if it has none yet)."""
+        stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        try:
+            with open(os.path.join(root, 'stats.json'), 'r') as f:
+                stats.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return stats
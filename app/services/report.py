@@ -1,7 +1,6 @@
 import os
 import numpy as np
 import pandas as pd
-import seaborn as sns
 import matplotlib
 
 # Use a non-interactive backend for matplotlib
@@ -12,6 +11,8 @@ from matplotlib.patches import Rectangle
 from matplotlib import pyplot as plt
 import matplotlib.patches as patches
 
+from app.services import kde
+
 baseball_width = 0.24  # Approximate width of a baseball in feet
 
 _THEME_COLORS = {
@@ -49,15 +50,81 @@ matplotlib.rcParams.update({
     'font.weight': 'bold',
 })
 
+# Charts are drawn once with the light palette as the base; _apply_theme recolors them per variant
+matplotlib.rcParams.update(_THEME_COLORS['light'])
+
+# Patch gid -> theme key that colors its outline
+_THEMED_PATCHES = {
+    'strike_zone': 'text.color',
+    'shadow_zone': 'xtick.color',
+}
+
 def _make_strike_zone():
     return Rectangle((-0.83, 1.5), 1.66, 2.0,
-        linewidth=2, edgecolor=matplotlib.rcParams['text.color'], facecolor='none', linestyle='--')
+        linewidth=2, edgecolor=matplotlib.rcParams['text.color'], facecolor='none', linestyle='--', gid='strike_zone')
 
 def _make_shadow_zone():
     return Rectangle(
         (-0.83 - baseball_width, 1.5 - baseball_width),
         1.66 + 2 * baseball_width, 2.0 + 2 * baseball_width,
-        linewidth=1, edgecolor=matplotlib.rcParams['xtick.color'], facecolor='none', linestyle=(0, (1, 10)))
+        linewidth=1, edgecolor=matplotlib.rcParams['xtick.color'], facecolor='none', linestyle=(0, (1, 10)), gid='shadow_zone')
+
+def _apply_theme(fig, theme):
+    # Swap only the theme-dependent colors (text, ticks, spines, grid, zone outlines) on a finished
+    # figure, so the KDE contours, means and vectors are computed once and saved in every theme
+    colors = _THEME_COLORS.get(theme, _THEME_COLORS['light'])
+    for ax in fig.axes:
+        ax.tick_params(axis='x', which='both', colors=colors['xtick.color'], grid_color=colors['grid.color'])
+        ax.tick_params(axis='y', which='both', colors=colors['ytick.color'], grid_color=colors['grid.color'])
+        for spine in ax.spines.values():
+            spine.set_edgecolor(colors['axes.edgecolor'])
+        ax.xaxis.label.set_color(colors['axes.labelcolor'])
+        ax.yaxis.label.set_color(colors['axes.labelcolor'])
+        ax.title.set_color(colors['axes.titlecolor'])
+        for text in ax.texts:
+            text.set_color(colors['text.color'])
+        legend = ax.get_legend()
+        if legend is not None:
+            for text in legend.get_texts():
+                text.set_color(colors['text.color'])
+        for patch in ax.patches:
+            key = _THEMED_PATCHES.get(patch.get_gid())
+            if key is not None:
+                patch.set_edgecolor(colors[key])
+
+# Web images are shown at most 400 CSS px wide, so ~2x that covers high-density screens.
+# The PDF gets a vector copy of the print theme, drawn natively by ReportLab
+WEB_DPI = 110
+WEB_FORMAT = 'webp'
+PRINT_FORMAT = 'svg'
+PRINT_THEME = 'light'
+
+# Chart layouts in inches: (left, bottom, right, top) margins around a square axes box, sized
+# to fit the tick and axis labels so figures can be saved without bbox_inches='tight'
+AXES_SIZE = 6.24
+HEAT_MAP_MARGINS = (0.95, 1.0, 0.3, 0.4)
+BREAK_MAP_MARGINS = (1.3, 1.0, 0.3, 0.3)
+
+def _chart_figure(margins):
+    left, bottom, right, top = margins
+    width = left + AXES_SIZE + right
+    height = bottom + AXES_SIZE + top
+    fig = plt.figure(figsize=(width, height))
+    ax = fig.add_axes((left / width, bottom / height, AXES_SIZE / width, AXES_SIZE / height))
+    return fig, ax
+
+def chart_paths(path_base, theme):
+    """Web and print file paths for one theme of a chart saved under path_base (no extension)."""
+    return f'{path_base}_{theme}.{WEB_FORMAT}', f'{path_base}_{theme}.{PRINT_FORMAT}'
+
+def _save_themes(fig, path_base, themes):
+    # Every theme gets a screen-resolution web image; only the theme the PDF embeds gets a vector copy
+    for theme in themes:
+        _apply_theme(fig, theme)
+        web_path, print_path = chart_paths(path_base, theme)
+        fig.savefig(web_path, dpi=WEB_DPI, transparent=True, pil_kwargs={'quality': 90})
+        if theme == PRINT_THEME:
+            fig.savefig(print_path, transparent=True, metadata={'Date': None})
 
 def _cmap(hex_color, name):
     # Build a transparency gradient from fully transparent to the pitch color,
@@ -128,110 +195,57 @@ pitch_colors = {k: _cmap(v, k) for k, v in pitch_point_colors.items()}
 
 STRIKES = ['StrikeCalled', 'StrikeSwinging', 'FoulBallNotFieldable']
 
-def build_table(source, pitcher_id):
+# Pitch calls that count as the batter offering at the pitch when measuring Chase %
+CHASE_SWINGS = ['StrikeSwinging', 'FoulBallNotFieldable', 'InPlay', 'HitByPitch']
+
+WHIFFS = ['StrikeSwinging', 'FoulBallNotFieldable']
+
+def _parse_tilt(tilt):
+    # Tilt is stored as a clock-face string (e.g. "12:30") in multiple possible
+    # formats depending on the TrackMan export version — try each before giving up
+    tilt_text = tilt.astype(str).str.strip()
+    tilt_parsed = pd.to_datetime(tilt_text, format='%H:%M', errors='coerce')
+    tilt_parsed = tilt_parsed.fillna(pd.to_datetime(tilt_text, format='%H:%M:%S', errors='coerce'))
+    tilt_parsed = tilt_parsed.fillna(pd.to_datetime(tilt_text, format='%I:%M:%S %p', errors='coerce'))
+    return tilt_parsed.fillna(pd.to_datetime(tilt_text, format='%I:%M %p', errors='coerce'))
+
+# The per-pitcher report functions below take one pitcher's rows, e.g. GameFrame.pitcher(pitcher_id);
+# pitcher_id is only used for file names and error messages
+
+def build_table(pitcher_data, pitcher_id):
     try:
         try:     
-            date = source['Date'].mode()[0] if 'Date' in source.columns else ''
-            away_team = source['BatterTeam'].iloc[0] if 'BatterTeam' in source.columns else ''
-            home_team = source['PitcherTeam'].iloc[0] if 'PitcherTeam' in source.columns else ''
+            date = pitcher_data['Date'].mode()[0] if 'Date' in pitcher_data.columns else ''
+            away_team = pitcher_data['BatterTeam'].iloc[0] if 'BatterTeam' in pitcher_data.columns else ''
+            home_team = pitcher_data['PitcherTeam'].iloc[0] if 'PitcherTeam' in pitcher_data.columns else ''
         except Exception as e:
             date = ''
             away_team = ''
             home_team = ''
 
-        table = source[['Pitcher', 'PitcherId', 'TaggedPitchType', 'RelSpeed', 'InducedVertBreak', 'HorzBreak', 'SpinRate', 'VertApprAngle', 'HorzApprAngle', 'RelHeight', 'RelSide', 'Extension', 'Tilt', 'ZoneTime', 'PlateLocHeight', 'PlateLocSide', 'PitchCall']] 
-
-        pitcher_data = table[table['PitcherId'] == pitcher_id]
         pitcher = pitcher_data['Pitcher'].iloc[0]
 
-        # Dictionary to hold data for each pitch type per game
-        game_report = {'Pitch': [],
-                    'Thrown': [],
-                    'Low' : [],
-                    'Vel.': [],
-                    'High': [],
-                    'IVB': [],
-                    'HB': [],
-                    'Spin': [],
-                    'VAA': [],
-                    'HAA': [],
-                    'RelH': [],
-                    'RelS': [],
-                    'Ext.': [],
-                    'Axis': [],
-                    'Zone': [],
-                    'Chase': [],
-                    'CSW': []}
-                        
-        # Parse through each pitch type for the pitcher
-        for pitch_type in pitcher_data['TaggedPitchType'].unique():
-            pitch_type_data = pitcher_data[pitcher_data['TaggedPitchType'] == pitch_type]
-            # If type is defined
-            if (pitch_type != 'n/a'):
-                # Add the stats of the pitch type to the report 
-                game_report['Pitch'].append(pitch_type)
-                game_report['Thrown'].append(len(pitch_type_data) / len(pitcher_data) * 100)
-                game_report['Low'].append(pitch_type_data['RelSpeed'].min())
-                game_report['Vel.'].append(pitch_type_data['RelSpeed'].mean())
-                game_report['High'].append(pitch_type_data['RelSpeed'].max())
-                game_report['IVB'].append(pitch_type_data['InducedVertBreak'].mean())
-                game_report['HB'].append(pitch_type_data['HorzBreak'].mean())
-                game_report['Spin'].append(pitch_type_data['SpinRate'].mean())
-                game_report['VAA'].append(pitch_type_data['VertApprAngle'].mean())
-                game_report['HAA'].append(pitch_type_data['HorzApprAngle'].mean())
-                game_report['RelH'].append(pitch_type_data['RelHeight'].mean())
-                game_report['RelS'].append(pitch_type_data['RelSide'].mean())
-                game_report['Ext.'].append(pitch_type_data['Extension'].mean())
-
-                # Tilt is stored as a clock-face string (e.g. "12:30") in multiple possible
-                # formats depending on the TrackMan export version — try each before giving up
-                tilt_text = pitch_type_data['Tilt'].astype(str).str.strip()
-                tilt_parsed = pd.to_datetime(tilt_text, format='%H:%M', errors='coerce')
-                tilt_parsed = tilt_parsed.fillna(pd.to_datetime(tilt_text, format='%H:%M:%S', errors='coerce'))
-                tilt_parsed = tilt_parsed.fillna(pd.to_datetime(tilt_text, format='%I:%M:%S %p', errors='coerce'))
-                tilt_parsed = tilt_parsed.fillna(pd.to_datetime(tilt_text, format='%I:%M %p', errors='coerce')).dropna()
-                axis_mean = tilt_parsed.mean()
-                axis_time = axis_mean.strftime('%H:%M') if not pd.isna(axis_mean) else 'N/A'
-
-                game_report['Axis'].append(axis_time) 
-                game_report['Zone'].append(pitch_type_data['ZoneTime'].mean() * 100)
-
-                # Chase %: pitch was outside the zone AND the batter swung
-                chase_count = 0
-                for _, row in pitch_type_data.iterrows():
-                    outside = (row['PlateLocHeight'] < 1.5) or (row['PlateLocHeight'] > 3.5)
-                    outside_height = abs(row['PlateLocSide']) > 0.83
-                    batter_swung = row['PitchCall'] in ['StrikeSwinging', 'FoulBallNotFieldable', 'InPlay', 'HitByPitch']
-                    if (outside or outside_height) and batter_swung:
-                        chase_count += 1
-                        
-                game_report['Chase'].append(chase_count / len(pitch_type_data) * 100.00)
-                
-                # Calculate Whiff %
-                whiff_count = 0
-                for _, row in pitch_type_data.iterrows():
-                    swing_and_miss = row['PitchCall'] in ['StrikeSwinging', 'FoulBallNotFieldable']
-                    
-                    if swing_and_miss:
-                        whiff_count += 1
-            
-                # Calculate Called Strikes %
-                called_strike_count = 0
-                for _, row in pitch_type_data.iterrows():
-                    if (row['PitchCall'] in ['StrikeCalled']):
-                        called_strike_count += 1
-
-                # Calculate Swing and Miss %
-                swinging_strike_count = 0
-                for _, row in pitch_type_data.iterrows():
-                    if (row['PitchCall'] in ['StrikeSwinging']):
-                        swinging_strike_count += 1
-                
-                # CSW (Called Strike + Whiff) % — industry-standard pitcher effectiveness metric
-                csw_percent = (called_strike_count + swinging_strike_count) / len(pitch_type_data) * 100.00
-                game_report['CSW'].append(csw_percent)
+        # Flag every pitch once, then let a single groupby reduce the flags per pitch type
+        pitches = pitcher_data[pitcher_data['TaggedPitchType'] != 'n/a']
+        outside = (
+            (pitches['PlateLocHeight'] < 1.5) |
+            (pitches['PlateLocHeight'] > 3.5) |
+            (pitches['PlateLocSide'].abs() > 0.83)
+        )
+        pitches = pitches.assign(
+            # Chase %: pitch was outside the zone AND the batter swung
+            chase=outside & pitches['PitchCall'].isin(CHASE_SWINGS),
+            # CSW (Called Strike + Whiff) % — industry-standard pitcher effectiveness metric
+            csw=pitches['PitchCall'].isin(['StrikeCalled', 'StrikeSwinging']),
+            tilt=_parse_tilt(pitches['Tilt']),
+        )
+
+        # sort=False keeps pitch types in first-thrown order, matching the row order the
+        # report has always been built in before the sorts below
+        grouped = pitches.groupby('TaggedPitchType', sort=False)
+        counts = grouped.size()
+        means = grouped[['RelSpeed', 'InducedVertBreak', 'HorzBreak', 'SpinRate', 'VertApprAngle', 'HorzApprAngle', 'RelHeight', 'RelSide', 'Extension', 'tilt', 'ZoneTime', 'chase', 'csw']].mean()
 
-        
         # Set panda options to show all rows/columns
         pd.set_option('display.max_columns', None)
         pd.set_option('display.width', 1000)
@@ -239,8 +253,25 @@ def build_table(source, pitcher_id):
         pd.set_option('display.max_colwidth', None)
 
         # Build and map pitch abbreviations to report dataframe
-        report_df = pd.DataFrame(game_report)
-        report_df['Pitch'] = report_df['Pitch'].map(pitch_order)
+        report_df = pd.DataFrame({
+            'Pitch': counts.index.map(pitch_order),
+            'Thrown': counts / len(pitcher_data) * 100,
+            'Low': grouped['RelSpeed'].min(),
+            'Vel.': means['RelSpeed'],
+            'High': grouped['RelSpeed'].max(),
+            'IVB': means['InducedVertBreak'],
+            'HB': means['HorzBreak'],
+            'Spin': means['SpinRate'],
+            'VAA': means['VertApprAngle'],
+            'HAA': means['HorzApprAngle'],
+            'RelH': means['RelHeight'],
+            'RelS': means['RelSide'],
+            'Ext.': means['Extension'],
+            'Axis': means['tilt'].map(lambda t: t.strftime('%H:%M') if not pd.isna(t) else 'N/A'),
+            'Zone': means['ZoneTime'] * 100,
+            'Chase': means['chase'] * 100.00,
+            'CSW': means['csw'] * 100.00,
+        }).reset_index(drop=True)
         report_df['Thrown'] = report_df['Thrown'].map(lambda x: f"{x:.1f}%")
         report_df['Zone'] = report_df['Zone'].map(lambda x: f"{x:.1f}%")
         report_df['Chase'] = report_df['Chase'].map(lambda x: f"{x:.1f}%")
@@ -260,17 +291,12 @@ def build_table(source, pitcher_id):
         print(f"Error building table for pitcher ID {pitcher_id}: {e}")
         return None
 
-def pitch_heat_map_by_batter_side(source, id, output_path, pitcher_id, threshold=0.1, theme='light'):
+def pitch_heat_map_by_batter_side(pitcher_data, id, output_path, pitcher_id, threshold=0.1, themes=('light', 'dark')):
     try:
-        matplotlib.rcParams.update(_THEME_COLORS.get(theme, _THEME_COLORS['light']))
-
-        table = source[['Pitcher', 'PitcherId', 'TaggedPitchType', 'PlateLocHeight', 'PlateLocSide', 'BatterSide']]
-        pitcher_data = table[table['PitcherId'] == pitcher_id]
-
         for batter_side in ['Left', 'Right']:
             fig = None
             try:
-                fig, ax = plt.subplots(1, 1, figsize=(9, 8))
+                fig, ax = _chart_figure(HEAT_MAP_MARGINS)
                 batter_data = pitcher_data[pitcher_data['BatterSide'] == batter_side]
 
                 if len(batter_data) == 0:
@@ -290,14 +316,14 @@ def pitch_heat_map_by_batter_side(source, id, output_path, pitcher_id, threshold
                         if len(pitch_data) >= 8:
                             bw_adjust = 1.5 if len(pitch_data) < 20 else 1.0
                             point_color = pitch_point_colors.get(pitch_type, '#000000')
-                            sns.kdeplot(
-                                x=pitch_data['PlateLocSide'],
-                                y=pitch_data['PlateLocHeight'],
-                                fill=True,
-                                thresh=threshold,
-                                cmap=cmap,
+                            kde.kdeplot(
+                                ax,
+                                pitch_data['PlateLocSide'],
+                                pitch_data['PlateLocHeight'],
+                                kde.LOCATION_EXTENT,
+                                cmap,
                                 bw_adjust=bw_adjust,
-                                ax=ax,
+                                thresh=threshold,
                                 levels=10
                             )
                             avg_side = pitch_data['PlateLocSide'].mean()
@@ -333,8 +359,7 @@ def pitch_heat_map_by_batter_side(source, id, output_path, pitcher_id, threshold
                     ax.add_patch(_make_shadow_zone())
 
                 side_label = batter_side.lower()
-                fig.subplots_adjust(left=0.1, right=0.96, top=0.88, bottom=0.1)
-                fig.savefig(os.path.join(output_path, f'{id}_pitcher_{pitcher_id}_heat_map_{side_label}_{theme}.png'), pad_inches=0.3, dpi=300, bbox_inches='tight', transparent=True)
+                _save_themes(fig, os.path.join(output_path, f'{id}_pitcher_{pitcher_id}_heat_map_{side_label}'), themes)
 
             except Exception as e:
                 print(f"Error generating heat map ({batter_side}) for pitcher ID {pitcher_id}: {e}")
@@ -345,23 +370,24 @@ def pitch_heat_map_by_batter_side(source, id, output_path, pitcher_id, threshold
     except Exception as e:
         print(f"Error generating heat maps for pitcher ID {pitcher_id}: {e}")
 
-def pitch_break_map(source, id, output_path, pitcher_id, threshold=0.1, theme='light'):
+def pitcher_arm_angle(pitcher_data):
+    # Direction of the pitcher's average movement vector, in degrees
+    if len(pitcher_data) == 0:
+        return None
+    return np.degrees(np.arctan2(pitcher_data['InducedVertBreak'].mean(), pitcher_data['HorzBreak'].mean()))
+
+def pitch_break_map(pitcher_data, id, output_path, pitcher_id, threshold=0.1, themes=('light', 'dark')):
     fig = None
     arm_angle = None
     try:
-        matplotlib.rcParams.update(_THEME_COLORS.get(theme, _THEME_COLORS['light']))
-
-        table = source[['Pitcher', 'PitcherId', 'TaggedPitchType', 'InducedVertBreak', 'HorzBreak']]
-        pitcher_data = table[table['PitcherId'] == pitcher_id]
-
-        fig, ax = plt.subplots(figsize=(9, 8))
+        fig, ax = _chart_figure(BREAK_MAP_MARGINS)
 
         if len(pitcher_data) == 0:
             ax.text(0, 2.5, f'No data for pitcher ID {pitcher_id}',
                 ha='center', va='center', fontsize=14)
             ax.set_xlim(-2.5, 2.5)
             ax.set_ylim(0, 5)
-            fig.savefig(os.path.join(output_path, f'{id}_pitcher_{pitcher_id}_break_map_{theme}.png'), pad_inches=0.3, dpi=300, bbox_inches='tight', transparent=True)
+            _save_themes(fig, os.path.join(output_path, f'{id}_pitcher_{pitcher_id}_break_map'), themes)
             return
         
         # Get unique pitch types for this pitcher
@@ -380,14 +406,14 @@ def pitch_break_map(source, id, output_path, pitcher_id, threshold=0.1, theme='l
                 bw_adjust = 1.5 if len(pitch_data) < 20 else 1.0
                 
                 point_color = pitch_point_colors.get(pitch_type, '#000000')
-                sns.kdeplot(
-                    x=pitch_data['HorzBreak'],
-                    y=pitch_data['InducedVertBreak'],
-                    fill=True,
-                    thresh=threshold,       
-                    cmap=cmap,
+                kde.kdeplot(
+                    ax,
+                    pitch_data['HorzBreak'],
+                    pitch_data['InducedVertBreak'],
+                    kde.BREAK_EXTENT,
+                    cmap,
                     bw_adjust=bw_adjust,
-                    ax=ax,
+                    thresh=threshold,
                     levels=10
                 )
 
@@ -421,7 +447,7 @@ def pitch_break_map(source, id, output_path, pitcher_id, threshold=0.1, theme='l
             ax.quiver(0, 0, pitch_data['HorzBreak'].mean(), pitch_data['InducedVertBreak'].mean(), angles='xy', scale_units='xy', scale=1, color=pitch_point_colors.get(pitch_type, 'gray'), width=0.005)
 
         # Plot overall average movement vector for the pitcher
-        arm_angle = np.degrees(np.arctan2(pitcher_data['InducedVertBreak'].mean(), pitcher_data['HorzBreak'].mean()))
+        arm_angle = pitcher_arm_angle(pitcher_data)
         ax.quiver(0, 0, pitcher_data['HorzBreak'].mean(), pitcher_data['InducedVertBreak'].mean(), angles='xy', scale_units='xy', scale=1, color='gray', width=0.01)
 
         # Set plot properties
@@ -436,8 +462,7 @@ def pitch_break_map(source, id, output_path, pitcher_id, threshold=0.1, theme='l
         by_label = dict(zip(labels, handles))
         ax.legend(by_label.values(), by_label.keys(), loc='lower right', fontsize=18)
         
-        fig.subplots_adjust(left=0.06, right=0.96, top=0.88, bottom=0.1, wspace=0.2)
-        fig.savefig(os.path.join(output_path, f'{id}_pitcher_{pitcher_id}_break_map_{theme}.png'), pad_inches=0.3, dpi=300, bbox_inches='tight', transparent=True)
+        _save_themes(fig, os.path.join(output_path, f'{id}_pitcher_{pitcher_id}_break_map'), themes)
 
     except Exception as e:
         print(f"Error reading file for pitcher ID {pitcher_id}: {e}")
@@ -446,52 +471,49 @@ def pitch_break_map(source, id, output_path, pitcher_id, threshold=0.1, theme='l
             plt.close(fig)
     return arm_angle
 
-def usage_table(source, pitcher_id):
+def usage_table(pitcher_data, pitcher_id):
     try:
-        table = source[['Pitcher', 'PitcherId', 'TaggedPitchType', 'PitchCall', 'BatterId', 'Inning', 'PAofInning', 'PitchofPA', 'BatterSide', 'Balls', 'Strikes']] 
-        pitcher_data = table[table['PitcherId'] == pitcher_id]
+        # Evaluate each count-state mask once for the whole outing, then reduce both
+        # batter sides and every pitch type from the same flags in one grouped pass
+        flags = pd.DataFrame({
+            'BatterSide': pitcher_data['BatterSide'],
+            'TaggedPitchType': pitcher_data['TaggedPitchType'],
+            'Count': 1,
+            'Strike': pitcher_data['PitchCall'].isin(STRIKES),
+            '0-0': pitcher_data['PitchofPA'] == 1,
+            "Hitter's": pitcher_data['Balls'] > pitcher_data['Strikes'],
+            "Pitcher's": pitcher_data['Strikes'] > pitcher_data['Balls'],
+            '2k': pitcher_data['Strikes'] == 2,
+            'Whiff': pitcher_data['PitchCall'].isin(WHIFFS),
+        })
+        # sort=False keeps pitch types in first-thrown order within each side
+        counts = flags.groupby(['BatterSide', 'TaggedPitchType'], sort=False).sum()
+        side_totals = flags.drop(columns='TaggedPitchType').groupby('BatterSide').sum().reindex(['Left', 'Right'], fill_value=0)
 
         tables = []
 
         for batter_side in ['Left', 'Right']:
-            side_data = pitcher_data[pitcher_data['BatterSide'] == batter_side]
-            # Dictionary to hold data for each pitch type per game
-            game_report = {'Pitch': [],
-                            'Count': [],
-                            'Strike': [],
-                            '0-0': [],
-                            "Hitter's" : [],
-                            "Pitcher's": [],
-                            '2k': [],
-                            'Whiff': []}
-
-            total_first_pitch_count = side_data[side_data['PitchofPA'] == 1].shape[0]
-            total_hitter_favorable_count = (side_data['Balls'] > side_data['Strikes']).sum()
-            total_pitcher_favorable_count = (side_data['Strikes'] > side_data['Balls']).sum()
-            total_two_strike_count = (side_data['Strikes'] == 2).sum()
-
-            for pitch_type in side_data['TaggedPitchType'].unique():
-                pitch_type_data = side_data[side_data['TaggedPitchType'] == pitch_type]
-
-                strike_count = pitch_type_data['PitchCall'].isin(STRIKES).sum()
-                first_pitch_count = pitch_type_data[pitch_type_data['PitchofPA'] == 1].shape[0]
-                hitter_favorable_count = (pitch_type_data['Balls'] > pitch_type_data['Strikes']).sum()
-                pitcher_favorable_count = (pitch_type_data['Strikes'] > pitch_type_data['Balls']).sum()
-                two_strike_count = (pitch_type_data['Strikes'] == 2).sum()
-                whiff_count = pitch_type_data[pitch_type_data['PitchCall'].isin(['StrikeSwinging', 'FoulBallNotFieldable'])].shape[0]
-
-                # Add the stats of the pitch type to the report 
-                game_report['Pitch'].append(pitch_type)
-                game_report['Strike'].append(strike_count / len(pitch_type_data) * 100)
-                game_report['Count'].append(len(pitch_type_data))
-                game_report['0-0'].append(first_pitch_count / total_first_pitch_count * 100 if total_first_pitch_count else 0)
-                game_report["Hitter's"].append(hitter_favorable_count / total_hitter_favorable_count * 100 if total_hitter_favorable_count else 0)
-                game_report["Pitcher's"].append(pitcher_favorable_count / total_pitcher_favorable_count * 100 if total_pitcher_favorable_count else 0)
-                game_report['2k'].append(two_strike_count / total_two_strike_count * 100 if total_two_strike_count else 0)
-                game_report['Whiff'].append(whiff_count / len(pitch_type_data) * 100)
-    
-            report = pd.DataFrame(game_report)
-            report['Pitch'] = report['Pitch'].map(pitch_order)
+            side_counts = counts[counts.index.get_level_values('BatterSide') == batter_side].droplevel('BatterSide')
+            totals = side_totals.loc[batter_side]
+
+            def share(column):
+                # Share of the side's pitches in a given count state thrown with each pitch type
+                return side_counts[column] / totals[column] * 100 if totals[column] else 0
+
+            # Build the report from the per-pitch-type counts
+            report = pd.DataFrame({
+                'Pitch': side_counts.index.map(pitch_order),
+                'Count': side_counts['Count'],
+                'Strike': side_counts['Strike'] / side_counts['Count'] * 100,
+                '0-0': share('0-0'),
+                "Hitter's": share("Hitter's"),
+                "Pitcher's": share("Pitcher's"),
+                '2k': share('2k'),
+                'Whiff': side_counts['Whiff'] / side_counts['Count'] * 100,
+            }).reset_index(drop=True)
+            if report.empty:
+                # No pitches to this side: float columns, as a table built from empty lists has
+                report = report.astype({column: float for column in report.columns if column != 'Pitch'})
             report['Strike'] = report['Strike'].map(lambda x: f"{x:.1f}%")
             report['0-0'] = report['0-0'].map(lambda x: f"{x:.1f}%")
             report["Hitter's"] = report["Hitter's"].map(lambda x: f"{x:.1f}%")
@@ -583,7 +605,9 @@ def strikeout_map(source, id, output_path, pitcher_id):
 '''
 
 if __name__ == "__main__":
+    from app.services.game_frame import GameFrame
+
     input_file = "C:\\Users\\thoma\\Downloads\\20260221-WinthropUniversity-1_unverified.csv"
-    source_df = pd.read_csv(input_file)
+    game = GameFrame(pd.read_csv(input_file))
 
-    print(usage_table(source_df, 10106264))
\ No newline at end of file
+    print(usage_table(game.pitcher(10106264), 10106264))
\ No newline at end of file
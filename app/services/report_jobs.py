@@ -0,0 +1,495 @@
+import os
+import glob
+import uuid
+import shutil
+import tempfile
+import threading
+import traceback
+from datetime import datetime
+
+import pandas as pd
+from flask import current_app
+
+from app.db.models import db, Report_Job, User
+from app.services import report, pitcher_pipeline, lazy_charts, ingest, season, batch, file_validator
+from app.services.branding_loader import BrandingLoader
+from app.services.game_frame import GameFrame
+from app.services.game_archive import GameArchive
+from app.services.render_cache import RenderCache
+from app.services.report_lab_generator import merge_pdfs
+
+# A job interrupted this many times (worker restarted mid-run) is failed instead of retried
+MAX_ATTEMPTS = 2
+
+# Seconds an idle worker waits before checking the queue again
+POLL_INTERVAL = 2.0
+
+_wakeup = threading.Event()
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def enqueue(user, filepath, target, kind='game'):
+    """
+    Queue a validated upload for report generation.
+
+    Args:
+        user: The uploading user
+        filepath: Path of the upload's ingest record, of the uploaded CSV for a season,
+            or of the batch manifest
+        target: 'own' or 'opponent'
+        kind: 'game', 'season' for a multi-game export reported game by game, or 'batch'
+            for several game files reported together
+
+    Returns:
+        The new Report_Job
+    """
+    # Earlier queued uploads from this user are replaced by this one (their file has been removed)
+    Report_Job.query.filter_by(user_id=user.id, status='queued').update(
+        {'status': 'failed', 'error': 'Replaced by a newer upload.', 'finished_at': datetime.now()})
+
+    job = Report_Job(id=uuid.uuid4().hex, user_id=user.id, school_id=user.school_id, target=target, kind=kind, filepath=filepath, progress={'reports': [], 'errors': []})
+    db.session.add(job)
+    db.session.commit()
+
+    _wakeup.set()
+    return job
+
+
+def job_status(job, since=0):
+    """JSON view of a job; reports are the per-pitcher entries finished so far, from index `since` on."""
+    progress = job.progress or {}
+    return {
+        'id': job.id,
+        'status': job.status,
+        'kind': job.kind,
+        'total': job.total,
+        'completed': job.completed,
+        'reports': progress.get('reports', [])[since:],
+        'errors': progress.get('errors', []),
+        'result': job.result if job.status == 'done' else None,
+        'error': job.error,
+    }
+
+
+def ensure_worker_thread(app):
+    """Start the in-process worker thread if this app runs jobs in-process and it is not running yet."""
+    global _thread
+    if app.config.get('REPORT_JOB_RUNNER', 'thread') != 'thread':
+        return
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=run_worker, args=(app,), name='report-jobs', daemon=True)
+            _thread.start()
+
+
+def run_worker(app, once=False):
+    """
+    Process queued jobs one at a time, oldest first.
+
+    Args:
+        app: Flask app providing the database and storage configuration
+        once: Return when the queue is empty instead of waiting for more jobs
+    """
+    with app.app_context():
+        _recover_interrupted()
+
+    while True:
+        with app.app_context():
+            job_id = _claim_next()
+            if job_id is not None:
+                run_job(job_id)
+            db.session.remove()
+
+        if job_id is None:
+            if once:
+                return
+            _wakeup.wait(POLL_INTERVAL)
+            _wakeup.clear()
+
+
+def run_job(job_id):
+    job = db.session.get(Report_Job, job_id)
+    try:
+        job.result = _generate_reports(job, db.session.get(User, job.user_id))
+        job.status = 'done'
+    except Exception as e:
+        print(f"\n!!! ERROR: {e}")
+        traceback.print_exc()
+        db.session.rollback()
+        job = db.session.get(Report_Job, job_id)
+        job.status = 'failed'
+        job.error = f'Failed to process file: {str(e)}'
+    job.finished_at = datetime.now()
+    db.session.commit()
+
+
+def _recover_interrupted():
+    # Jobs still marked running were cut off by a restart; retry them unless they keep failing
+    for job in Report_Job.query.filter_by(status='running').all():
+        if job.attempts < MAX_ATTEMPTS:
+            job.status = 'queued'
+        else:
+            job.status = 'failed'
+            job.error = 'Report generation was interrupted. Please upload the file again.'
+            job.finished_at = datetime.now()
+    db.session.commit()
+
+
+def _claim_next():
+    # The conditional update makes the claim atomic if more than one worker polls the same table
+    while True:
+        job = Report_Job.query.filter_by(status='queued').order_by(Report_Job.created_at).first()
+        if job is None:
+            return None
+        claimed = Report_Job.query.filter_by(id=job.id, status='queued').update(
+            {'status': 'running', 'started_at': datetime.now(), 'attempts': Report_Job.attempts + 1})
+        db.session.commit()
+        if claimed:
+            return job.id
+
+
+def _school_directories(school_slug):
+    storage = current_app.config['STORAGE']
+    school_temp_dir = os.path.join(storage, 'schools', school_slug, 'temp')
+    school_output_dir = os.path.join(storage, 'schools', school_slug, 'reports')
+    os.makedirs(school_temp_dir, exist_ok=True)
+    os.makedirs(school_output_dir, exist_ok=True)
+    return school_temp_dir, school_output_dir
+
+
+def _render_cache(school_slug):
+    # Shared by every user of the school, so a file re-uploaded by anyone there is a hit
+    max_mb = current_app.config.get('REPORT_CACHE_MAX_MB', 0)
+    if max_mb <= 0:
+        return None
+    return RenderCache(os.path.join(current_app.config['STORAGE'], 'schools', school_slug, 'cache'), max_mb * 1024 * 1024)
+
+
+def _generate_reports(job, user):
+    if job.kind == 'season':
+        return _generate_season_reports(job, user)
+    if job.kind == 'batch':
+        return _generate_batch_reports(job, user)
+
+    school_temp_folder, school_output_folder = _school_directories(user.school.slug)
+
+    # The upload request already parsed, validated and archived the file; the job starts from that frame
+    source_df = GameArchive.for_school(user.school.slug).load(ingest.load_upload_record(job.filepath)[0])
+
+    _remove_previous_output(user, school_temp_folder, school_output_folder)
+    branding, roster, roster_path, themes = _report_settings(user)
+
+    # Partition the game by pitcher once; every report function works on a per-pitcher view
+    game = GameFrame(source_df)
+    pitcher_ids = game.pitcher_ids(user.school.trackman_id, opponent=(job.target == 'opponent'))
+    if not pitcher_ids:
+        raise ValueError('No pitching data found in this file.')
+
+    job.total = len(pitcher_ids)
+    db.session.commit()
+
+    errors = []
+    image_bytes = {'web': 0, 'print': 0, 'saved': 0}
+
+    # Pitchers are processed one after another, or fanned out to REPORT_WORKERS processes;
+    # results always come back in pitcher order
+    lazy = current_app.config.get('REPORT_LAZY_CHARTS', False)
+    pipeline_job = pitcher_pipeline.report_job(user, school_temp_folder, school_output_folder, branding, themes, game, lazy=lazy)
+    if lazy:
+        # Written before any pitcher finishes, since the page requests charts as reports arrive
+        lazy_charts.save_manifest(pipeline_job, game, pitcher_ids)
+
+    cache = _render_cache(user.school.slug)
+    (reports,), (pdf_paths,), roster = _report_games(job, [(game, pitcher_ids, pipeline_job)], cache, roster, errors, image_bytes)
+
+    # Persist any new roster entries discovered during this upload
+    if not roster.empty:
+        roster.to_csv(roster_path, index=False)
+
+    # In lazy mode the merged PDF is built when it is first downloaded
+    if not lazy:
+        merged_pdf_path = os.path.join(school_output_folder, f'{user.id}_merged_pitcher_reports.pdf')
+        merge_pdfs(user.id, school_output_folder, merged_pdf_path, pdf_paths=pdf_paths)
+
+    return {
+        'message': 'File processed successfully',
+        'num_reports': len(reports),
+        'reports': reports,
+        'merged_pdf_url': f'/storage/schools/{user.school.slug}/reports/{user.id}_merged_pitcher_reports.pdf',
+        'game_data': {'date': game.date, 'home_team': game.home_team, 'away_team': game.away_team},
+        # 'saved' is what the browser downloads less for the light charts than if it were served the print copies
+        'image_bytes': image_bytes,
+        'cache': _finish_cache(cache, user.school.slug),
+        'errors': errors,
+        'user': {'name': f"{user.first_name} {user.last_name}", 'school': user.school.name}
+    }
+
+
+def _generate_season_reports(job, user):
+    """
+    Report every game of a multi-game export, one game at a time.
+
+    The file is split into per-game partitions in a single chunked pass; each game is then
+    loaded, validated, archived and reported on its own, so memory is bounded by one game
+    rather than the whole file. Charts are always rendered eagerly here, since lazy mode
+    keeps the frame of the upload in a manifest.
+    """
+    school_temp_folder, school_output_folder = _school_directories(user.school.slug)
+    _remove_previous_output(user, school_temp_folder, school_output_folder)
+    branding, roster, roster_path, themes = _report_settings(user)
+
+    opponent = job.target == 'opponent'
+    archive = GameArchive.for_school(user.school.slug)
+    cache = _render_cache(user.school.slug)
+    required = list(report.required_columns)
+
+    reports = []
+    errors = []
+    image_bytes = {'web': 0, 'print': 0, 'saved': 0}
+    games = []
+
+    with tempfile.TemporaryDirectory(dir=school_temp_folder) as partitions:
+        partitioned = season.partition_games(job.filepath, partitions)
+        job.total = sum(1 for game in partitioned for team in game['pitchers'].values()
+            if (team == user.school.trackman_id) != opponent)
+        db.session.commit()
+
+        for number, partition in enumerate(partitioned):
+            label = season.game_label(partition)
+            if 'error' in partition:
+                is_valid, msg = False, partition['error']
+            else:
+                frame = season.load_game(partition)
+                column_types = {column: kind for column, kind in ingest.COLUMN_TYPES.items() if column in frame.columns}
+                is_valid, msg = file_validator.validate_parsed_file(frame, required, column_types)
+            if not is_valid:
+                # A bad game is skipped; the rest of the season is still reported
+                errors.append(f'{label}: {msg} (rows are counted within the game)')
+                job.completed += sum(1 for team in partition['pitchers'].values() if (team == user.school.trackman_id) != opponent)
+                job.progress = {'reports': list(reports), 'errors': list(errors)}
+                db.session.commit()
+                continue
+
+            content_hash = season.content_hash(frame)
+            archive.store(frame, content_hash, filename=os.path.basename(job.filepath), uploaded_by=user.id, game=partition['key'])
+            archive.mark_reported(content_hash, job.target)
+
+            game = GameFrame(frame)
+            pitcher_ids = game.pitcher_ids(user.school.trackman_id, opponent=opponent)
+            subfolder = f'{user.id}_games/{number:04d}'
+            pipeline_job = pitcher_pipeline.report_job(user, school_temp_folder, school_output_folder, branding, themes, game, subfolder=subfolder)
+
+            (game_reports,), (pdf_paths,), roster = _report_games(
+                job, [(game, pitcher_ids, pipeline_job)], cache, roster, errors, image_bytes, labels=[label], publish=False)
+            reports.extend(game_reports)
+            games.append(_finish_game(user, pipeline_job, game, game_reports, pdf_paths, label=label, content_hash=content_hash))
+
+            # Progress is published per game; a season has too many reports to rewrite it per pitcher
+            job.progress = {'reports': list(reports), 'errors': list(errors)}
+            db.session.commit()
+            del frame, game
+
+    if not games:
+        raise ValueError('No games in this file could be processed.')
+
+    # Save-game stores every archived game of the season
+    ingest.save_upload_record(ingest.upload_record_path(school_temp_folder, user.id), *[game['content_hash'] for game in games])
+    os.remove(job.filepath)
+
+    if not roster.empty:
+        roster.to_csv(roster_path, index=False)
+
+    return {
+        'message': f'Processed {len(games)} game(s)',
+        'num_reports': len(reports),
+        'reports': reports,
+        'games': games,
+        'merged_pdf_url': None,
+        'game_data': _date_range('Season', games),
+        'image_bytes': image_bytes,
+        'cache': _finish_cache(cache, user.school.slug),
+        'errors': errors,
+        'user': {'name': f"{user.first_name} {user.last_name}", 'school': user.school.name}
+    }
+
+
+def _generate_batch_reports(job, user):
+    """
+    Report the new games of a batch upload together.
+
+    The request already validated and archived every new file and marked repeats; here the
+    pitchers of all new games share one worker budget, and each game gets its own folder
+    and merged PDF.
+    """
+    school_temp_folder, school_output_folder = _school_directories(user.school.slug)
+    _remove_previous_output(user, school_temp_folder, school_output_folder)
+    branding, roster, roster_path, themes = _report_settings(user)
+
+    entries = batch.load_manifest(job.filepath)
+    archive = GameArchive.for_school(user.school.slug)
+    opponent = job.target == 'opponent'
+
+    new, games = [], []
+    for entry in entries:
+        if entry['status'] != 'new':
+            continue
+        game = GameFrame(archive.load(entry['content_hash']))
+        pitcher_ids = game.pitcher_ids(user.school.trackman_id, opponent=opponent)
+        subfolder = f'{user.id}_games/{len(games):04d}'
+        new.append(entry)
+        games.append((game, pitcher_ids, pitcher_pipeline.report_job(user, school_temp_folder, school_output_folder, branding, themes, game, subfolder=subfolder)))
+
+    job.total = sum(len(pitcher_ids) for _, pitcher_ids, _ in games)
+    db.session.commit()
+
+    errors = []
+    image_bytes = {'web': 0, 'print': 0, 'saved': 0}
+    cache = _render_cache(user.school.slug)
+    labels = [f"{game.away_team} @ {game.home_team} ({game.raw_date})" for game, _, _ in games]
+    reports, pdf_paths, roster = _report_games(job, games, cache, roster, errors, image_bytes, labels=labels)
+
+    for entry, (game, _, pipeline_job), game_reports, game_pdf_paths, label in zip(new, games, reports, pdf_paths, labels):
+        entry.update(_finish_game(user, pipeline_job, game, game_reports, game_pdf_paths, label=label))
+    for entry in entries:
+        entry.setdefault('num_reports', 0)
+        entry.setdefault('merged_pdf_url', None)
+
+    if not roster.empty:
+        roster.to_csv(roster_path, index=False)
+
+    skipped = len(entries) - len(new)
+    return {
+        'message': f'Processed {len(new)} new game(s)' + (f', skipped {skipped} file(s)' if skipped else ''),
+        'num_reports': sum(len(game_reports) for game_reports in reports),
+        'reports': [entry for game_reports in reports for entry in game_reports],
+        'games': entries,
+        'merged_pdf_url': None,
+        'game_data': _date_range('Batch', entries),
+        'image_bytes': image_bytes,
+        'cache': _finish_cache(cache, user.school.slug),
+        'errors': errors,
+        'user': {'name': f"{user.first_name} {user.last_name}", 'school': user.school.name}
+    }
+
+
+def _remove_previous_output(user, school_temp_folder, school_output_folder):
+    # Remove stale images and PDFs from the previous session before generating new ones; the old
+    # render manifest goes first so a lazy chart request cannot recreate them in the meantime
+    lazy_charts.remove_manifest(school_temp_folder, user.id)
+    old_images = glob.glob(os.path.join(school_temp_folder, f'{user.id}_*.png'))
+    old_images += glob.glob(os.path.join(school_temp_folder, f'{user.id}_*.{report.WEB_FORMAT}'))
+    old_images += glob.glob(os.path.join(school_temp_folder, f'{user.id}_*.{report.PRINT_FORMAT}'))
+    for old_image in old_images:
+        try:
+            os.remove(old_image)
+        except Exception as e:
+            print(f"Error deleting old image: {old_image} - {e}")
+
+    for old_pdf in glob.glob(os.path.join(school_output_folder, f'{user.id}_*.pdf')):
+        try:
+            os.remove(old_pdf)
+        except Exception:
+            pass
+
+    # Per-game output of a previous season upload
+    for folder in (school_temp_folder, school_output_folder):
+        shutil.rmtree(os.path.join(folder, f'{user.id}_games'), ignore_errors=True)
+
+
+def _report_settings(user):
+    branding = BrandingLoader.get_branding(user.school.slug)
+
+    roster_path = os.path.join(current_app.config['STORAGE'], 'schools', user.school.slug, 'assets', 'roster.csv')
+    roster = pd.read_csv(roster_path) if os.path.exists(roster_path) else pd.DataFrame()
+
+    themes = ['light'] + [theme for theme in current_app.config.get('REPORT_THEMES', ['light', 'dark']) if theme != 'light']
+    return branding, roster, roster_path, themes
+
+
+def _report_games(job, games, cache, roster, errors, image_bytes, labels=None, publish=True):
+    """
+    Report the pitchers of one or more games through the shared worker budget.
+
+    Args:
+        job: The Report_Job, whose progress is updated as pitchers finish
+        games: (GameFrame, pitcher_ids, pipeline job) per game
+        cache: Optional RenderCache
+        roster: School roster; pitchers missing from it are added
+        errors: Error messages, appended to
+        image_bytes: Chart byte counts, added to
+        labels: Optional label per game, stored as each report entry's 'game'
+        publish: Publish the report entries after every pitcher
+
+    Returns:
+        (reports, pdf_paths, roster) with a list of report entries and of PDF paths per game
+    """
+    reports = [[] for _ in games]
+    pdf_paths = [[] for _ in games]
+    finished = []
+    workers = current_app.config.get('REPORT_WORKERS', 0)
+    for index, pitcher_id, result in pitcher_pipeline.process_games(games, workers=workers, cache=cache):
+        game = games[index][0]
+        # Auto-add pitchers found in the game file but missing from the roster
+        if not roster.empty and pitcher_id not in roster['Trackman ID'].values and job.target != 'opponent':
+            try:
+                last_name, first_name = game.pitcher_name(pitcher_id).split(', ', 1)
+                roster = pd.concat([roster, pd.DataFrame([{'Trackman ID': pitcher_id, 'First Name': first_name, 'Last Name': last_name}])], ignore_index=True)
+            except Exception as e:
+                # A name that is not "Last, First" only keeps this pitcher off the roster
+                print(f"Error adding pitcher ID {pitcher_id} to the roster: {e}")
+                errors.append(f"Error adding pitcher {pitcher_id} to the roster: {str(e)}")
+
+        if isinstance(result, Exception):
+            print(f"Error processing pitcher ID {pitcher_id}: {result}")
+            errors.append(f"Error processing pitcher {pitcher_id}: {str(result)}")
+        else:
+            if labels:
+                result['report']['game'] = labels[index]
+            reports[index].append(result['report'])
+            finished.append(result['report'])
+            pdf_paths[index].append(result['pdf_path'])
+            for key, size in result['image_bytes'].items():
+                image_bytes[key] += size
+
+        job.completed += 1
+        if publish:
+            # Publish progress after every pitcher so the status endpoint can show partial results
+            job.progress = {'reports': list(finished), 'errors': list(errors)}
+        db.session.commit()
+    return reports, pdf_paths, roster
+
+
+def _finish_game(user, pipeline_job, game, reports, pdf_paths, **entry):
+    # Merges the PDFs of one game reported into its own subfolder and describes it for the result
+    merged_pdf_url = None
+    if pdf_paths:
+        merge_pdfs(user.id, pipeline_job['output_folder'], os.path.join(pipeline_job['output_folder'], f'{user.id}_merged_pitcher_reports.pdf'), pdf_paths=pdf_paths)
+        merged_pdf_url = f"/storage/schools/{user.school.slug}/reports/{pipeline_job['subfolder']}/{user.id}_merged_pitcher_reports.pdf"
+    return {
+        **entry,
+        'date': game.date,
+        'raw_date': str(game.raw_date),
+        'home_team': game.home_team,
+        'away_team': game.away_team,
+        'num_reports': len(reports),
+        'merged_pdf_url': merged_pdf_url,
+    }
+
+
+def _date_range(title, games):
+    dated = [game for game in games if game.get('raw_date')]
+    if not dated:
+        return {'title': title, 'date': '', 'home_team': '', 'away_team': ''}
+    first, last = min(dated, key=lambda game: game['raw_date']), max(dated, key=lambda game: game['raw_date'])
+    date = f"{first['date']} – {last['date']}" if first['raw_date'] != last['raw_date'] else first['date']
+    return {'title': title, 'date': date, 'home_team': '', 'away_team': ''}
+
+
+def _finish_cache(cache, school_slug):
+    if cache is None:
+        return None
+    cache.evict()
+    cache.record()
+    print(f"Render cache for {school_slug}: {cache.hits} hits, {cache.misses} misses, {cache.evictions} evicted")
+    return {'hits': cache.hits, 'misses': cache.misses}
@@ -14,6 +14,8 @@ from reportlab.platypus import (
     Image, Frame, PageTemplate, BaseDocTemplate, KeepInFrame
 )
 
+from svglib.svglib import svg2rlg
+
 from .branding_loader import BrandingLoader
 
 STORAGE_SCHOOLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage', 'schools')
@@ -377,11 +379,16 @@ class PDF_Generator:
         
         try:
             elements.append(Paragraph(title, self.styles["section_header"]))
-            
+
+            # Charts saved as SVG are converted to ReportLab vector drawings; anything else is embedded as a raster
+            drawing = svg2rlg(image_path) if image_path.endswith('.svg') else None
+            if drawing is not None:
+                aspect_ratio = drawing.height / drawing.width
+            else:
+                img = PILImage.open(image_path)
+                aspect_ratio = img.height / img.width
+
             # Calculate height to maintain aspect ratio
-            from PIL import Image as PILImage
-            img = PILImage.open(image_path)
-            aspect_ratio = img.height / img.width
             img_w = max_width_pts
             img_h = img_w * aspect_ratio
             
@@ -391,7 +398,13 @@ class PDF_Generator:
                 img_w = img_h / aspect_ratio
 
             # Add image
-            img_element = Image(image_path, width=img_w, height=img_h)
+            if drawing is not None:
+                drawing.scale(img_w / drawing.width, img_h / drawing.height)
+                drawing.width, drawing.height = img_w, img_h
+                drawing.hAlign = 'CENTER'
+                img_element = drawing
+            else:
+                img_element = Image(image_path, width=img_w, height=img_h)
             elements.append(img_element)
             elements.append(Spacer(1, 0.05 * inch))
             
@@ -717,20 +730,22 @@ def image_to_base64(img):
     b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
     return f"data:image/png;base64,{b64}"
 
-def merge_pdfs(id, pdf_folder, output_path):
+def merge_pdfs(id, pdf_folder, output_path, pdf_paths=None):
     """
     Merge multiple PDFs into one
+
+    pdf_paths fixes the page order; without it every {id}_pitcher_*.pdf in pdf_folder is merged in name order
     """
     from PyPDF2 import PdfMerger
     
     merger = PdfMerger()
-    
-    for pdf in sorted(os.listdir(pdf_folder)):
-        if pdf == os.path.basename(output_path):
-            continue
 
-        pdf_path = os.path.join(pdf_folder, pdf)
-        if os.path.exists(pdf_path) and pdf_path.endswith('.pdf') and pdf.startswith(f"{id}_pitcher_"):
+    if pdf_paths is None:
+        pdf_paths = [os.path.join(pdf_folder, pdf) for pdf in sorted(os.listdir(pdf_folder))
+            if pdf != os.path.basename(output_path) and pdf.endswith('.pdf') and pdf.startswith(f"{id}_pitcher_")]
+
+    for pdf_path in pdf_paths:
+        if os.path.exists(pdf_path):
             merger.append(pdf_path)
     
     merger.write(output_path)
@@ -0,0 +1,134 @@
+import os
+import glob
+import shutil
+import hashlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services import ingest
+from app.services.file_validator import MAX_ROWS
+
+# Season and series exports span many games, so they get their own limits; each game in them
+# is still held to the single-game MAX_ROWS
+MAX_SEASON_FILE_SIZE = 1024 * 1024 * 1024
+MAX_SEASON_ROWS = 1000000
+
+# Rows read per step while partitioning; with one game at a time afterwards, this bounds memory
+CHUNK_ROWS = 50000
+
+# Decimal places numbers are rounded to before content_hash hashes a game
+HASH_DECIMALS = 4
+
+# TrackMan's per-game identifier; files without it are split by date and teams instead
+GAME_ID_COLUMN = 'GameID'
+GAME_KEY_COLUMNS = ('Date', 'HomeTeam', 'AwayTeam')
+
+
+def partition_games(filepath, folder):
+    """
+    Split a multi-game CSV export into one Parquet partition per game, reading it in chunks.
+
+    Every column is kept as text so each chunk has the same schema; the values are typed
+    when a game is loaded and validated. Rows keep their file order within a game.
+
+    Args:
+        filepath: The uploaded CSV
+        folder: Directory the partitions are written to (one subdirectory per game)
+
+    Returns:
+        Games in the order they first appear, as dicts with 'key', 'path', 'rows',
+        'date', 'home_team', 'away_team' and 'pitchers' ({pitcher ID: pitcher team}).
+        A game with more than MAX_ROWS rows also has an 'error' and no partition
+
+    Raises:
+        UploadRejected: the file has more than MAX_SEASON_ROWS rows
+    """
+    header = ingest.read_header(filepath)
+    columns = [column for column in header if column in ingest.COLUMN_TYPES or column == GAME_ID_COLUMN]
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    by_game_id = GAME_ID_COLUMN in columns
+    key_columns = [GAME_ID_COLUMN] if by_game_id else [column for column in GAME_KEY_COLUMNS if column in columns]
+
+    games, rows = {}, 0
+    with pd.read_csv(filepath, usecols=columns, dtype=str, chunksize=CHUNK_ROWS) as reader:
+        for number, chunk in enumerate(reader):
+            rows += len(chunk)
+            if rows > MAX_SEASON_ROWS:
+                raise ingest.UploadRejected('File has too many rows: more than {}. Max allowed is {}'.format(MAX_SEASON_ROWS, MAX_SEASON_ROWS))
+
+            for values, game_rows in chunk.groupby(key_columns, sort=False, dropna=False):
+                key = '_'.join('' if pd.isna(value) else str(value) for value in values)
+                game = games.get(key)
+                if game is None:
+                    first = game_rows.iloc[0]
+                    game = games[key] = {
+                        'key': key,
+                        'path': os.path.join(folder, f'game_{len(games):04d}'),
+                        'rows': 0,
+                        'date': _text(first.get('Date')),
+                        'home_team': _text(first.get('HomeTeam')),
+                        'away_team': _text(first.get('AwayTeam')),
+                        'pitchers': {},
+                    }
+                    os.makedirs(game['path'])
+
+                if 'PitcherId' in game_rows.columns and 'PitcherTeam' in game_rows.columns:
+                    for pitcher_id, team in game_rows[['PitcherId', 'PitcherTeam']].dropna(subset=['PitcherId']).drop_duplicates('PitcherId').itertuples(index=False):
+                        game['pitchers'].setdefault(pitcher_id, team)
+
+                # An oversized game is dropped on its own; the rest of the season is still partitioned
+                game['rows'] += len(game_rows)
+                if game['rows'] > MAX_ROWS and 'error' not in game:
+                    game['error'] = 'Game has too many rows: more than {}. Max allowed is {}'.format(MAX_ROWS, MAX_ROWS)
+                    shutil.rmtree(game['path'])
+                if 'error' in game:
+                    continue
+
+                table = pa.Table.from_pandas(game_rows, schema=schema, preserve_index=False)
+                pq.write_table(table, os.path.join(game['path'], f'part_{number:05d}.parquet'))
+
+    return list(games.values())
+
+
+def load_game(game):
+    """The rows of one partitioned game as text columns, in file order."""
+    parts = sorted(glob.glob(os.path.join(game['path'], 'part_*.parquet')))
+    return pa.concat_tables([pq.read_table(part) for part in parts]).to_pandas()
+
+
+def content_hash(frame):
+    """
+    A game's identity, stored as Outing.content_hash and the GameArchive key: the same game
+    hashes the same on every upload, whether it came in its own file or inside a season export.
+
+    Only the COLUMN_TYPES columns are hashed, by name, so a single-game upload's typed frame
+    and a season partition's text columns agree. Numbers are rounded to HASH_DECIMALS, since
+    an XLSX copy keeps 15 significant digits where the CSV may have more, and dates are
+    written one way whether they were read as text or as spreadsheet dates.
+    """
+    columns = sorted(column for column in frame.columns if column in ingest.COLUMN_TYPES)
+    canonical = pd.DataFrame({column: _canonical(frame[column], ingest.COLUMN_TYPES[column]) for column in columns})
+    digest = hashlib.md5('\t'.join(columns).encode())
+    digest.update(pd.util.hash_pandas_object(canonical, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _canonical(values, kind):
+    if kind == 'numeric':
+        return pd.to_numeric(values, errors='coerce').astype('float64').round(HASH_DECIMALS)
+    text = values.astype(object).where(values.notna(), '').astype(str).str.strip()
+    if values.name != 'Date':
+        return text
+    # A game has a date or two, so each distinct value is parsed once
+    dates = {value: pd.to_datetime(value, errors='coerce', format='mixed') for value in text.unique()}
+    return text.map({value: value if pd.isna(date) else date.strftime('%Y-%m-%d') for value, date in dates.items()})
+
+
+def game_label(game):
+    return '{} @ {} ({})'.format(game['away_team'], game['home_team'], game['date'])
+
+
+def _text(value):
+    return '' if pd.isna(value) else str(value)
@@ -0,0 +1,82 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+class SharedFrame:
+    """
+    A DataFrame's columns copied once into a single shared-memory block, so worker
+    processes can rebuild any row range of it without the frame being pickled to each one.
+
+    Numeric columns are stored as their own numpy dtype. Every other column is stored as
+    fixed-width unicode plus a null mask, and restored to its original pandas dtype.
+
+    pyarrow is installed for the game archive, but a memory-mapped Arrow file would put
+    every upload on disk; the shared block stays in memory and is gone once closed.
+    """
+
+    def __init__(self, frame, columns=None):
+        columns = list(frame.columns if columns is None else columns)
+        self.length = len(frame)
+
+        arrays = []
+        for column in columns:
+            series = frame[column]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+                arrays.append((column, series.to_numpy(), None, None))
+            else:
+                nulls = series.isna().to_numpy()
+                values = np.array([str(value) for value in series.where(~nulls, '')], dtype=str)
+                arrays.append((column, values, series.dtype, nulls))
+
+        # Lay every array out back to back, each starting on an 8-byte boundary
+        spec, blocks, offset = [], [], 0
+        for column, values, restore_dtype, nulls in arrays:
+            value_offset, offset = offset, _align(offset + values.nbytes)
+            null_offset = None
+            if nulls is not None:
+                null_offset, offset = offset, _align(offset + nulls.nbytes)
+                blocks.append((null_offset, nulls))
+            blocks.append((value_offset, values))
+            spec.append((column, values.dtype.str, value_offset, restore_dtype, null_offset))
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for block_offset, values in blocks:
+            np.ndarray(values.shape, dtype=values.dtype, buffer=self._shm.buf, offset=block_offset)[:] = values
+
+        # Everything a worker needs to find the block and read it back; small and picklable
+        self.handle = (self._shm.name, self.length, spec)
+
+    def close(self):
+        """Release the shared block. Call once every worker reading it has finished."""
+        self._shm.close()
+        self._shm.unlink()
+
+    @staticmethod
+    def attach(handle, rows=slice(None)):
+        """Rebuild rows (a slice) of a shared frame from its handle; the result owns its memory."""
+        name, length, spec = handle
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            data = {column: _read_column(shm, length, rows, dtype, offset, restore_dtype, null_offset)
+                for column, dtype, offset, restore_dtype, null_offset in spec}
+        finally:
+            shm.close()
+        return pd.DataFrame(data)
+
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+
+def _read_column(shm, length, rows, dtype, offset, restore_dtype, null_offset):
+    # Views into the shared buffer must not outlive this call, or the block cannot be closed
+    values = np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)[rows]
+    if null_offset is None:
+        return values.copy()
+
+    nulls = np.ndarray(length, dtype=bool, buffer=shm.buf, offset=null_offset)[rows]
+    restored = values.astype(object)
+    restored[nulls] = np.nan
+    return pd.Series(restored, dtype=restore_dtype)
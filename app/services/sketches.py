@@ -0,0 +1,98 @@
+import struct
+
+import numpy as np
+
+# Sketch column -> (TrackMan column, lower edge of the first bin, bin width, bin count).
+# Values outside the range are counted in the end bins.
+SKETCHES = {
+    'speed_sketch': ('RelSpeed', 30.0, 0.1, 800),
+    'spin_rate_sketch': ('SpinRate', 0.0, 10.0, 400),
+    'induced_vert_break_sketch': ('InducedVertBreak', -40.0, 0.1, 800),
+    'horz_break_sketch': ('HorzBreak', -40.0, 0.1, 800),
+}
+
+QUARTILES = (0.25, 0.5, 0.75)
+
+# Encoded as the index of the first non-empty bin and the byte width of the counts, then the
+# counts up to the last non-empty bin, each in the fewest bytes that hold the largest
+_HEADER = struct.Struct('<HB')
+_COUNT_TYPES = {1: '<u1', 2: '<u2', 4: '<u4'}
+
+
+def build(values, sketch):
+    """
+    Histogram sketch of one outing's values for a pitch type.
+
+    Sketches of the same column merge exactly by adding their counts, so season quantiles
+    come from the outings' sketches without the raw pitches. A quantile read from a sketch
+    is within half a bin width of the exact one.
+
+    Args:
+        values: The pitches' values; NaN is ignored
+        sketch: Key of SKETCHES
+
+    Returns:
+        The encoded sketch, or None when there are no values
+    """
+    _, low, width, bins = SKETCHES[sketch]
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return None
+    index = np.clip(np.floor((values - low) / width), 0, bins - 1).astype(int)
+    first = index.min()
+    return _encode(first, np.bincount(index - first))
+
+
+def merge(blobs):
+    """
+    Merge encoded sketches of one column into one.
+
+    Args:
+        blobs: Encoded sketches; None is skipped
+
+    Returns:
+        The encoded sketch, or None when there is nothing to merge
+    """
+    decoded = [_decode(blob) for blob in blobs if blob is not None]
+    if not decoded:
+        return None
+    first = min(start for start, _ in decoded)
+    counts = np.zeros(max(start + len(part) for start, part in decoded) - first, dtype=np.int64)
+    for start, part in decoded:
+        counts[start - first:start - first + len(part)] += part
+    return _encode(first, counts)
+
+
+def quantiles(blob, sketch, qs=QUARTILES):
+    """
+    Quantiles of an encoded sketch, interpolated between order statistics like pandas' quantile.
+
+    Returns:
+        list of float (None for each when the sketch is None)
+    """
+    if blob is None:
+        return [None] * len(qs)
+    _, low, width, _ = SKETCHES[sketch]
+    first, counts = _decode(blob)
+    cumulative = np.cumsum(counts)
+    results = []
+    for q in qs:
+        position = (cumulative[-1] - 1) * q
+        # Each order statistic is read as the centre of the bin it falls in
+        lower, upper = (low + (first + np.searchsorted(cumulative, rank, side='right') + 0.5) * width
+            for rank in (np.floor(position), np.ceil(position)))
+        results.append(float(lower + (position - np.floor(position)) * (upper - lower)))
+    return results
+
+
+def _encode(first, counts):
+    nonzero = np.flatnonzero(counts)
+    counts = counts[nonzero[0]:nonzero[-1] + 1]
+    size = next(size for size in _COUNT_TYPES if counts.max() < 256 ** size)
+    return _HEADER.pack(int(first + nonzero[0]), size) + counts.astype(_COUNT_TYPES[size]).tobytes()
+
+
+def _decode(blob):
+    first, size = _HEADER.unpack_from(blob)
+    return first, np.frombuffer(blob, dtype=_COUNT_TYPES[size], offset=_HEADER.size).astype(np.int64)
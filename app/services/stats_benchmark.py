@@ -0,0 +1,236 @@
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+from sqlalchemy import func
+
+from app.db.models import db
+from app.db import models
+from app.services import pitch_loader, pitcher_totals
+from app.services.report import pitch_order
+
+# Tables the benchmark seeds; their secondary indexes are what 'before' drops and 'after' restores
+STATS_TABLES = [models.School, models.Pitch_Types, models.Pitcher, models.Outing, models.Outing_Pitch_Stat,
+    models.Pitcher_Total, models.Pitcher_Pitch_Type_Total]
+INDEXED_TABLES = [models.Pitcher, models.Outing, models.Outing_Pitch_Stat]
+
+PITCHERS_PER_SCHOOL = 30
+PITCHERS_PER_GAME = 4
+PITCH_TYPES_PER_OUTING = 4
+
+
+def seed(connection, schools=50, seasons=4, games=45, seed=0):
+    """
+    Fill empty stats tables with synthetic schools, pitchers, outings and pitch stats.
+
+    Args:
+        connection: Connection to the scratch database
+        schools: Schools to create, each with PITCHERS_PER_SCHOOL pitchers
+        seasons: Seasons of history, ending with the current year
+        games: Games per school per season, each with PITCHERS_PER_GAME outings
+
+    Returns:
+        dict of table name -> rows written
+    """
+    rng = np.random.default_rng(seed)
+    load = lambda model, frame: pitch_loader.bulk_load(model.__table__, frame, connection)
+
+    school_ids = np.arange(1, schools + 1)
+    load(models.School, pd.DataFrame({
+        'id': school_ids,
+        'name': [f'School {i}' for i in school_ids],
+        'slug': [f'school-{i}' for i in school_ids],
+        'admin_email': [f'admin@school-{i}.edu' for i in school_ids],
+        'trackman_id': [f'SCH_{i:04d}' for i in school_ids],
+    }))
+    load(models.Pitch_Types, pd.DataFrame({
+        'id': np.arange(1, len(pitch_order) + 1),
+        'name': list(pitch_order),
+        'abbreviation': list(pitch_order.values()),
+    }))
+
+    pitcher_ids = np.arange(1, schools * PITCHERS_PER_SCHOOL + 1)
+    load(models.Pitcher, pd.DataFrame({
+        'id': pitcher_ids,
+        'school_id': (pitcher_ids - 1) // PITCHERS_PER_SCHOOL + 1,
+        'name': [f'Pitcher {i}' for i in pitcher_ids],
+        'trackman_id': [str(1000000 + i) for i in pitcher_ids],
+    }))
+
+    # Each game: a school, a date in its season, a content hash, and PITCHERS_PER_GAME of the school's pitchers
+    game_count = schools * seasons * games
+    game_school = np.repeat(school_ids, seasons * games)
+    first_season = date.today().year - seasons + 1
+    game_dates = [date(first_season + season, 2, 14) + timedelta(days=int(day)) for season, day in
+        zip(np.tile(np.repeat(np.arange(seasons), games), schools), rng.integers(0, 100, game_count))]
+    picks = np.argsort(rng.random((game_count, PITCHERS_PER_SCHOOL)), axis=1)[:, :PITCHERS_PER_GAME]
+    outing_count = game_count * PITCHERS_PER_GAME
+    outing_ids = np.arange(1, outing_count + 1)
+    outing_game = np.repeat(np.arange(game_count), PITCHERS_PER_GAME)
+    pitch_count = rng.integers(10, 110, outing_count)
+    lo_innings = rng.integers(0, 8, outing_count)
+    two_out_abs = rng.integers(0, 20, outing_count)
+    load(models.Outing, pd.DataFrame({
+        'id': outing_ids,
+        'pitcher_id': (game_school[outing_game] - 1) * PITCHERS_PER_SCHOOL + picks.ravel() + 1,
+        'content_hash': [f'{game:032x}' for game in outing_game],
+        'date': [game_dates[game] for game in outing_game],
+        'opponent': [f'OPP_{i:03d}' for i in rng.integers(0, 300, outing_count)],
+        'is_home': rng.random(outing_count) < 0.5,
+        'pitch_count': pitch_count,
+        'lo_inning_count': lo_innings,
+        'lo_reach': rng.binomial(lo_innings, 0.3),
+        'lo_obp': rng.random(outing_count),
+        'lo_bb_count': rng.binomial(lo_innings, 0.1),
+        'lo_bb_percentage': rng.random(outing_count) * 100,
+        'two_out_ab_count': two_out_abs,
+        'two_out_reach': rng.binomial(two_out_abs, 0.3),
+        'two_out_eff_percentage': rng.random(outing_count) * 100,
+        'two_out_bb_count': rng.binomial(two_out_abs, 0.1),
+        'two_out_bb_percentage': rng.random(outing_count) * 100,
+    }))
+
+    outings = pd.read_sql(sa.select(models.Outing.id, models.Outing.pitcher_id, models.Outing.pitch_count), connection)
+    stat_count = len(outings) * PITCH_TYPES_PER_OUTING
+    types = np.argsort(rng.random((len(outings), len(pitch_order))), axis=1)[:, :PITCH_TYPES_PER_OUTING] + 1
+    count = rng.integers(1, 40, stat_count).astype(float)
+    strikes = rng.binomial(count.astype(int), 0.6)
+    median_speed = rng.normal(85, 5, stat_count)
+    load(models.Outing_Pitch_Stat, pd.DataFrame({
+        'pitcher_id': np.repeat(outings['pitcher_id'].to_numpy(), PITCH_TYPES_PER_OUTING),
+        'outing_id': np.repeat(outings['id'].to_numpy(), PITCH_TYPES_PER_OUTING),
+        'pitch_type_id': types.ravel(),
+        'count': count,
+        'percentage': rng.random(stat_count) * 100,
+        'strike_count': strikes,
+        'strike_percentage': strikes / count * 100,
+        'sw_percentage': rng.random(stat_count) * 60,
+        'sw_miss_count': rng.binomial(count.astype(int), 0.15),
+        'sw_miss_percentage': rng.random(stat_count) * 40,
+        'low_quartile_speed': median_speed - 1.5,
+        'median_speed': median_speed,
+        'high_quartile_speed': median_speed + 1.5,
+    }))
+
+    totals, type_totals = pitcher_totals.rebuild(connection=connection)
+    return {'schools': schools, 'pitchers': len(pitcher_ids), 'outings': outing_count,
+        'outing_pitch_stats': stat_count, 'pitcher_totals': totals, 'pitcher_pitch_type_totals': type_totals}
+
+
+def queries(connection):
+    """
+    The statements the dashboard and the save path run, bound to one school, pitcher and game.
+
+    Returns:
+        list of (name, statement)
+    """
+    pitcher, outing, stat = models.Pitcher, models.Outing, models.Outing_Pitch_Stat
+    totals, type_totals = models.Pitcher_Total, models.Pitcher_Pitch_Type_Total
+    school_id, pitcher_id, content_hash = connection.execute(
+        sa.select(pitcher.school_id, outing.pitcher_id, outing.content_hash).join(outing, outing.pitcher_id == pitcher.id)
+        .order_by(outing.id).offset(connection.execute(sa.select(func.count(outing.id))).scalar() // 2).limit(1)).one()
+    game_outings = sa.select(outing.id).where(outing.content_hash == content_hash)
+    season_start, season_end = date(date.today().year, 1, 1), date(date.today().year, 12, 31)
+
+    return [
+        # /api/team/overview and its download
+        ('team_overview', sa.select(pitcher.id, pitcher.name, totals.pitch_count,
+            totals.lo_reach / func.nullif(totals.lo_inning_count, 0),
+            totals.two_out_reach / func.nullif(totals.two_out_ab_count, 0))
+            .join(totals, totals.pitcher_id == pitcher.id).where(pitcher.school_id == school_id)),
+        # /api/pitcher/<id>/averages and its download
+        ('pitcher_averages', sa.select(models.Pitch_Types.abbreviation, type_totals.count,
+            type_totals.strike_count / func.nullif(type_totals.count, 0), type_totals.speed_sketch)
+            .join(models.Pitch_Types, type_totals.pitch_type_id == models.Pitch_Types.id)
+            .where(type_totals.pitcher_id == pitcher_id)),
+        # The same numbers summed from every outing, as any query not served by the totals must
+        ('team_overview_from_outings', sa.select(pitcher.id, pitcher.name, func.sum(outing.pitch_count),
+            func.sum(outing.lo_reach) / func.nullif(func.sum(outing.lo_inning_count), 0))
+            .join(outing, outing.pitcher_id == pitcher.id).where(pitcher.school_id == school_id)
+            .group_by(pitcher.id, pitcher.name)),
+        ('pitcher_averages_from_stats', sa.select(stat.pitch_type_id, func.sum(stat.count), func.avg(stat.median_speed))
+            .where(stat.pitcher_id == pitcher_id).group_by(stat.pitch_type_id)),
+        # The dashboard with a date range: the school's or pitcher's outings in one season
+        ('team_overview_date_range', sa.select(pitcher.id, pitcher.name, func.sum(outing.pitch_count),
+            func.sum(outing.lo_reach) / func.nullif(func.sum(outing.lo_inning_count), 0))
+            .join(outing, outing.pitcher_id == pitcher.id)
+            .where(pitcher.school_id == school_id, outing.date >= season_start, outing.date <= season_end)
+            .group_by(pitcher.id, pitcher.name)),
+        ('pitcher_averages_date_range', sa.select(stat.pitch_type_id, func.sum(stat.count), func.sum(stat.strike_count))
+            .join(outing, stat.outing_id == outing.id)
+            .where(outing.pitcher_id == pitcher_id, outing.date >= season_start, outing.date <= season_end)
+            .group_by(stat.pitch_type_id)),
+        ('pitcher_sketches_date_range', sa.select(stat.pitch_type_id, stat.speed_sketch, stat.spin_rate_sketch)
+            .join(outing, stat.outing_id == outing.id)
+            .where(outing.pitcher_id == pitcher_id, outing.date >= season_start, outing.date <= season_end)),
+        # team_stats.add_report's duplicate check and remove_report's deletes
+        ('save_dedupe_check', sa.select(outing.id).where(outing.content_hash == content_hash).limit(1)),
+        ('remove_report_stats', sa.select(stat.id).where(stat.outing_id.in_(game_outings))),
+        # pitcher_totals.refresh for one pitcher
+        ('refresh_pitcher_totals', sa.select(outing.pitcher_id, func.count(outing.id), func.sum(outing.pitch_count))
+            .where(outing.pitcher_id == pitcher_id).group_by(outing.pitcher_id)),
+        ('refresh_pitch_type_totals', sa.select(stat.pitcher_id, stat.pitch_type_id, func.sum(stat.count))
+            .where(stat.pitcher_id == pitcher_id).group_by(stat.pitcher_id, stat.pitch_type_id)),
+        # Roster lookups on the subscription pages
+        ('school_pitchers', sa.select(pitcher.id, pitcher.name).where(pitcher.school_id == school_id)),
+    ]
+
+
+def explain(connection, statement):
+    """The database's plan for a statement, one line per step."""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        return [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+    return [row[0] for row in connection.exec_driver_sql(f'EXPLAIN {sql}')]
+
+
+def measure(connection, statements, repeat=5):
+    """Plan and best-of-`repeat` time in milliseconds of each statement."""
+    connection.exec_driver_sql('ANALYZE')
+    results = {}
+    for name, statement in statements:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            connection.execute(statement).all()
+            timings.append(time.perf_counter() - start)
+        results[name] = {'ms': min(timings) * 1000, 'plan': explain(connection, statement)}
+    return results
+
+
+def run(url, schools=50, seasons=4, games=45, repeat=5):
+    """
+    Seed a scratch database and time the stats queries without, then with, the secondary indexes.
+
+    Every table of the app's schema is dropped from the database at url first.
+
+    Returns:
+        dict with 'database', 'rows', and 'queries': name -> {'before': ..., 'after': ...}
+    """
+    engine = sa.create_engine(url)
+    tables = [model.__table__ for model in STATS_TABLES]
+    indexes = [index for model in INDEXED_TABLES for index in model.__table__.indexes]
+    try:
+        with engine.begin() as connection:
+            db.metadata.drop_all(connection)
+            db.metadata.create_all(connection, tables=tables)
+            for index in indexes:
+                index.drop(connection)
+            rows = seed(connection, schools, seasons, games)
+
+        with engine.begin() as connection:
+            statements = queries(connection)
+            before = measure(connection, statements, repeat)
+            for index in indexes:
+                index.create(connection)
+            after = measure(connection, statements, repeat)
+    finally:
+        engine.dispose()
+
+    return {
+        'database': engine.dialect.name,
+        'rows': rows,
+        'queries': {name: {'before': before[name], 'after': after[name]} for name, _ in statements},
+    }
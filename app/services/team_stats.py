@@ -16,21 +16,35 @@ Last Updated: 2024-05-26 (Thomas Eubank)
 import numpy as np
 import pandas as pd
 import hashlib
+from sqlalchemy import bindparam, insert
 
 from app.db.models import db
 from app.db import models
+from app.services import moments, pitch_loader, pitcher_totals, sketches
 
 STRIKES  =  ['StrikeCalled', 'StrikeSwinging', 'FoulBallNotFieldable']
 SWINGS  =  ['StrikeSwinging', 'FoulBallNotFieldable', 'InPlay']
 
+# Columns read when saving a game, beyond report.required_columns
+SAVE_COLUMNS = {
+    'HomeTeam': 'string',
+    'Outs': 'numeric',
+    'KorBB': 'string',
+    'PlayResult': 'string'
+}
+
+def _reaches(source):
+    return (source['KorBB'].isin(['Walk', 'HitByPitch']) |
+        source['PlayResult'].isin(['Single', 'Double', 'Triple', 'HomeRun', 'Error']))
+
 def _reach(source):
-    return_me = source[
-        source['KorBB'].isin(['Walk', 'HitByPitch']) |
-        source['PlayResult'].isin(['Single', 'Double', 'Triple', 'HomeRun', 'Error'])
-    ]
+    return_me = source[_reaches(source)]
 
     return return_me
 
+def _mode(values):
+    return values.mode().iloc[0]
+
 def _native(val):
     return val.item() if hasattr(val, 'item') else val
 
@@ -103,11 +117,16 @@ def update_outing(outing_id, **kwargs):
         for key, value in kwargs.items():
             if hasattr(outing, key):
                 setattr(outing, key, value)
+        db.session.flush()
+        pitcher_totals.refresh([outing.pitcher_id])
         db.session.commit()
 
-def add_outing_pitch_stats(pitcher_id, outing_id, source):
+def _pitch_type_ids():
     pitch_type_map = {pt.name: pt.id for pt in models.Pitch_Types.query.all()}
-    undefined_id = pitch_type_map.get('Undefined', None)
+    return pitch_type_map, pitch_type_map.get('Undefined', None)
+
+def add_outing_pitch_stats(pitcher_id, outing_id, source):
+    pitch_type_map, undefined_id = _pitch_type_ids()
 
     for pitch_type in source['TaggedPitchType'].unique():
         pitch_data  =  source[source['TaggedPitchType'] == pitch_type]
@@ -136,7 +155,10 @@ def add_outing_pitch_stats(pitcher_id, outing_id, source):
             sw_miss_percentage = _native((pitch_data['PitchCall'] == 'StrikeSwinging').sum()/count*100),
             low_quartile_speed = _native(low_quartile_speed),
             median_speed = _native(median_speed),
-            high_quartile_speed = _native(high_quartile_speed)
+            high_quartile_speed = _native(high_quartile_speed),
+            **{sketch: sketches.build(pitch_data[column], sketch) for sketch, (column, *_) in sketches.SKETCHES.items()},
+            **{f'{metric}_{part}': value for metric, column in moments.MOMENTS.items()
+                for part, value in zip(('count', 'mean', 'm2'), moments.summarize(pitch_data[column]))}
         )
         db.session.add(new_stat)
     db.session.flush()
@@ -145,43 +167,221 @@ def update_outing_pitch_stats(pitcher_id, outing_id, source):
     models.Outing_Pitch_Stat.query.filter_by(outing_id=outing_id).delete()
     db.session.flush()
     add_outing_pitch_stats(pitcher_id, outing_id, source)
+    pitcher_totals.refresh([pitcher_id])
     db.session.commit()
 
-def add_report(school_id, trackman_id, file):
-    content_hash = hash_file(file)
-    filepath = file.name
-    if filepath.endswith(('.xlsx', '.xls')):
-        source = pd.read_excel(filepath)
-    else:
-        source = pd.read_csv(filepath)
-
-    if not models.Outing.query.filter_by(content_hash = content_hash).first():
-        team_data = source[source['PitcherTeam'] == trackman_id]
-        for trackman_pitcher_id in team_data['PitcherId'].unique():
-            pitcher_data = team_data[team_data['PitcherId'] == trackman_pitcher_id]
-
-            db_pitcher_id = add_pitcher(school_id, trackman_pitcher_id, pitcher_data['Pitcher'].iloc[0])
-            outing_id = add_outing(
-                db_pitcher_id,
-                pd.to_datetime(pitcher_data['Date'].mode().iloc[0]).date(),
-                content_hash,
-                (trackman_id == pitcher_data['HomeTeam'].iloc[0]),
-                pitcher_data.shape[0],
-                pitcher_data)
-            add_outing_pitch_stats(
-                db_pitcher_id,
-                outing_id,
-                pitcher_data)
-
-            db.session.commit() 
-    else: 
+def _outing_rows(team_data, trackman_id):
+    # One row per pitcher with the same values add_outing computes, from a single groupby
+    lead_off = team_data['Outs'] == 0
+    two_outs = team_data['Outs'] == 2
+    reach = _reaches(team_data)
+    walk = team_data['KorBB'] == 'Walk'
+    flags = pd.DataFrame({
+        'PitcherId': team_data['PitcherId'],
+        'name': team_data['Pitcher'],
+        'date': team_data['Date'],
+        'home_team': team_data['HomeTeam'],
+        'opponent': team_data['BatterTeam'],
+        'lo_inning': team_data['Inning'].where(lead_off),
+        'lo_reach': lead_off & reach,
+        'lo_bb_count': lead_off & walk,
+        'two_out_ab_count': two_outs,
+        'two_out_reach': two_outs & reach,
+        'two_out_bb_count': two_outs & walk,
+    })
+    outings = flags.groupby('PitcherId', sort=False).agg(
+        name=('name', 'first'),
+        date=('date', _mode),
+        home_team=('home_team', 'first'),
+        opponent=('opponent', _mode),
+        pitch_count=('name', 'size'),
+        lo_inning_count=('lo_inning', 'nunique'),
+        lo_reach=('lo_reach', 'sum'),
+        lo_bb_count=('lo_bb_count', 'sum'),
+        two_out_ab_count=('two_out_ab_count', 'sum'),
+        two_out_reach=('two_out_reach', 'sum'),
+        two_out_bb_count=('two_out_bb_count', 'sum'),
+    )
+
+    innings, at_bats = outings['lo_inning_count'], outings['two_out_ab_count']
+    outings['lo_obp'] = (outings['lo_reach'] / innings).where(innings > 0, 0)
+    outings['lo_bb_percentage'] = (outings['lo_bb_count'] / innings * 100).where(innings > 0, 0)
+    outings['two_out_eff_percentage'] = ((at_bats - outings['two_out_reach']) / at_bats * 100).where(at_bats > 0, 0)
+    outings['two_out_bb_percentage'] = (outings['two_out_bb_count'] / at_bats * 100).where(at_bats > 0, 0)
+    outings['date'] = outings['date'].map(lambda date: pd.to_datetime(date).date())
+    outings['is_home'] = outings.pop('home_team') == trackman_id
+    return outings
+
+def _pitch_stat_rows(team_data):
+    # One row per pitcher and tagged pitch type with the values add_outing_pitch_stats computes
+    calls = team_data['PitchCall']
+    flags = pd.DataFrame({
+        'PitcherId': team_data['PitcherId'],
+        'TaggedPitchType': team_data['TaggedPitchType'],
+        'strike': calls.isin(STRIKES),
+        'swing': calls.isin(SWINGS),
+        'miss': calls == 'StrikeSwinging',
+        'speed': team_data['RelSpeed'],
+    })
+    grouped = flags.groupby(['PitcherId', 'TaggedPitchType'], sort=False)
+    stats = grouped.agg(count=('strike', 'size'), strike_count=('strike', 'sum'), swing_count=('swing', 'sum'), sw_miss_count=('miss', 'sum'))
+    speeds = grouped['speed'].quantile([0.25, 0.5, 0.75]).unstack()
+    speeds.columns = ['low_quartile_speed', 'median_speed', 'high_quartile_speed']
+    stats = stats.join(speeds)
+    pitches = team_data.groupby(['PitcherId', 'TaggedPitchType'], sort=False)
+    for sketch, (column, *_) in sketches.SKETCHES.items():
+        stats[sketch] = pitches[column].agg(lambda values: sketches.build(values, sketch))
+    for metric, column in moments.MOMENTS.items():
+        stats[f'{metric}_count'] = pitches[column].count()
+        stats[f'{metric}_mean'] = pitches[column].mean()
+        stats[f'{metric}_m2'] = pitches[column].var(ddof=0) * stats[f'{metric}_count']
+        # Empty moments are NULL, as moments.summarize gives them, not NaN
+        for part in ('mean', 'm2'):
+            stats[f'{metric}_{part}'] = stats[f'{metric}_{part}'].astype(object).where(stats[f'{metric}_count'] > 0, None)
+
+    count = stats['count']
+    # Untagged pitches count toward the pitcher's total, as in add_outing_pitch_stats
+    totals = team_data.groupby('PitcherId', sort=False).size()
+    stats['percentage'] = count / totals.reindex(stats.index.get_level_values('PitcherId')).to_numpy() * 100
+    stats['strike_percentage'] = stats['strike_count'] / count * 100
+    stats['sw_percentage'] = stats.pop('swing_count') / count * 100
+    stats['sw_miss_percentage'] = stats['sw_miss_count'] / count * 100
+    return stats.reset_index()
+
+def _pitcher_ids(school_id, names):
+    """
+    Database IDs for a game's pitchers, adding the ones the school has not seen before.
+
+    Args:
+        school_id: The school the pitchers belong to
+        names: Pitcher name per TrackMan pitcher ID
+
+    Returns:
+        dict of TrackMan pitcher ID -> pitchers.id
+    """
+    pitcher_ids = dict(db.session.query(models.Pitcher.trackman_id, models.Pitcher.id).filter(
+        models.Pitcher.school_id == school_id, models.Pitcher.trackman_id.in_(list(names.index))).all())
+    new_pitchers = [{'school_id': school_id, 'trackman_id': trackman_id, 'name': name}
+        for trackman_id, name in names.items() if trackman_id not in pitcher_ids]
+    if new_pitchers:
+        pitcher_ids.update(db.session.execute(
+            insert(models.Pitcher).returning(models.Pitcher.trackman_id, models.Pitcher.id), new_pitchers).all())
+    return pitcher_ids
+
+def add_report(school_id, trackman_id, file=None, source=None, content_hash=None, file_hash=None):
+    """
+    Save one game's outings and per-pitch-type stats for the school's pitchers.
+
+    Every row is computed up front and written with bulk inserts in one transaction, so a
+    game costs a handful of statements however many pitchers and pitches it has.
+
+    Args:
+        school_id: The school saving the game
+        trackman_id: The school's TrackMan team ID; other teams' pitchers are ignored
+        file: Raw upload, parsed and hashed here when source is not given
+        source: Parsed game rows from ingest or the archive
+        content_hash: The game's season.content_hash; a game already saved under it is skipped
+        file_hash: MD5 of the uploaded file, which games saved before content hashes were
+            computed from the rows are stored under; a game saved under it is skipped too
+    """
+    # Uploads pass the frame and hash from ingest; a raw file is still accepted and parsed here
+    if source is None:
+        from app.services import season
+        file_hash = hash_file(file)
+        filepath = file.name
+        if filepath.endswith(('.xlsx', '.xls')):
+            source = pd.read_excel(filepath, engine='calamine')
+        else:
+            source = pd.read_csv(filepath)
+        content_hash = season.content_hash(source)
+
+    saved_hashes = [value for value in (content_hash, file_hash) if value]
+    if models.Outing.query.filter(models.Outing.content_hash.in_(saved_hashes)).first():
         print("Report with this content hash already exists. No new data added.")
+        return
+
+    team_data = source[(source['PitcherTeam'] == trackman_id) & source['PitcherId'].notna()]
+    if team_data.empty:
+        return
+    team_data = team_data.assign(PitcherId=team_data['PitcherId'].astype(str))
+
+    outings = _outing_rows(team_data, trackman_id)
+    pitch_stats = _pitch_stat_rows(team_data)
+    pitcher_ids = _pitcher_ids(school_id, outings.pop('name'))
+
+    outings['pitcher_id'] = outings.index.map(pitcher_ids)
+    outings['content_hash'] = content_hash
+    outing_ids = dict(db.session.execute(
+        insert(models.Outing).returning(models.Outing.pitcher_id, models.Outing.id), outings.to_dict('records')).all())
+
+    pitch_type_map, undefined_id = _pitch_type_ids()
+    pitch_type_id = lambda pitch_type: pitch_type_map.get(pitch_type, undefined_id)
+    pitch_stats['pitch_type_id'] = pitch_stats['TaggedPitchType'].map(pitch_type_id)
+    for pitch_type in pitch_stats.loc[pitch_stats['pitch_type_id'].isna(), 'TaggedPitchType'].unique():
+        print(f"Skipping unknown pitch type: {pitch_type}")
+    pitch_stats = pitch_stats[pitch_stats['pitch_type_id'].notna()]
+    pitch_stats['pitcher_id'] = pitch_stats['PitcherId'].map(pitcher_ids)
+    pitch_stats['outing_id'] = pitch_stats['pitcher_id'].map(outing_ids)
+    pitch_stats = pitch_stats.drop(columns=['PitcherId', 'TaggedPitchType'])
+    if not pitch_stats.empty:
+        db.session.execute(insert(models.Outing_Pitch_Stat), pitch_stats.to_dict('records'))
+
+    # Every pitch is kept too, so new metrics can be computed from the database later
+    pitch_loader.bulk_load(models.Pitch.__table__, pitch_loader.pitch_rows(
+        team_data, pitcher_ids, outing_ids, outings['date'], pitch_type_id))
+
+    pitcher_totals.refresh(pitcher_ids.values())
+    db.session.commit()
 
 def remove_report(content_hash):
-    outings = models.Outing.query.filter_by(content_hash=content_hash).all()
-    for outing in outings:
-        models.Outing_Pitch_Stat.query.filter_by(outing_id=outing.id).delete()
-        db.session.delete(outing)
-    if outings:
-        db.session.commit()
+    pitcher_ids = [pitcher_id for (pitcher_id,) in
+        db.session.query(models.Outing.pitcher_id).filter_by(content_hash=content_hash).distinct()]
+    if not pitcher_ids:
+        return
+
+    # Set-based deletes: the outings' pitches and pitch stats first, then the outings themselves
+    outing_ids = db.select(models.Outing.id).where(models.Outing.content_hash == content_hash)
+    models.Pitch.query.filter(models.Pitch.outing_id.in_(outing_ids)).delete(synchronize_session=False)
+    models.Outing_Pitch_Stat.query.filter(models.Outing_Pitch_Stat.outing_id.in_(outing_ids)).delete(synchronize_session=False)
+    models.Outing.query.filter_by(content_hash=content_hash).delete(synchronize_session=False)
+    pitcher_totals.refresh(pitcher_ids)
+    db.session.commit()
 
+def rebuild_pitch_sketches(school_id):
+    """
+    Recompute a school's pitch stat sketches from its saved pitches, then its pitchers' totals.
+
+    For games saved before sketches were stored. Outings saved before the pitches table
+    existed have no pitches to read and keep no sketch.
+
+    Args:
+        school_id: The school whose outings are rebuilt
+
+    Returns:
+        The number of pitch stat rows given sketches
+    """
+    school_pitchers = db.select(models.Pitcher.id).where(models.Pitcher.school_id == school_id)
+    columns = {sketch: getattr(models.Pitch, pitch_loader.PITCH_COLUMNS[column])
+        for sketch, (column, *_) in sketches.SKETCHES.items()}
+    pitches = pd.read_sql(db.select(models.Pitch.outing_id, models.Pitch.pitch_type_id, *[
+        column.label(sketch) for sketch, column in columns.items()]).where(models.Pitch.pitcher_id.in_(school_pitchers)),
+        db.session.connection())
+    grouped = pitches.groupby(['outing_id', 'pitch_type_id'])
+    built = {sketch: grouped[sketch].agg(lambda values: sketches.build(values, sketch)) for sketch in columns}
+
+    # A key repeats only when several unknown pitch types were saved as Undefined; its first row
+    # gets the sketch of all their pitches and the others none, so the merged totals stay exact
+    stat = models.Outing_Pitch_Stat
+    updates, seen = [], set()
+    for stat_id, outing_id, pitch_type_id in db.session.query(stat.id, stat.outing_id, stat.pitch_type_id).filter(
+            stat.pitcher_id.in_(school_pitchers)).order_by(stat.id):
+        key = (outing_id, pitch_type_id)
+        found = key in built['speed_sketch'].index and key not in seen
+        seen.add(key)
+        updates.append({'stat_id': stat_id, **{sketch: built[sketch][key] if found else None for sketch in columns}})
+    if updates:
+        db.session.execute(stat.__table__.update().where(stat.__table__.c.id == bindparam('stat_id')), updates)
+
+    pitcher_totals.rebuild(school_id)
+    db.session.commit()
+    return sum(any(row[sketch] is not None for sketch in columns) for row in updates)
@@ -1,11 +1,24 @@
 // ── Team Overview ─────────────────────────────────────────────────────────────
 
+// "?from=...&to=..." for the chosen date range, or '' for all games
+function dateRangeQuery() {
+    const params = new URLSearchParams();
+    const from = document.getElementById('overview-from')?.value;
+    const to = document.getElementById('overview-to')?.value;
+    if (from) params.set('from', from);
+    if (to) params.set('to', to);
+    const query = params.toString();
+    return query ? `?${query}` : '';
+}
+
 async function loadTeamOverview() {
     const container = document.getElementById('team-overview-placeholder');
     if (!container) return;
+    const download = document.getElementById('team-overview-download');
+    if (download) download.href = `/api/team/overview/download${dateRangeQuery()}`;
     container.innerHTML = '<p style="color: var(--text-secondary); margin-top: 8px;">Loading...</p>';
     try {
-        const res = await fetch('/api/team/overview');
+        const res = await fetch(`/api/team/overview${dateRangeQuery()}`);
         const data = await res.json();
         if (res.ok) renderTeamOverview(data);
         else container.innerHTML = '<p style="color: red;">Failed to load team data.</p>';
@@ -21,7 +34,7 @@ function fmt(val, decimals = 1) {
 function renderTeamOverview(pitchers) {
     const container = document.getElementById('team-overview-placeholder');
     if (!pitchers.length) {
-        container.innerHTML = '<p style="color: var(--text-secondary); margin-top: 8px;">No data uploaded yet.</p>';
+        container.innerHTML = `<p style="color: var(--text-secondary); margin-top: 8px;">${dateRangeQuery() ? 'No games in this date range.' : 'No data uploaded yet.'}</p>`;
         return;
     }
 
@@ -78,7 +91,7 @@ async function togglePitchTypes(index, pitcherId) {
     if (!isOpen && !row.dataset.loaded) {
         row.dataset.loaded = 'true';
         try {
-            const res = await fetch(`/api/pitcher/${pitcherId}/averages`);
+            const res = await fetch(`/api/pitcher/${pitcherId}/averages${dateRangeQuery()}`);
             const data = await res.json();
             if (res.ok && data.length) {
                 content.innerHTML = renderPitchTypeTable(data, pitcherId);
@@ -99,12 +112,14 @@ function renderPitchTypeTable(pitchTypes, pitcherId) {
             <td>${fmt(pt.strike_percentage ? pt.strike_percentage * 100 : null)}%</td>
             <td>${fmt(pt.sw_percentage ? pt.sw_percentage * 100 : null)}%</td>
             <td>${fmt(pt.sw_miss_percentage ? pt.sw_miss_percentage * 100 : null)}%</td>
-            <td>${fmt(pt.avg_low_quartile_speed)} / ${fmt(pt.avg_median_speed)} / ${fmt(pt.avg_high_quartile_speed)}</td>
+            <td${pt.approximate ? ' title="Includes games saved before per-pitch data was kept: averages of each game\'s quartiles"' : ''}>${pt.approximate ? '≈ ' : ''}${fmt(pt.low_quartile_speed)} / ${fmt(pt.median_speed)} / ${fmt(pt.high_quartile_speed)}</td>
+            <td>${fmt(pt.median_spin_rate, 0)}</td>
+            <td>${fmt(pt.median_induced_vert_break)} / ${fmt(pt.median_horz_break)}</td>
         </tr>
     `).join('');
     return `
         <div style="display: flex; justify-content: flex-end;">
-            <a href="/api/pitcher/${pitcherId}/averages/download" class="download-btn-small">Download Excel</a>
+            <a href="/api/pitcher/${pitcherId}/averages/download${dateRangeQuery()}" class="download-btn-small">Download Excel</a>
         </div>
         <div class="table-section">
             <div class="table-scroll">
@@ -117,6 +132,8 @@ function renderPitchTypeTable(pitchTypes, pitcherId) {
                             <th>Swing%</th>
                             <th>Whiff%</th>
                             <th>Velo (Lo / Med / Hi)</th>
+                            <th>Spin</th>
+                            <th>IVB / HB</th>
                         </tr>
                     </thead>
                     <tbody>${rows}</tbody>
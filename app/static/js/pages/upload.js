@@ -5,7 +5,32 @@ function displayGameData(data) {
     const contentArea = document.getElementById('gameDataDisplay');
     if (!contentArea) return;
 
-    const { game_data, message, merged_pdf_url } = data;
+    const { game_data, message, merged_pdf_url, games } = data;
+
+    // Season and batch uploads list each game with its own merged PDF; skipped batch files show why
+    if (games) {
+        const heading = `${game_data.title || 'Season'} ${game_data.date}`;
+        document.title = heading;
+        const rows = games.map(game => `
+            <p>${game.away_team ? `${game.away_team} @ ${game.home_team} — ${game.date}` : game.filename}
+                ${game.error ? `(${game.error})` : `(${game.num_reports} reports)`}
+                ${game.merged_pdf_url ? `<a href="${game.merged_pdf_url}" download="${game.date}_pitcher_reports.pdf" class="download-btn-small">📄 PDF</a>` : ''}</p>
+        `).join('');
+        contentArea.innerHTML = `
+            <div class="bubble">
+                <div style="display: flex; align-items: center; justify-content: space-between; gap: 16px; flex-wrap: wrap;">
+                    <div>
+                        <h2>${heading}</h2>
+                        <p>${message}</p>
+                    </div>
+                    <button id="save-to-db-btn" class="upload-btn" onclick="saveToDb()">Save to DB</button>
+                </div>
+                ${rows}
+            </div>
+        `;
+        return;
+    }
+
     document.title = `${game_data.away_team} @ ${game_data.home_team}`;
 
     const downloadButton = merged_pdf_url
@@ -68,7 +93,8 @@ function uploadFile() {
 
 // Handle file upload
 async function handleFileSelect(event) {
-    const file = event.target.files[0];
+    const files = Array.from(event.target.files);
+    const file = files[0];
     if (!file) return;
 
     const reportOutput = document.querySelector('#report-output');
@@ -85,14 +111,22 @@ async function handleFileSelect(event) {
 </svg>`;
     }
 
+    // Several files or a zip archive go to the batch endpoint as one job
+    const isBatch = files.length > 1 || file.name.toLowerCase().endsWith('.zip');
     const formData = new FormData();
-    formData.append('file', file);
+    if (isBatch) {
+        files.forEach(f => formData.append('files', f));
+    } else {
+        formData.append('file', file);
+    }
     formData.append('target', document.getElementById('targetToggle')?.checked ? 'opponent' : 'own');
+    const uploadUrl = isBatch ? '/api/upload-batch'
+        : document.getElementById('seasonToggle')?.checked ? '/api/upload-season' : '/api/upload';
 
     const minDisplay = 600;
 
     try {
-        const response = await fetch('/api/upload', {
+        const response = await fetch(uploadUrl, {
             method: 'POST',
             body: formData
         });
@@ -107,9 +141,14 @@ async function handleFileSelect(event) {
             return;
         }
 
-        const result = await response.json();
-        const elapsed = Date.now() - spinnerStart;
-        if (elapsed < minDisplay) await new Promise(r => setTimeout(r, minDisplay - elapsed));
+        // The upload is queued as a job; reports are appended as each pitcher finishes
+        const job = await response.json();
+        let shown = 0;
+        const result = await pollJob(job.status_url, reports => {
+            if (shown === 0 && reportOutput) reportOutput.innerHTML = '';
+            buildAllReports(reports);
+            shown += reports.length;
+        });
 
         if (result.merged_pdf_url) {
             updateDownloadLink(true, result.merged_pdf_url);
@@ -119,17 +158,14 @@ async function handleFileSelect(event) {
         displayGameData({
             game_data: result.game_data,
             message: result.message,
-            merged_pdf_url: result.merged_pdf_url
+            merged_pdf_url: result.merged_pdf_url,
+            games: result.games
         });
 
-        if (reportOutput) reportOutput.innerHTML = '';
+        (result.errors || []).forEach(message => toast(message, 'error'));
 
-        if (result.reports && result.reports.length > 0) {
-            buildAllReports(result.reports);
-        } else {
-            if (reportOutput) {
-                reportOutput.innerHTML = '<p style="margin: 32px;">No reports generated.</p>';
-            }
+        if (shown === 0 && reportOutput) {
+            reportOutput.innerHTML = '<p style="margin: 32px;">No reports generated.</p>';
         }
     } catch (error) {
         console.error('Error uploading file:', error);
@@ -140,6 +176,28 @@ async function handleFileSelect(event) {
     event.target.value = '';
 }
 
+const JOB_POLL_INTERVAL = 1000;
+
+// Poll an upload job until it finishes, passing newly finished pitcher reports to onReports; resolves with the final payload
+async function pollJob(statusUrl, onReports) {
+    let since = 0;
+    while (true) {
+        await new Promise(r => setTimeout(r, JOB_POLL_INTERVAL));
+
+        const response = await fetch(`${statusUrl}?since=${since}`);
+        const job = await response.json().catch(() => ({}));
+        if (!response.ok) throw new Error(job.error || 'Could not check upload progress.');
+
+        if (job.reports && job.reports.length > 0) {
+            onReports(job.reports);
+            since += job.reports.length;
+        }
+
+        if (job.status === 'done') return job.result;
+        if (job.status === 'failed') throw new Error(job.error || 'Failed to process file.');
+    }
+}
+
 // Build all reports from array of report data
 function buildAllReports(reports) {
     reports.forEach(reportData => generateReport(reportData));
@@ -156,7 +214,7 @@ function generateReport(data) {
     const clone = template.content.cloneNode(true);
 
     const nameElement = clone.querySelector('.user-name');
-    if (nameElement) nameElement.textContent = data.pitcher_name;
+    if (nameElement) nameElement.textContent = data.game ? `${data.pitcher_name} — ${data.game}` : data.pitcher_name;
 
     const downloadContainer = clone.querySelector('.download-container');
     if (downloadContainer && data.pdf_url) {
@@ -1,4 +1,9 @@
 #!/bin/sh
 cp -rn /app/storage_defaults/. /app/app/storage/
 flask db upgrade
+
+# Uploads are queued as jobs; run them in a separate process so gunicorn worker recycling cannot cut one off
+if [ "$REPORT_JOB_RUNNER" = "process" ]; then
+    flask report-worker &
+fi
 exec "$@"
\ No newline at end of file
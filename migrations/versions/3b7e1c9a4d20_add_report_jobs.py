@@ -0,0 +1,44 @@
+"""add report_jobs
+
+Revision ID: 3b7e1c9a4d20
+Revises: 95218ed0478e
+Create Date: 2026-10-18 14:40:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '3b7e1c9a4d20'
+down_revision = '95218ed0478e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('school_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('target', sa.String(length=20), nullable=False),
+    sa.Column('filepath', sa.String(length=500), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('progress', sa.JSON(), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_report_jobs_status_created_at', 'report_jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_report_jobs_status_created_at', table_name='report_jobs')
+    op.drop_table('report_jobs')
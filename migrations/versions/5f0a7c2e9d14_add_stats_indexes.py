@@ -0,0 +1,31 @@
+"""add stats indexes
+
+Revision ID: 5f0a7c2e9d14
+Revises: e5b19d3c7a08
+Create Date: 2026-10-18 16:12:40.871203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '5f0a7c2e9d14'
+down_revision = 'e5b19d3c7a08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_pitchers_school_id', 'pitchers', ['school_id'], unique=False)
+    op.create_index('ix_outings_content_hash', 'outings', ['content_hash'], unique=False)
+    op.create_index('ix_outings_pitcher_id_date', 'outings', ['pitcher_id', 'date'], unique=False)
+    op.create_index('ix_outing_pitch_stats_outing_id', 'outing_pitch_stats', ['outing_id'], unique=False)
+    op.create_index('ix_outing_pitch_stats_pitcher_id_pitch_type_id', 'outing_pitch_stats', ['pitcher_id', 'pitch_type_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_outing_pitch_stats_pitcher_id_pitch_type_id', table_name='outing_pitch_stats')
+    op.drop_index('ix_outing_pitch_stats_outing_id', table_name='outing_pitch_stats')
+    op.drop_index('ix_outings_pitcher_id_date', table_name='outings')
+    op.drop_index('ix_outings_content_hash', table_name='outings')
+    op.drop_index('ix_pitchers_school_id', table_name='pitchers')
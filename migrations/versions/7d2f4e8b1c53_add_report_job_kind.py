@@ -0,0 +1,25 @@
+"""add report_jobs.kind
+
+Revision ID: 7d2f4e8b1c53
+Revises: 3b7e1c9a4d20
+Create Date: 2026-10-18 15:02:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '7d2f4e8b1c53'
+down_revision = '3b7e1c9a4d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('report_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('kind', sa.String(length=20), server_default='game', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('report_jobs', schema=None) as batch_op:
+        batch_op.drop_column('kind')
@@ -0,0 +1,44 @@
+"""outing date type
+
+Revision ID: 8b3d6f1a2c47
+Revises: 5f0a7c2e9d14
+Create Date: 2026-10-18 17:05:22.418236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '8b3d6f1a2c47'
+down_revision = '5f0a7c2e9d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Outing dates have always been written as ISO text. Postgres casts them in place; SQLite
+    # stores dates as that same text, so the table is only rebuilt with the new declared type
+    # (batch mode's CAST(date AS DATE) would turn '2026-03-01' into 2026 there)
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('outings', schema=None, recreate='always',
+                reflect_args=[sa.Column('date', sa.Date(), nullable=False)]):
+            pass
+    else:
+        op.alter_column('outings', 'date',
+               existing_type=sa.String(length=20),
+               type_=sa.Date(),
+               existing_nullable=False,
+               postgresql_using='date::date')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('outings', schema=None, recreate='always',
+                reflect_args=[sa.Column('date', sa.String(length=20), nullable=False)]):
+            pass
+    else:
+        op.alter_column('outings', 'date',
+               existing_type=sa.Date(),
+               type_=sa.String(length=20),
+               existing_nullable=False,
+               postgresql_using='date::text')
@@ -0,0 +1,33 @@
+"""widen pitch tilt
+
+Revision ID: 9c4d7b2e1f85
+Revises: f7a3c1e84b62
+Create Date: 2026-10-18 21:02:47.305518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '9c4d7b2e1f85'
+down_revision = 'f7a3c1e84b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tilt in the '11:45:00 AM' format the reports accept is 11 characters
+    with op.batch_alter_table('pitches', schema=None) as batch_op:
+        batch_op.alter_column('tilt',
+               existing_type=sa.String(length=10),
+               type_=sa.String(length=20),
+               existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('pitches', schema=None) as batch_op:
+        batch_op.alter_column('tilt',
+               existing_type=sa.String(length=20),
+               type_=sa.String(length=10),
+               existing_nullable=True,
+               postgresql_using='left(tilt, 10)')
@@ -0,0 +1,66 @@
+"""add pitches
+
+Revision ID: a4c8e2f61b97
+Revises: 7d2f4e8b1c53
+Create Date: 2026-10-18 15:24:51.306417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'a4c8e2f61b97'
+down_revision = '7d2f4e8b1c53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pitches',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('outing_id', sa.Integer(), nullable=False),
+    sa.Column('pitcher_id', sa.Integer(), nullable=False),
+    sa.Column('pitch_type_id', sa.Integer(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('pitch_number', sa.SmallInteger(), nullable=False),
+    sa.Column('tagged_pitch_type', sa.String(length=30), nullable=True),
+    sa.Column('pitch_call', sa.String(length=30), nullable=True),
+    sa.Column('batter_side', sa.String(length=10), nullable=True),
+    sa.Column('batter_team', sa.String(length=100), nullable=True),
+    sa.Column('batter_id', sa.BigInteger(), nullable=True),
+    sa.Column('inning', sa.SmallInteger(), nullable=True),
+    sa.Column('pa_of_inning', sa.SmallInteger(), nullable=True),
+    sa.Column('pitch_of_pa', sa.SmallInteger(), nullable=True),
+    sa.Column('balls', sa.SmallInteger(), nullable=True),
+    sa.Column('strikes', sa.SmallInteger(), nullable=True),
+    sa.Column('outs', sa.SmallInteger(), nullable=True),
+    sa.Column('kor_bb', sa.String(length=20), nullable=True),
+    sa.Column('play_result', sa.String(length=20), nullable=True),
+    sa.Column('rel_speed', sa.REAL(), nullable=True),
+    sa.Column('spin_rate', sa.REAL(), nullable=True),
+    sa.Column('tilt', sa.String(length=10), nullable=True),
+    sa.Column('induced_vert_break', sa.REAL(), nullable=True),
+    sa.Column('horz_break', sa.REAL(), nullable=True),
+    sa.Column('vert_appr_angle', sa.REAL(), nullable=True),
+    sa.Column('horz_appr_angle', sa.REAL(), nullable=True),
+    sa.Column('rel_height', sa.REAL(), nullable=True),
+    sa.Column('rel_side', sa.REAL(), nullable=True),
+    sa.Column('extension', sa.REAL(), nullable=True),
+    sa.Column('plate_loc_height', sa.REAL(), nullable=True),
+    sa.Column('plate_loc_side', sa.REAL(), nullable=True),
+    sa.Column('zone_time', sa.REAL(), nullable=True),
+    sa.ForeignKeyConstraint(['outing_id'], ['outings.id'], ),
+    sa.ForeignKeyConstraint(['pitch_type_id'], ['pitch_types.id'], ),
+    sa.ForeignKeyConstraint(['pitcher_id'], ['pitchers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pitches_outing_id', 'pitches', ['outing_id'], unique=False)
+    op.create_index('ix_pitches_pitcher_id_date', 'pitches', ['pitcher_id', 'date'], unique=False)
+    op.create_index('ix_pitches_pitcher_id_pitch_type_id_date', 'pitches', ['pitcher_id', 'pitch_type_id', 'date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_pitches_pitcher_id_pitch_type_id_date', table_name='pitches')
+    op.drop_index('ix_pitches_pitcher_id_date', table_name='pitches')
+    op.drop_index('ix_pitches_outing_id', table_name='pitches')
+    op.drop_table('pitches')
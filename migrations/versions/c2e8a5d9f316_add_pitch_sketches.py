@@ -0,0 +1,59 @@
+"""add pitch sketches
+
+Revision ID: c2e8a5d9f316
+Revises: 8b3d6f1a2c47
+Create Date: 2026-10-18 18:21:47.093615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c2e8a5d9f316'
+down_revision = '8b3d6f1a2c47'
+branch_labels = None
+depends_on = None
+
+SKETCH_COLUMNS = ['speed_sketch', 'spin_rate_sketch', 'induced_vert_break_sketch', 'horz_break_sketch']
+
+
+def upgrade():
+    # Saved games get their sketches from `flask rebuild-pitch-sketches`, which reads the pitches table
+    with op.batch_alter_table('outing_pitch_stats', schema=None) as batch_op:
+        for column in SKETCH_COLUMNS:
+            batch_op.add_column(sa.Column(column, sa.LargeBinary(), nullable=True))
+
+    with op.batch_alter_table('pitcher_pitch_type_totals', schema=None) as batch_op:
+        for column in SKETCH_COLUMNS:
+            batch_op.add_column(sa.Column(column, sa.LargeBinary(), nullable=True))
+        batch_op.drop_column('high_quartile_speed_sum')
+        batch_op.drop_column('median_speed_sum')
+        batch_op.drop_column('low_quartile_speed_sum')
+        batch_op.drop_column('speed_outing_count')
+
+
+def downgrade():
+    with op.batch_alter_table('pitcher_pitch_type_totals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('speed_outing_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('low_quartile_speed_sum', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('median_speed_sum', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('high_quartile_speed_sum', sa.Float(), nullable=True))
+        for column in reversed(SKETCH_COLUMNS):
+            batch_op.drop_column(column)
+
+    # Refill the averaged quartile sums the previous dashboard read
+    same_row = ('FROM outing_pitch_stats s WHERE s.pitcher_id = pitcher_pitch_type_totals.pitcher_id '
+        'AND s.pitch_type_id = pitcher_pitch_type_totals.pitch_type_id')
+    op.execute(
+        'UPDATE pitcher_pitch_type_totals SET '
+        f'speed_outing_count = (SELECT COUNT(s.median_speed) {same_row}), '
+        f'low_quartile_speed_sum = (SELECT SUM(s.low_quartile_speed) {same_row}), '
+        f'median_speed_sum = (SELECT SUM(s.median_speed) {same_row}), '
+        f'high_quartile_speed_sum = (SELECT SUM(s.high_quartile_speed) {same_row})'
+    )
+    with op.batch_alter_table('pitcher_pitch_type_totals', schema=None) as batch_op:
+        batch_op.alter_column('speed_outing_count', existing_type=sa.Integer(), nullable=False)
+
+    with op.batch_alter_table('outing_pitch_stats', schema=None) as batch_op:
+        for column in reversed(SKETCH_COLUMNS):
+            batch_op.drop_column(column)
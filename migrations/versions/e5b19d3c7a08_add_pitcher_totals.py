@@ -0,0 +1,67 @@
+"""add pitcher_totals and pitcher_pitch_type_totals
+
+Revision ID: e5b19d3c7a08
+Revises: a4c8e2f61b97
+Create Date: 2026-10-18 15:48:09.522734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e5b19d3c7a08'
+down_revision = 'a4c8e2f61b97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pitcher_totals',
+    sa.Column('pitcher_id', sa.Integer(), nullable=False),
+    sa.Column('outing_count', sa.Integer(), nullable=False),
+    sa.Column('pitch_count', sa.Integer(), nullable=True),
+    sa.Column('lo_inning_count', sa.Float(), nullable=True),
+    sa.Column('lo_reach', sa.Float(), nullable=True),
+    sa.Column('lo_bb_count', sa.Float(), nullable=True),
+    sa.Column('two_out_ab_count', sa.Float(), nullable=True),
+    sa.Column('two_out_reach', sa.Float(), nullable=True),
+    sa.Column('two_out_bb_count', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['pitcher_id'], ['pitchers.id'], ),
+    sa.PrimaryKeyConstraint('pitcher_id')
+    )
+    op.create_table('pitcher_pitch_type_totals',
+    sa.Column('pitcher_id', sa.Integer(), nullable=False),
+    sa.Column('pitch_type_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Float(), nullable=True),
+    sa.Column('strike_count', sa.Float(), nullable=True),
+    sa.Column('sw_miss_count', sa.Float(), nullable=True),
+    sa.Column('sw_weighted_count', sa.Float(), nullable=True),
+    sa.Column('speed_outing_count', sa.Integer(), nullable=False),
+    sa.Column('low_quartile_speed_sum', sa.Float(), nullable=True),
+    sa.Column('median_speed_sum', sa.Float(), nullable=True),
+    sa.Column('high_quartile_speed_sum', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['pitch_type_id'], ['pitch_types.id'], ),
+    sa.ForeignKeyConstraint(['pitcher_id'], ['pitchers.id'], ),
+    sa.PrimaryKeyConstraint('pitcher_id', 'pitch_type_id')
+    )
+
+    # Fill both from the games already saved; add_report and remove_report keep them current from here
+    op.execute(
+        'INSERT INTO pitcher_totals (pitcher_id, outing_count, pitch_count, lo_inning_count, lo_reach, lo_bb_count, '
+        'two_out_ab_count, two_out_reach, two_out_bb_count) '
+        'SELECT pitcher_id, COUNT(id), SUM(pitch_count), SUM(lo_inning_count), SUM(lo_reach), SUM(lo_bb_count), '
+        'SUM(two_out_ab_count), SUM(two_out_reach), SUM(two_out_bb_count) '
+        'FROM outings GROUP BY pitcher_id'
+    )
+    op.execute(
+        'INSERT INTO pitcher_pitch_type_totals (pitcher_id, pitch_type_id, count, strike_count, sw_miss_count, '
+        'sw_weighted_count, speed_outing_count, low_quartile_speed_sum, median_speed_sum, high_quartile_speed_sum) '
+        'SELECT pitcher_id, pitch_type_id, SUM(count), SUM(strike_count), SUM(sw_miss_count), '
+        'SUM(sw_percentage * count), COUNT(median_speed), SUM(low_quartile_speed), SUM(median_speed), SUM(high_quartile_speed) '
+        'FROM outing_pitch_stats GROUP BY pitcher_id, pitch_type_id'
+    )
+
+
+def downgrade():
+    op.drop_table('pitcher_pitch_type_totals')
+    op.drop_table('pitcher_totals')
@@ -0,0 +1,53 @@
+"""add pitch moments
+
+Revision ID: f7a3c1e84b62
+Revises: c2e8a5d9f316
+Create Date: 2026-10-18 19:34:05.627184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f7a3c1e84b62'
+down_revision = 'c2e8a5d9f316'
+branch_labels = None
+depends_on = None
+
+METRICS = ['rel_speed', 'induced_vert_break', 'horz_break', 'spin_rate', 'extension', 'rel_height', 'rel_side']
+
+
+def upgrade():
+    with op.batch_alter_table('outing_pitch_stats', schema=None) as batch_op:
+        for metric in METRICS:
+            batch_op.add_column(sa.Column(f'{metric}_count', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column(f'{metric}_mean', sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column(f'{metric}_m2', sa.Float(), nullable=True))
+
+    # Fill outings whose pitches were saved, two-pass so M2 is taken around the stored mean.
+    # Several unknown pitch types saved as Undefined share a key; only its first row is filled
+    same_key = ('FROM pitches p WHERE p.outing_id = outing_pitch_stats.outing_id '
+        'AND p.pitch_type_id = outing_pitch_stats.pitch_type_id')
+    op.execute(
+        'UPDATE outing_pitch_stats SET ' + ', '.join(
+            f'{metric}_count = (SELECT COUNT(p.{metric}) {same_key}), {metric}_mean = (SELECT AVG(p.{metric}) {same_key})'
+            for metric in METRICS) + ' '
+        'WHERE id IN (SELECT MIN(id) FROM outing_pitch_stats GROUP BY outing_id, pitch_type_id) '
+        'AND outing_id IN (SELECT outing_id FROM pitches)'
+    )
+    op.execute(
+        'UPDATE outing_pitch_stats SET ' + ', '.join(
+            f'{metric}_m2 = (SELECT SUM((p.{metric} - outing_pitch_stats.{metric}_mean) * '
+            f'(p.{metric} - outing_pitch_stats.{metric}_mean)) {same_key})'
+            for metric in METRICS) + ' '
+        'WHERE id IN (SELECT MIN(id) FROM outing_pitch_stats GROUP BY outing_id, pitch_type_id) '
+        'AND outing_id IN (SELECT outing_id FROM pitches)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('outing_pitch_stats', schema=None) as batch_op:
+        for metric in reversed(METRICS):
+            batch_op.drop_column(f'{metric}_m2')
+            batch_op.drop_column(f'{metric}_mean')
+            batch_op.drop_column(f'{metric}_count')
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+# The app builds its engine when app.main is imported, so the database is chosen before any test
+# imports it: an in-memory SQLite by default, or TEST_DATABASE_URL (e.g. a scratch Postgres)
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL', 'sqlite://')
+
+
+@pytest.fixture
+def app():
+    from app.main import app
+    from app.db.models import db, Pitch_Types
+    from app.services.report import pitch_order
+
+    app.config['SECRET_KEY'] = 'test'
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Pitch_Types(name=name, abbreviation=abbreviation) for name, abbreviation in pitch_order.items()])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def school(app):
+    from app.db.models import db, School
+
+    school = School(name='Home Team', slug='home-team', admin_email='admin@home.test', trackman_id='HOM_TEA')
+    db.session.add(school)
+    db.session.commit()
+    return school
+
+
+@pytest.fixture
+def client(app, school):
+    """Test client logged in as a coach of school."""
+    from app.db.models import db, User
+
+    user = User(email='coach@home.test', password_hash='-', first_name='Head', last_name='Coach', school_id=school.id, role='coach')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+    return client
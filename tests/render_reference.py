@@ -0,0 +1,56 @@
+"""
+Heat and break maps of a sample game, drawn either with kde.kdeplot or with the
+seaborn.kdeplot call it replaced.
+
+tests/reference_renders holds the seaborn renders that test_kde_renders compares against.
+Regenerating them needs seaborn, which the app itself no longer installs:
+
+    pip install seaborn==0.13.2 && python -m tests.render_reference
+"""
+import os
+from unittest import mock
+
+import matplotlib
+
+from app.services import report
+from tests.report_reference import sample_game
+
+REFERENCE_DIR = os.path.join(os.path.dirname(__file__), 'reference_renders')
+
+# Two pitchers with ~180 pitches each: most pitch types get a KDE layer, the Splitter one
+# with the small-sample bandwidth and the Knuckleball too few pitches for any
+SAMPLE = {'pitches': 360, 'pitchers': 2, 'seed': 7}
+
+
+def seaborn_kdeplot(ax, x, y, extent, cmap, bw_adjust=1.0, thresh=0.05, levels=10, gridsize=128):
+    import seaborn as sns
+
+    return sns.kdeplot(x=x, y=y, fill=True, thresh=thresh, cmap=cmap, bw_adjust=bw_adjust, ax=ax, levels=levels)
+
+
+def render_maps(folder, kdeplot=None):
+    """
+    Draw the light-theme heat maps and break map of every pitcher in the sample game into folder.
+
+    Returns:
+        list of the web image file names
+    """
+    game = sample_game(**SAMPLE)
+    # Labels use matplotlib's bundled font, so renders do not depend on whether Cambria is installed
+    with matplotlib.rc_context({'font.family': 'DejaVu Sans'}), \
+            mock.patch.object(report.kde, 'kdeplot', kdeplot or report.kde.kdeplot):
+        for pitcher_id, pitcher_data in game.groupby('PitcherId'):
+            report.pitch_heat_map_by_batter_side(pitcher_data, 'sample', folder, pitcher_id, themes=('light',))
+            report.pitch_break_map(pitcher_data, 'sample', folder, pitcher_id, themes=('light',))
+    return sorted(name for name in os.listdir(folder) if name.endswith(f'.{report.WEB_FORMAT}'))
+
+
+if __name__ == '__main__':
+    import shutil
+    import tempfile
+
+    os.makedirs(REFERENCE_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory() as folder:
+        for name in render_maps(folder, seaborn_kdeplot):
+            shutil.copy(os.path.join(folder, name), os.path.join(REFERENCE_DIR, name))
+            print(name)
@@ -0,0 +1,209 @@
+"""
+The per-row build_table and usage_table the report shipped with before they were vectorized,
+kept verbatim (apart from build_table's pitcher filter and usage_table's display options and
+error handling) as the references the current functions are checked against.
+"""
+import numpy as np
+import pandas as pd
+
+from app.services.report import STRIKES, pitch_order
+
+
+def build_table_loop(pitcher_data, pitcher_id):
+    date = pitcher_data['Date'].mode()[0] if 'Date' in pitcher_data.columns else ''
+    away_team = pitcher_data['BatterTeam'].iloc[0] if 'BatterTeam' in pitcher_data.columns else ''
+    home_team = pitcher_data['PitcherTeam'].iloc[0] if 'PitcherTeam' in pitcher_data.columns else ''
+    pitcher = pitcher_data['Pitcher'].iloc[0]
+
+    game_report = {'Pitch': [], 'Thrown': [], 'Low': [], 'Vel.': [], 'High': [], 'IVB': [], 'HB': [],
+        'Spin': [], 'VAA': [], 'HAA': [], 'RelH': [], 'RelS': [], 'Ext.': [], 'Axis': [], 'Zone': [],
+        'Chase': [], 'CSW': []}
+
+    for pitch_type in pitcher_data['TaggedPitchType'].unique():
+        pitch_type_data = pitcher_data[pitcher_data['TaggedPitchType'] == pitch_type]
+        if pitch_type != 'n/a':
+            game_report['Pitch'].append(pitch_type)
+            game_report['Thrown'].append(len(pitch_type_data) / len(pitcher_data) * 100)
+            game_report['Low'].append(pitch_type_data['RelSpeed'].min())
+            game_report['Vel.'].append(pitch_type_data['RelSpeed'].mean())
+            game_report['High'].append(pitch_type_data['RelSpeed'].max())
+            game_report['IVB'].append(pitch_type_data['InducedVertBreak'].mean())
+            game_report['HB'].append(pitch_type_data['HorzBreak'].mean())
+            game_report['Spin'].append(pitch_type_data['SpinRate'].mean())
+            game_report['VAA'].append(pitch_type_data['VertApprAngle'].mean())
+            game_report['HAA'].append(pitch_type_data['HorzApprAngle'].mean())
+            game_report['RelH'].append(pitch_type_data['RelHeight'].mean())
+            game_report['RelS'].append(pitch_type_data['RelSide'].mean())
+            game_report['Ext.'].append(pitch_type_data['Extension'].mean())
+
+            tilt_text = pitch_type_data['Tilt'].astype(str).str.strip()
+            tilt_parsed = pd.to_datetime(tilt_text, format='%H:%M', errors='coerce')
+            tilt_parsed = tilt_parsed.fillna(pd.to_datetime(tilt_text, format='%H:%M:%S', errors='coerce'))
+            tilt_parsed = tilt_parsed.fillna(pd.to_datetime(tilt_text, format='%I:%M:%S %p', errors='coerce'))
+            tilt_parsed = tilt_parsed.fillna(pd.to_datetime(tilt_text, format='%I:%M %p', errors='coerce')).dropna()
+            axis_mean = tilt_parsed.mean()
+            game_report['Axis'].append(axis_mean.strftime('%H:%M') if not pd.isna(axis_mean) else 'N/A')
+            game_report['Zone'].append(pitch_type_data['ZoneTime'].mean() * 100)
+
+            chase_count = 0
+            for _, row in pitch_type_data.iterrows():
+                outside = (row['PlateLocHeight'] < 1.5) or (row['PlateLocHeight'] > 3.5)
+                outside_height = abs(row['PlateLocSide']) > 0.83
+                batter_swung = row['PitchCall'] in ['StrikeSwinging', 'FoulBallNotFieldable', 'InPlay', 'HitByPitch']
+                if (outside or outside_height) and batter_swung:
+                    chase_count += 1
+            game_report['Chase'].append(chase_count / len(pitch_type_data) * 100.00)
+
+            called_strike_count = 0
+            for _, row in pitch_type_data.iterrows():
+                if row['PitchCall'] in ['StrikeCalled']:
+                    called_strike_count += 1
+            swinging_strike_count = 0
+            for _, row in pitch_type_data.iterrows():
+                if row['PitchCall'] in ['StrikeSwinging']:
+                    swinging_strike_count += 1
+            game_report['CSW'].append((called_strike_count + swinging_strike_count) / len(pitch_type_data) * 100.00)
+
+    report_df = pd.DataFrame(game_report)
+    report_df['Pitch'] = report_df['Pitch'].map(pitch_order)
+    report_df['Thrown'] = report_df['Thrown'].map(lambda x: f"{x:.1f}%")
+    report_df['Zone'] = report_df['Zone'].map(lambda x: f"{x:.1f}%")
+    report_df['Chase'] = report_df['Chase'].map(lambda x: f"{x:.1f}%")
+    report_df['CSW'] = report_df['CSW'].map(lambda x: f"{x:.1f}%")
+    report_df = report_df.sort_values('Thrown', ascending=False).head(6)
+    pitch_order_list = list(pitch_order.values())
+    report_df['Pitch'] = pd.Categorical(report_df['Pitch'], categories=pitch_order_list, ordered=True)
+    report_df.sort_values('Pitch', inplace=True)
+
+    return [date, home_team, away_team, str(pitcher), report_df]
+
+
+def usage_table_loop(source, pitcher_id):
+    table = source[['Pitcher', 'PitcherId', 'TaggedPitchType', 'PitchCall', 'BatterId', 'Inning', 'PAofInning', 'PitchofPA', 'BatterSide', 'Balls', 'Strikes']]
+    pitcher_data = table[table['PitcherId'] == pitcher_id]
+
+    tables = []
+
+    for batter_side in ['Left', 'Right']:
+        side_data = pitcher_data[pitcher_data['BatterSide'] == batter_side]
+        # Dictionary to hold data for each pitch type per game
+        game_report = {'Pitch': [],
+                        'Count': [],
+                        'Strike': [],
+                        '0-0': [],
+                        "Hitter's" : [],
+                        "Pitcher's": [],
+                        '2k': [],
+                        'Whiff': []}
+
+        total_first_pitch_count = side_data[side_data['PitchofPA'] == 1].shape[0]
+        total_hitter_favorable_count = (side_data['Balls'] > side_data['Strikes']).sum()
+        total_pitcher_favorable_count = (side_data['Strikes'] > side_data['Balls']).sum()
+        total_two_strike_count = (side_data['Strikes'] == 2).sum()
+
+        for pitch_type in side_data['TaggedPitchType'].unique():
+            pitch_type_data = side_data[side_data['TaggedPitchType'] == pitch_type]
+
+            strike_count = pitch_type_data['PitchCall'].isin(STRIKES).sum()
+            first_pitch_count = pitch_type_data[pitch_type_data['PitchofPA'] == 1].shape[0]
+            hitter_favorable_count = (pitch_type_data['Balls'] > pitch_type_data['Strikes']).sum()
+            pitcher_favorable_count = (pitch_type_data['Strikes'] > pitch_type_data['Balls']).sum()
+            two_strike_count = (pitch_type_data['Strikes'] == 2).sum()
+            whiff_count = pitch_type_data[pitch_type_data['PitchCall'].isin(['StrikeSwinging', 'FoulBallNotFieldable'])].shape[0]
+
+            # Add the stats of the pitch type to the report
+            game_report['Pitch'].append(pitch_type)
+            game_report['Strike'].append(strike_count / len(pitch_type_data) * 100)
+            game_report['Count'].append(len(pitch_type_data))
+            game_report['0-0'].append(first_pitch_count / total_first_pitch_count * 100 if total_first_pitch_count else 0)
+            game_report["Hitter's"].append(hitter_favorable_count / total_hitter_favorable_count * 100 if total_hitter_favorable_count else 0)
+            game_report["Pitcher's"].append(pitcher_favorable_count / total_pitcher_favorable_count * 100 if total_pitcher_favorable_count else 0)
+            game_report['2k'].append(two_strike_count / total_two_strike_count * 100 if total_two_strike_count else 0)
+            game_report['Whiff'].append(whiff_count / len(pitch_type_data) * 100)
+
+        report = pd.DataFrame(game_report)
+        report['Pitch'] = report['Pitch'].map(pitch_order)
+        report['Strike'] = report['Strike'].map(lambda x: f"{x:.1f}%")
+        report['0-0'] = report['0-0'].map(lambda x: f"{x:.1f}%")
+        report["Hitter's"] = report["Hitter's"].map(lambda x: f"{x:.1f}%")
+        report["Pitcher's"] = report["Pitcher's"].map(lambda x: f"{x:.1f}%")
+        report['2k'] = report['2k'].map(lambda x: f"{x:.1f}%")
+        report['Whiff'] = report['Whiff'].map(lambda x: f"{x:.1f}%")
+
+        # Limit to top 4 most thrown pitches for the report
+        report = report.sort_values('Count', ascending=False).head(6)
+
+        # Sort by dictionary order
+        pitch_order_list = list(pitch_order.values())
+        report['Pitch'] = pd.Categorical(report['Pitch'], categories=pitch_order_list, ordered=True)
+        report.sort_values('Pitch', inplace=True)
+
+        tables.append(report)
+
+    return tables
+
+
+# Mean (induced vertical, horizontal) break of each pitch type in sample_game, in inches
+PITCH_SHAPES = {
+    'Fastball': (16, 8),
+    'Sinker': (8, 15),
+    'Cutter': (8, -3),
+    'Slider': (1, -8),
+    'Curveball': (-10, -10),
+    'ChangeUp': (6, 13),
+    'Splitter': (3, 9),
+    'Knuckleball': (0, 0),
+}
+
+
+def sample_game(pitches=600, pitchers=8, seed=0):
+    """
+    A synthetic TrackMan game with the awkward cases real exports have: untagged pitches,
+    missing speeds and plate locations, and tilt in every supported format or blank.
+    """
+    rng = np.random.default_rng(seed)
+    pitcher_ids = rng.integers(0, pitchers, pitches) + 1000
+    frame = pd.DataFrame({
+        'Date': '2026-03-01',
+        'Pitcher': [f'Last{pitcher_id}, First{pitcher_id}' for pitcher_id in pitcher_ids],
+        'PitcherId': pitcher_ids,
+        'PitcherTeam': 'HOM_TEA',
+        'BatterTeam': 'AWA_TEA',
+        'TaggedPitchType': rng.choice(['Fastball', 'Sinker', 'Cutter', 'Slider', 'Curveball', 'ChangeUp', 'Splitter', 'Knuckleball', 'n/a'],
+            pitches, p=[.3, .08, .08, .14, .1, .12, .06, .04, .08]),
+        'RelSpeed': rng.normal(86, 5, pitches),
+        'InducedVertBreak': rng.normal(0, 3, pitches),
+        'HorzBreak': rng.normal(0, 3, pitches),
+        'SpinRate': rng.normal(2200, 200, pitches),
+        'VertApprAngle': rng.normal(-5, 1, pitches),
+        'HorzApprAngle': rng.normal(0, 1, pitches),
+        'RelHeight': rng.normal(5.8, .2, pitches),
+        'RelSide': rng.normal(-1.8, .3, pitches),
+        'Extension': rng.normal(6.2, .3, pitches),
+        'Tilt': rng.choice(['12:30', '1:15', '2:00:00', '11:45:00 AM', '1:30 PM', '', 'nan', ' 10:15 '], pitches),
+        'ZoneTime': rng.uniform(.35, .45, pitches),
+        'PlateLocHeight': rng.normal(2.5, .8, pitches),
+        'PlateLocSide': rng.normal(0, .8, pitches),
+        'PitchCall': rng.choice(['StrikeCalled', 'StrikeSwinging', 'FoulBallNotFieldable', 'FoulBall', 'InPlay', 'BallCalled', 'HitByPitch'], pitches),
+        'BatterSide': rng.choice(['Left', 'Right'], pitches),
+    })
+    # Give each pitch type its own movement so the break map clusters look like a real outing
+    for pitch_type, (vertical, horizontal) in PITCH_SHAPES.items():
+        rows = frame['TaggedPitchType'] == pitch_type
+        frame.loc[rows, 'InducedVertBreak'] += vertical
+        frame.loc[rows, 'HorzBreak'] += horizontal
+    frame.loc[rng.random(pitches) < .05, 'RelSpeed'] = np.nan
+    frame.loc[rng.random(pitches) < .03, ['PlateLocHeight', 'PlateLocSide']] = np.nan
+    # Drawn last so the columns above stay what the reference renders were made from
+    frame['Balls'] = rng.integers(0, 4, pitches)
+    frame['Strikes'] = rng.integers(0, 3, pitches)
+    frame['PitchofPA'] = np.where((frame['Balls'] == 0) & (frame['Strikes'] == 0), 1, frame['Balls'] + frame['Strikes'] + 1)
+    frame['BatterId'] = rng.integers(0, 30, pitches) + 2000
+    frame['Inning'] = np.sort(rng.integers(1, 10, pitches))
+    frame['PAofInning'] = rng.integers(1, 6, pitches)
+    frame['Outs'] = rng.integers(0, 3, pitches)
+    frame['KorBB'] = rng.choice(['Undefined', 'Walk', 'Strikeout'], pitches, p=[.8, .1, .1])
+    frame['PlayResult'] = rng.choice(['Undefined', 'Out', 'Single', 'Double', 'HomeRun', 'Error'], pitches, p=[.7, .15, .08, .04, .02, .01])
+    frame['HomeTeam'] = 'HOM_TEA'
+    frame['AwayTeam'] = 'AWA_TEA'
+    return frame
@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+from app.services import ingest
+from app.services.ingest import UploadRejected
+
+
+@pytest.mark.parametrize('extension', ['csv', 'xlsx', 'xlsx without dimension'])
+def test_row_limit_counts_data_rows_only(tmp_path, monkeypatch, extension):
+    path = str(tmp_path / f'game.{extension.split()[0]}')
+    frame = pd.DataFrame({'Pitcher': ['Last, First'] * 20, 'PitcherId': range(20)})
+    frame.to_csv(path, index=False) if extension == 'csv' else frame.to_excel(path, index=False)
+    if extension == 'xlsx without dimension':
+        # Only the loaded sheet is checked when the workbook does not declare its size
+        monkeypatch.setattr(ingest, '_declared_rows', lambda filepath: 0)
+
+    monkeypatch.setattr(ingest, 'MAX_ROWS', 20)
+    assert len(ingest.parse(path)[0]) == 20
+
+    monkeypatch.setattr(ingest, 'MAX_ROWS', 19)
+    with pytest.raises(UploadRejected):
+        ingest.parse(path)
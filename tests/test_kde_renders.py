@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from tests.render_reference import REFERENCE_DIR, render_maps
+
+# A pixel differs visibly when any channel moves by more than this (out of 255) ...
+VISIBLE_DIFFERENCE = 25
+# ... and at most this share of a chart's pixels may, which leaves room for contour edges
+# shifting by a pixel but not for a missing, added or reshaped contour level
+MAX_DIFFERING_PIXELS = 0.01
+
+
+def _on_white(path):
+    image = Image.open(path).convert('RGBA')
+    return np.asarray(Image.alpha_composite(Image.new('RGBA', image.size, 'white'), image).convert('RGB'), dtype=int)
+
+
+def test_fft_kde_maps_match_seaborn_renders(tmp_path):
+    names = render_maps(str(tmp_path))
+    assert names == sorted(os.listdir(REFERENCE_DIR))
+    for name in names:
+        rendered = _on_white(tmp_path / name)
+        reference = _on_white(os.path.join(REFERENCE_DIR, name))
+        assert rendered.shape == reference.shape, name
+        differing = (np.abs(rendered - reference).max(axis=2) > VISIBLE_DIFFERENCE).mean()
+        assert differing <= MAX_DIFFERING_PIXELS, f'{name}: {differing:.2%} of pixels differ'
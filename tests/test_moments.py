@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from app.services import moments
+
+
+def _merged(chunks):
+    return moments.describe(moments.merge(moments.summarize(chunk) for chunk in chunks))
+
+
+# At a 1e9 offset a chunk's mean is only exact to ~1e-7, but summing squares would lose the spread entirely
+@pytest.mark.parametrize('offset, tolerance', [(0, 1e-12), (1e9, 1e-6)])
+def test_merged_chunks_equal_numpy_over_all_values(offset, tolerance):
+    rng = np.random.default_rng(4)
+    values = rng.normal(offset, 2.5, 1000)
+    chunks = [values[:1], values[1:1], values[1:400], [], values[400:401], values[401:]]
+    result = _merged(chunks)
+    assert result['count'] == len(values)
+    assert result['mean'] == pytest.approx(values.mean(), rel=1e-12, abs=1e-9)
+    assert result['std'] == pytest.approx(values.std(ddof=1), rel=tolerance)
+
+
+def test_nan_is_ignored_and_empty_merges_are_empty():
+    assert moments.summarize([np.nan, 2.0, 4.0, np.nan]) == (2, 3.0, 2.0)
+    assert moments.summarize([np.nan]) == (0, None, None)
+    assert moments.merge([]) == (0, None, None)
+    # Stored rows of an outing without values have a NULL count as well as NULL moments
+    assert moments.merge([(None, None, None), (0, None, None)]) == (0, None, None)
+    assert moments.describe((0, None, None)) == {'count': 0, 'mean': None, 'std': None}
+    assert moments.describe(moments.summarize([91.5])) == {'count': 1, 'mean': 91.5, 'std': None}
+
+
+def test_combine_is_order_independent():
+    rng = np.random.default_rng(5)
+    summaries = [moments.summarize(rng.normal(85, 3, size)) for size in (3, 50, 1, 400)]
+    forward, backward = moments.merge(summaries), moments.merge(summaries[::-1])
+    assert forward[0] == backward[0]
+    assert forward[1:] == pytest.approx(backward[1:], rel=1e-12)
@@ -0,0 +1,158 @@
+import io
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from app.db.models import db, Outing, Outing_Pitch_Stat, Pitch, Pitch_Types, Pitcher, School
+from app.services import moments, pitcher_totals, sketches, team_stats
+from app.services.report import pitch_order
+from tests.report_reference import sample_game
+
+DATES = ['2026-03-01', '2026-03-08', '2026-03-15']
+
+
+@pytest.fixture
+def games(client, school):
+    # Three games a week apart for the same two pitchers
+    games = [sample_game(pitches=200, pitchers=2, seed=seed).assign(Date=day) for seed, day in enumerate(DATES)]
+    for index, game in enumerate(games):
+        team_stats.add_report(school.id, 'HOM_TEA', source=game, content_hash=f'game{index}')
+    return games
+
+
+def _pitches(games, trackman_id):
+    return sum(int((game['PitcherId'] == trackman_id).sum()) for game in games)
+
+
+def _pitcher_id(trackman_id):
+    return Pitcher.query.filter_by(trackman_id=str(trackman_id)).one().id
+
+
+@pytest.mark.parametrize('query, saved', [
+    ('', [0, 1, 2]),
+    ('?from=2026-03-08', [1, 2]),
+    ('?to=2026-03-08', [0, 1]),
+    ('?from=2026-03-08&to=2026-03-08', [1]),
+    ('?from=2026-03-02&to=2026-03-14', [1]),
+    ('?from=&to=', [0, 1, 2]),
+    ('?from=2026-03-15&to=2026-03-01', []),
+])
+def test_team_overview_date_range(client, games, query, saved):
+    response = client.get(f'/api/team/overview{query}')
+    assert response.status_code == 200
+    totals = {row['pitcher_id']: row['total_pitches'] for row in response.get_json()}
+    expected = {_pitcher_id(trackman_id): _pitches([games[index] for index in saved], trackman_id) for trackman_id in (1000, 1001)}
+    assert totals == {pitcher_id: pitches for pitcher_id, pitches in expected.items() if pitches}
+
+
+@pytest.mark.parametrize('query, saved', [
+    ('', [0, 1, 2]),
+    ('?from=2026-03-08', [1, 2]),
+    ('?to=2026-03-01', [0]),
+    ('?from=2026-03-15&to=2026-03-01', []),
+])
+def test_pitcher_averages_date_range(client, games, query, saved):
+    response = client.get(f'/api/pitcher/{_pitcher_id(1000)}/averages{query}')
+    assert response.status_code == 200
+    assert sum(row['tot_count'] for row in response.get_json()) == _pitches([games[index] for index in saved], 1000)
+
+
+@pytest.mark.parametrize('query', ['?from=2026-13-01', '?to=yesterday', '?from=2026-03-01&to=03/15/2026'])
+def test_invalid_date_is_rejected(client, games, query):
+    pitcher_id = _pitcher_id(1000)
+    for path in ('/api/team/overview', '/api/team/overview/download', f'/api/pitcher/{pitcher_id}/averages',
+            f'/api/pitcher/{pitcher_id}/averages/download', f'/api/pitcher/{pitcher_id}/trends'):
+        response = client.get(f'{path}{query}')
+        assert response.status_code == 400, path
+        assert response.get_json() == {'error': 'Invalid date; use YYYY-MM-DD'}
+
+
+def test_download_date_range(client, games):
+    response = client.get('/api/team/overview/download?from=2026-03-08&to=2026-03-08')
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment; filename="HOME-TEAM_team_overview.xlsx"'
+    rows = list(load_workbook(io.BytesIO(response.data)).active.iter_rows(min_row=2, values_only=True))
+    assert sorted(row[1] for row in rows) == sorted(_pitches([games[1]], trackman_id) for trackman_id in (1000, 1001))
+
+
+def test_outings_without_sketches_fall_back_to_their_quartiles(client, games):
+    # The first game as saved before sketches and the pitches table existed
+    legacy = [outing_id for (outing_id,) in db.session.query(Outing.id).filter_by(content_hash='game0')]
+    Outing_Pitch_Stat.query.filter(Outing_Pitch_Stat.outing_id.in_(legacy)).update(
+        {sketch: None for sketch in sketches.SKETCHES}, synchronize_session=False)
+    Pitch.query.filter(Pitch.outing_id.in_(legacy)).delete(synchronize_session=False)
+    pitcher_totals.rebuild()
+    db.session.commit()
+
+    pitcher_id = _pitcher_id(1000)
+    stats = db.session.query(Pitch_Types.abbreviation, Outing.id, Outing.date, Outing_Pitch_Stat.low_quartile_speed,
+        Outing_Pitch_Stat.median_speed, Outing_Pitch_Stat.high_quartile_speed
+    ).join(Outing, Outing_Pitch_Stat.outing_id == Outing.id).join(Pitch_Types, Outing_Pitch_Stat.pitch_type_id == Pitch_Types.id
+    ).filter(Outing.pitcher_id == pitcher_id, Outing_Pitch_Stat.median_speed.is_not(None)).all()
+    for query, last in (('', '2026-03-15'), ('?to=2026-03-08', '2026-03-08')):
+        rows = client.get(f'/api/pitcher/{pitcher_id}/averages{query}').get_json()
+        for row in rows:
+            outings = [stat for stat in stats if stat.abbreviation == row['pitch_type'] and stat.date.isoformat() <= last]
+            assert row['approximate'] == any(stat.id in legacy for stat in outings)
+            if row['approximate']:
+                for name in ('low_quartile_speed', 'median_speed', 'high_quartile_speed'):
+                    assert row[name] == pytest.approx(sum(getattr(stat, name) for stat in outings) / len(outings))
+        assert any(row['approximate'] for row in rows)
+
+    # Without the legacy game in the range every quartile comes from the sketches again
+    rows = client.get(f'/api/pitcher/{pitcher_id}/averages?from=2026-03-08').get_json()
+    assert rows and not any(row['approximate'] for row in rows)
+
+    response = client.get(f'/api/pitcher/{pitcher_id}/averages/download')
+    sheet = list(load_workbook(io.BytesIO(response.data)).active.iter_rows(values_only=True))
+    assert sheet[0][-1] == 'Approximate'
+    assert 'Yes' in [row[-1] for row in sheet[1:]]
+
+
+@pytest.mark.parametrize('by, starts', [
+    ('outing', DATES),
+    ('week', ['2026-02-23', '2026-03-02', '2026-03-09']),
+    ('month', ['2026-03-01']),
+])
+def test_pitcher_trends_periods(client, games, by, starts):
+    response = client.get(f'/api/pitcher/{_pitcher_id(1000)}/trends?by={by}')
+    assert response.status_code == 200
+    trends = response.get_json()
+
+    pitches = pd.concat(games)
+    pitches = pitches[pitches['PitcherId'] == 1000].assign(
+        pitch_type=lambda frame: frame['TaggedPitchType'].map(lambda name: pitch_order.get(name, 'UN')))
+    assert [trend['pitch_count'] for trend in trends] == sorted(pitches['pitch_type'].value_counts(), reverse=True)
+    for trend in trends:
+        thrown = pitches[pitches['pitch_type'] == trend['pitch_type']]
+        assert trend['pitch_count'] == len(thrown)
+        assert [point['date'] for point in trend['points']] == starts
+        assert sum(point['outing_count'] for point in trend['points']) == len(DATES)
+        for metric, column in moments.MOMENTS.items():
+            overall = trend['overall'][metric]
+            assert overall['count'] == thrown[column].count()
+            assert overall['mean'] == pytest.approx(thrown[column].mean())
+            assert overall['std'] == pytest.approx(thrown[column].std(ddof=1))
+
+
+def test_pitcher_trends_date_range(client, games):
+    trends = client.get(f'/api/pitcher/{_pitcher_id(1000)}/trends?by=week&from=2026-03-02&to=2026-03-14').get_json()
+    assert trends and all([point['date'] for point in trend['points']] == ['2026-03-02'] for trend in trends)
+    assert sum(trend['pitch_count'] for trend in trends) == _pitches([games[1]], 1000)
+    assert client.get(f'/api/pitcher/{_pitcher_id(1000)}/trends?from=2026-03-15&to=2026-03-01').get_json() == []
+
+
+@pytest.mark.parametrize('query', ['?by=day', '?by=', '?by=WEEK', '?by=week&from=2026-02-30', '?by=month&to=March'])
+def test_pitcher_trends_rejects_bad_parameters(client, games, query):
+    response = client.get(f'/api/pitcher/{_pitcher_id(1000)}/trends{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_pitcher_trends_of_another_school_is_not_found(client, games):
+    other = School(name='Away Team', slug='away-team', admin_email='admin@away.test', trackman_id='AWA_TEA')
+    db.session.add(other)
+    db.session.commit()
+    team_stats.add_report(other.id, 'HOM_TEA', source=sample_game(pitches=50, pitchers=1).assign(PitcherId=7000), content_hash='other')
+    assert client.get(f'/api/pitcher/{_pitcher_id(7000)}/trends?by=week').status_code == 404
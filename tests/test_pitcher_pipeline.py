@@ -0,0 +1,40 @@
+import os
+from types import SimpleNamespace
+
+from app.services import pitcher_pipeline, report
+from app.services.branding_loader import BrandingLoader
+from app.services.game_frame import GameFrame
+from tests.report_reference import sample_game
+
+
+def _render(game, folder, workers):
+    user = SimpleNamespace(id=1, school=SimpleNamespace(slug='default', is_active=True))
+    temp_folder, output_folder = os.path.join(folder, 'temp'), os.path.join(folder, 'reports')
+    os.makedirs(temp_folder)
+    os.makedirs(output_folder)
+    job = pitcher_pipeline.report_job(user, temp_folder, output_folder, BrandingLoader.get_branding('default'), ['light', 'dark'], game)
+    return list(pitcher_pipeline.process_pitchers(game, game.pitcher_order, job, workers=workers)), temp_folder
+
+
+def test_process_pool_renders_the_same_reports_as_serial(tmp_path):
+    game = GameFrame(sample_game(pitches=240, pitchers=2, seed=5))
+    try:
+        serial, serial_charts = _render(game, str(tmp_path / 'serial'), workers=0)
+        pooled, pooled_charts = _render(game, str(tmp_path / 'pooled'), workers=2)
+    finally:
+        pitcher_pipeline._reset_pool()
+
+    assert [pitcher_id for pitcher_id, _ in pooled] == game.pitcher_order == [pitcher_id for pitcher_id, _ in serial]
+    for (_, expected), (_, result) in zip(serial, pooled):
+        assert not isinstance(result, Exception), result
+        assert result['report'] == expected['report']
+        assert result['image_bytes'] == expected['image_bytes']
+        assert os.path.exists(result['pdf_path'])
+
+    charts = sorted(os.listdir(serial_charts))
+    assert len(charts) == len(game.pitcher_order) * len(pitcher_pipeline.CHARTS) * 3
+    assert sorted(os.listdir(pooled_charts)) == charts
+    # Only the raster images are compared byte for byte; matplotlib salts SVG element ids per process
+    for name in (name for name in charts if name.endswith(f'.{report.WEB_FORMAT}')):
+        with open(os.path.join(serial_charts, name), 'rb') as expected, open(os.path.join(pooled_charts, name), 'rb') as result:
+            assert result.read() == expected.read(), name
@@ -0,0 +1,60 @@
+from datetime import date
+
+import pytest
+
+from app.db.models import db, Pitcher, Pitcher_Total
+from app.routes import pages
+from app.services import pitcher_totals, team_stats
+from tests.report_reference import sample_game
+
+# Covers every saved outing, so the dashboard sums the outings instead of reading the totals
+EVERYTHING = (date(2000, 1, 1), date(2100, 1, 1))
+
+
+def _rows(query, key):
+    return sorted((row._asdict() for row in query), key=lambda row: row[key])
+
+
+def _assert_same_rows(result, expected):
+    assert len(result) == len(expected)
+    for row, expected_row in zip(result, expected):
+        assert row == pytest.approx(expected_row, rel=1e-9)
+
+
+def _assert_totals_match_outings(school_id):
+    # The whole-history dashboard reads the materialized totals; any range sums the outings
+    overview = _rows(pages._team_overview_query(school_id), 'pitcher_id')
+    _assert_same_rows(overview, _rows(pages._team_overview_query(school_id, *EVERYTHING), 'pitcher_id'))
+
+    for pitcher_id in [pitcher_id for (pitcher_id,) in db.session.query(Pitcher.id).filter_by(school_id=school_id)]:
+        _assert_same_rows(_rows(pages._pitcher_averages_query(pitcher_id), 'pitch_type_id'),
+            _rows(pages._pitcher_averages_query(pitcher_id, *EVERYTHING), 'pitch_type_id'))
+        assert pages._pitch_type_sketches(pitcher_id) == pages._pitch_type_sketches(pitcher_id, *EVERYTHING)
+    return overview
+
+
+def test_totals_follow_add_and_remove_report(app, school):
+    for seed in range(4):
+        team_stats.add_report(school.id, 'HOM_TEA', source=sample_game(seed=seed).assign(Date=f'2026-03-0{seed + 1}'), content_hash=f'game{seed}')
+    assert len(_assert_totals_match_outings(school.id)) == Pitcher_Total.query.count() == Pitcher.query.count()
+
+    team_stats.remove_report('game1')
+    _assert_totals_match_outings(school.id)
+
+    # A pitcher whose only outing is removed drops out of the totals instead of keeping stale ones
+    team_stats.add_report(school.id, 'HOM_TEA', source=sample_game(pitchers=1, seed=9).assign(PitcherId=5000), content_hash='once')
+    team_stats.remove_report('once')
+    pitcher_id = Pitcher.query.filter_by(trackman_id='5000').one().id
+    assert pitcher_id not in [row['pitcher_id'] for row in _assert_totals_match_outings(school.id)]
+    assert not pages._pitcher_averages_query(pitcher_id).all()
+
+
+def test_rebuild_matches_the_incremental_totals(app, school):
+    for seed in range(3):
+        team_stats.add_report(school.id, 'HOM_TEA', source=sample_game(seed=seed).assign(Date=f'2026-04-0{seed + 1}'), content_hash=f'game{seed}')
+    overview = _rows(pages._team_overview_query(school.id), 'pitcher_id')
+
+    pitcher_totals.rebuild(school.id)
+    db.session.commit()
+    _assert_same_rows(_rows(pages._team_overview_query(school.id), 'pitcher_id'), overview)
+    _assert_totals_match_outings(school.id)
@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+
+from app.services.render_cache import RenderCache, fingerprint
+
+
+def _artifacts(folder, contents):
+    paths = {}
+    for name, content in contents.items():
+        paths[name] = os.path.join(folder, f'rendered_{name}')
+        with open(paths[name], 'w') as f:
+            f.write(content)
+    return paths
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_key_changes_with_any_part_but_not_dict_order():
+    assert RenderCache.key('abc', {'a': 1, 'b': 2}, 1) == RenderCache.key('abc', {'b': 2, 'a': 1}, 1)
+    assert RenderCache.key('abc', {'a': 1, 'b': 2}, 1) != RenderCache.key('abc', {'a': 1, 'b': 2}, 2)
+    assert RenderCache.key('abc', ['light', 'dark']) != RenderCache.key('abc', ['dark', 'light'])
+
+
+def test_fingerprint_ignores_the_index_and_unused_columns():
+    frame = pd.DataFrame({'RelSpeed': [90.1, 85.2], 'SpinRate': [2200, 2100], 'Notes': ['a', 'b']})
+    moved = frame.set_axis([10, 11]).assign(Notes=['c', 'd'])
+    assert fingerprint(frame, ['RelSpeed', 'SpinRate', 'Missing']) == fingerprint(moved, ['SpinRate', 'RelSpeed'])
+    assert fingerprint(frame, ['RelSpeed']) != fingerprint(frame.iloc[::-1], ['RelSpeed'])
+    assert fingerprint(frame, ['RelSpeed']) != fingerprint(frame.assign(RelSpeed=[90.1, 85.3]), ['RelSpeed'])
+
+
+def test_restore_copies_every_artifact_on_a_hit(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), max_bytes=1 << 20)
+    cache.store('k', _artifacts(str(tmp_path), {'chart.webp': 'chart', 'report.pdf': 'pdf'}), {'rows': 3})
+    targets = {'chart.webp': str(tmp_path / 'chart.webp'), 'report.pdf': str(tmp_path / 'report.pdf')}
+
+    assert cache.restore('k', targets) == {'rows': 3}
+    assert (_read(targets['chart.webp']), _read(targets['report.pdf'])) == ('chart', 'pdf')
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_restore_miss_leaves_destinations_untouched(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), max_bytes=1 << 20)
+    cache.store('k', _artifacts(str(tmp_path), {'a.webp': 'new a', 'b.pdf': 'new b'}), {})
+    targets = {'a.webp': str(tmp_path / 'a.webp'), 'b.pdf': str(tmp_path / 'b.pdf')}
+    for path in targets.values():
+        with open(path, 'w') as f:
+            f.write('old')
+
+    # The later artifact disappears, as when the entry is evicted while being restored
+    os.remove(os.path.join(cache.root, 'k', 'b.pdf'))
+    assert cache.restore('k', targets) is None
+    assert cache.restore('unknown', targets) is None
+    assert cache.restore('k', {'a.webp': targets['a.webp']}) is None
+    assert [_read(path) for path in targets.values()] == ['old', 'old']
+    assert sorted(os.listdir(tmp_path)) == ['a.webp', 'b.pdf', 'cache', 'rendered_a.webp', 'rendered_b.pdf']
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_evict_removes_least_recently_used_entries(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), max_bytes=0)
+    for age, key in enumerate(['old', 'use', 'new']):
+        cache.store(key, _artifacts(str(tmp_path), {'chart.webp': key * 40}), {})
+        os.utime(os.path.join(cache.root, key), (1000 + age, 1000 + age))
+    # Room for two of the three equally sized entries
+    entry = os.path.join(cache.root, 'new')
+    cache.max_bytes = 2 * sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+
+    # Restoring an entry marks it as the most recently used
+    assert cache.restore('use', {'chart.webp': str(tmp_path / 'chart.webp')}) == {}
+    cache.evict()
+    assert sorted(name for name in os.listdir(cache.root) if not name.startswith('.')) == ['new', 'use']
+    assert cache.evictions == 1
+
+    cache.max_bytes = 0
+    cache.evict()
+    assert os.listdir(cache.root) == []
+    assert cache.evictions == 3
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from app.services.report import build_table, usage_table
+from tests.report_reference import build_table_loop, sample_game, usage_table_loop
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_build_table_matches_per_row_loop(seed):
+    game = sample_game(seed=seed)
+    for pitcher_id, pitcher_data in game.groupby('PitcherId'):
+        expected = build_table_loop(pitcher_data, pitcher_id)
+        result = build_table(pitcher_data, pitcher_id)
+        assert result[:4] == expected[:4]
+        pd.testing.assert_frame_equal(result[4], expected[4])
+
+
+def test_build_table_matches_per_row_loop_on_a_single_pitch_type():
+    pitcher_data = sample_game(pitches=40, pitchers=1)
+    pitcher_data = pitcher_data[pitcher_data['TaggedPitchType'].isin(['Fastball', 'n/a'])]
+    pd.testing.assert_frame_equal(build_table(pitcher_data, 1000)[4], build_table_loop(pitcher_data, 1000)[4])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_usage_table_matches_per_type_loop(seed):
+    game = sample_game(seed=seed)
+    for pitcher_id, pitcher_data in game.groupby('PitcherId'):
+        for result, expected in zip(usage_table(pitcher_data, pitcher_id), usage_table_loop(game, pitcher_id), strict=True):
+            pd.testing.assert_frame_equal(result, expected)
+
+
+def test_usage_table_matches_per_type_loop_for_one_handed_batters():
+    # Every batter hits right-handed, so the left-side table has no pitches and zero totals
+    game = sample_game(pitches=120, pitchers=2, seed=3).assign(BatterSide='Right')
+    for pitcher_id, pitcher_data in game.groupby('PitcherId'):
+        result, expected = usage_table(pitcher_data, pitcher_id), usage_table_loop(game, pitcher_id)
+        assert result[0].empty
+        for result_table, expected_table in zip(result, expected, strict=True):
+            pd.testing.assert_frame_equal(result_table, expected_table)
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from app.services import ingest, season
+from tests.report_reference import sample_game
+
+
+def _game(seed, game_id):
+    game = sample_game(pitches=120, pitchers=2, seed=seed)
+    game['GameID'] = game_id
+    return game
+
+
+def test_content_hash_is_the_same_for_a_game_alone_or_in_a_season(tmp_path):
+    first, second = _game(1, 'G1'), _game(2, 'G2')
+    pd.concat([first, second], ignore_index=True).to_csv(tmp_path / 'season.csv', index=False)
+    games = season.partition_games(str(tmp_path / 'season.csv'), str(tmp_path / 'partitions'))
+    hashes = [season.content_hash(season.load_game(game)) for game in games]
+    assert hashes[0] != hashes[1]
+
+    second.to_csv(tmp_path / 'game.csv', index=False)
+    second.to_excel(tmp_path / 'game.xlsx', index=False)
+    assert season.content_hash(ingest.parse(str(tmp_path / 'game.csv'))[0]) == hashes[1]
+    assert season.content_hash(ingest.parse(str(tmp_path / 'game.xlsx'))[0]) == hashes[1]
+
+
+def test_oversized_game_is_skipped_without_failing_the_season(tmp_path, monkeypatch):
+    monkeypatch.setattr(season, 'MAX_ROWS', 100)
+    small = _game(1, 'G1').head(80)
+    pd.concat([small, _game(2, 'G2'), small.assign(GameID='G3')], ignore_index=True).to_csv(tmp_path / 'season.csv', index=False)
+    games = season.partition_games(str(tmp_path / 'season.csv'), str(tmp_path / 'partitions'))
+    assert [game['key'] for game in games] == ['G1', 'G2', 'G3']
+    assert 'error' not in games[0] and 'error' not in games[2]
+    assert 'too many rows' in games[1]['error']
+    assert len(season.load_game(games[2])) == 80
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import sketches
+
+
+@pytest.mark.parametrize('sketch', sketches.SKETCHES)
+@pytest.mark.parametrize('size', [1, 2, 7, 500])
+def test_quantiles_are_within_half_a_bin_of_pandas(sketch, size):
+    _, low, width, bins = sketches.SKETCHES[sketch]
+    rng = np.random.default_rng(size)
+    # Inside the sketch's range, where only the binning separates it from the exact quantile
+    values = pd.Series(rng.uniform(low + width, low + width * (bins - 1), size))
+    qs = (0, 0.1, 0.25, 0.5, 0.75, 0.9, 1)
+    result = sketches.quantiles(sketches.build(values, sketch), sketch, qs)
+    expected = values.quantile(list(qs)).to_numpy()
+    assert np.all(np.abs(np.array(result) - expected) <= width / 2 + 1e-9)
+
+
+def test_merge_equals_build_over_all_values():
+    rng = np.random.default_rng(1)
+    chunks = [rng.normal(88, 4, 300), np.array([]), rng.normal(75, 3, 40), np.array([np.nan, 91.2]), rng.normal(95, 1, 2000)]
+    built = [sketches.build(chunk, 'speed_sketch') for chunk in chunks]
+    assert built[1] is None
+    assert sketches.merge(built) == sketches.build(np.concatenate(chunks), 'speed_sketch')
+    assert sketches.merge(built[::-1]) == sketches.merge(built)
+    assert sketches.merge([None, None]) is None
+    assert sketches.quantiles(None, 'speed_sketch') == [None, None, None]
+
+
+@pytest.mark.parametrize('repeats, size', [(255, 1), (256, 2), (65535, 2), (65536, 4)])
+def test_counts_are_stored_in_the_narrowest_width(repeats, size):
+    values = np.concatenate([np.full(repeats, 90.05), [85.05, 95.05]])
+    blob = sketches.build(values, 'speed_sketch')
+    first, counts = sketches._decode(blob)
+    assert blob[2] == size
+    assert len(blob) == 3 + len(counts) * size
+    assert first == 550 and len(counts) == 101
+    assert (counts[0], counts[50], counts[100], counts.sum()) == (1, repeats, 1, repeats + 2)
+    assert sketches._encode(first, counts) == blob
+
+
+def test_merge_switches_to_a_wider_width_when_counts_grow():
+    narrow = sketches.build(np.full(200, 2200.0), 'spin_rate_sketch')
+    assert narrow[2] == 1
+    merged = sketches.merge([narrow, narrow])
+    assert merged[2] == 2
+    assert sketches._decode(merged)[1].tolist() == [400]
+
+
+def test_out_of_range_values_fall_into_the_end_bins():
+    _, low, width, bins = sketches.SKETCHES['speed_sketch']
+    blob = sketches.build([-5.0, 12.0, 120.0, 400.0], 'speed_sketch')
+    first, counts = sketches._decode(blob)
+    assert first == 0 and len(counts) == bins
+    assert (counts[0], counts[-1], counts.sum()) == (2, 2, 4)
+    assert sketches.quantiles(blob, 'speed_sketch', (0, 1)) == pytest.approx([low + width / 2, low + (bins - 0.5) * width])
@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+
+from app.db.models import db, Outing, Outing_Pitch_Stat, Pitch, Pitch_Types, Pitcher
+from app.services import team_stats
+from tests.report_reference import sample_game
+
+
+def _save_with_orm(school_id, trackman_id, source, content_hash):
+    # The per-pitcher ORM save add_report replaced: one outing, then its pitch stats, per pitcher
+    team_data = source[source['PitcherTeam'] == trackman_id]
+    for trackman_pitcher_id in team_data['PitcherId'].unique():
+        pitcher_data = team_data[team_data['PitcherId'] == trackman_pitcher_id]
+        pitcher_id = team_stats.add_pitcher(school_id, trackman_pitcher_id, pitcher_data['Pitcher'].iloc[0])
+        outing_id = team_stats.add_outing(
+            pitcher_id,
+            pd.to_datetime(pitcher_data['Date'].mode().iloc[0]).date(),
+            content_hash,
+            trackman_id == pitcher_data['HomeTeam'].iloc[0],
+            pitcher_data.shape[0],
+            pitcher_data)
+        team_stats.add_outing_pitch_stats(pitcher_id, outing_id, pitcher_data)
+        db.session.commit()
+
+
+def _saved_rows():
+    # Rows keyed by TrackMan pitcher and pitch type name instead of ids, which depend on insert order
+    pitchers = dict(db.session.query(Pitcher.id, Pitcher.trackman_id).all())
+    pitch_types = dict(db.session.query(Pitch_Types.id, Pitch_Types.name).all())
+
+    def values(row, skip):
+        return {column.name: getattr(row, column.name) for column in row.__table__.columns if column.name not in skip}
+
+    outings = sorted(({**values(outing, {'id', 'pitcher_id', 'created_at'}), 'pitcher': pitchers[outing.pitcher_id]}
+        for outing in Outing.query.all()), key=lambda row: row['pitcher'])
+    stats = sorted(({**values(stat, {'id', 'pitcher_id', 'outing_id', 'pitch_type_id'}),
+        'pitcher': pitchers[stat.pitcher_id], 'pitch_type': pitch_types[stat.pitch_type_id]}
+        for stat in Outing_Pitch_Stat.query.all()), key=lambda row: (row['pitcher'], row['pitch_type'], row['count']))
+    return outings, stats
+
+
+def _assert_same_rows(result, expected):
+    assert len(result) == len(expected)
+    for result_row, expected_row in zip(result, expected):
+        assert result_row == pytest.approx(expected_row, rel=1e-9, nan_ok=True)
+
+
+@pytest.mark.parametrize('seed', range(3))
+# The ORM save divides 0 by 0 for the empty Undefined row
+@pytest.mark.filterwarnings('ignore:invalid value encountered:RuntimeWarning')
+def test_bulk_save_matches_the_orm_save(app, school, seed):
+    game = sample_game(seed=seed)
+    # Untagged pitches still count toward each pitcher's total in every percentage
+    game.loc[game.sample(frac=.05, random_state=seed).index, 'TaggedPitchType'] = None
+    _save_with_orm(school.id, 'HOM_TEA', game, 'game')
+    expected_outings, expected_stats = _saved_rows()
+    # The ORM save also wrote an empty Undefined row for the untagged pitches, which the bulk save leaves out
+    expected_stats = [row for row in expected_stats if row['count']]
+    team_stats.remove_report('game')
+    db.session.query(Pitcher).delete()
+    db.session.commit()
+
+    team_stats.add_report(school.id, 'HOM_TEA', source=game, content_hash='game')
+    outings, stats = _saved_rows()
+    assert len(outings) == game['PitcherId'].nunique()
+    _assert_same_rows(outings, expected_outings)
+    _assert_same_rows(stats, expected_stats)
+    assert Pitch.query.count() == len(game)
+
+
+def test_a_saved_game_is_skipped_by_content_or_file_hash(app, school):
+    team_stats.add_report(school.id, 'HOM_TEA', source=sample_game(seed=1), content_hash='rows-hash', file_hash='file-md5')
+    saved = _saved_rows()
+
+    team_stats.add_report(school.id, 'HOM_TEA', source=sample_game(seed=1), content_hash='rows-hash')
+    assert _saved_rows() == saved
+
+    # Games saved before content hashes were computed from the rows are stored under the file MD5
+    _save_with_orm(school.id, 'HOM_TEA', sample_game(seed=2), 'legacy-md5')
+    before = Outing.query.count()
+    team_stats.add_report(school.id, 'HOM_TEA', source=sample_game(seed=2), content_hash='new-hash', file_hash='legacy-md5')
+    assert Outing.query.count() == before
+    assert not Outing.query.filter_by(content_hash='new-hash').count()
+
+
+def test_remove_report_removes_only_that_game(app, school):
+    team_stats.add_report(school.id, 'HOM_TEA', source=sample_game(seed=1), content_hash='first')
+    first = _saved_rows()
+    team_stats.add_report(school.id, 'HOM_TEA', source=sample_game(seed=2).assign(Date='2026-03-08'), content_hash='second')
+
+    team_stats.remove_report('second')
+    assert _saved_rows() == first
+    assert Pitch.query.count() == len(sample_game(seed=1))
+    team_stats.remove_report('first')
+    assert not Outing.query.count() and not Outing_Pitch_Stat.query.count() and not Pitch.query.count()
+    team_stats.remove_report('unknown')
+
+
+def test_every_accepted_tilt_format_is_saved(app, school):
+    # One of each format report._parse_tilt accepts, and text too long for the column
+    tilts = ['12:30', '1:15', '2:00:00', '11:45:00 AM', '1:30 PM', ' 10:15 ', 'not a tilt value at all']
+    game = sample_game(pitches=len(tilts) * 4, pitchers=1)
+    game['Tilt'] = tilts * 4
+    team_stats.add_report(school.id, 'HOM_TEA', source=game, content_hash='tilts')
+
+    saved = [tilt for (tilt,) in db.session.query(Pitch.tilt).order_by(Pitch.pitch_number)]
+    assert saved == (tilts[:-1] + [None]) * 4
+    assert Pitch.__table__.c.tilt.type.length >= len('11:45:00 AM')